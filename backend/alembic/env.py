@@ -12,7 +12,7 @@ sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 # Import the Base and ALL models (important for autogenerate)
 from app.models.user import Base
-from app.models import user, employee, evaluation, dormitory_bill, pidms_key
+from app.models import user, employee, evaluation, dormitory_bill, dormitory_term_rollup, dormitory_bill_anomaly, pidms_key, pidms_sync_run, pidms_product_summary, pidms_key_history, pidms_key_reservation, rate_limit_counter
 
 # Import settings to get DATABASE_URL from environment
 from app.core.config import settings
@@ -0,0 +1,64 @@
+"""add_dormitory_term_rollups
+
+Revision ID: 3a7d2c91e4b5
+Revises: cff0ef795a50
+Create Date: 2026-10-19 09:12:40.118254
+
+Changes:
+- Create dormitory_term_rollups table (per-term, per-dorm usage aggregates)
+- Backfill rollups for all existing terms from dormitory_bills
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a7d2c91e4b5'
+down_revision: Union[str, None] = 'cff0ef795a50'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'dormitory_term_rollups',
+        sa.Column('term_code', sa.String(length=10), nullable=False),
+        sa.Column('dorm_code', sa.String(length=20), nullable=False),
+        sa.Column('factory_location', sa.String(length=100), nullable=True),
+        sa.Column('occupant_count', sa.Integer(), nullable=False),
+        sa.Column('elec_usage', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('water_usage', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('elec_amount', sa.Numeric(precision=18, scale=2), nullable=False),
+        sa.Column('water_amount', sa.Numeric(precision=18, scale=2), nullable=False),
+        sa.Column('shared_fee', sa.Numeric(precision=18, scale=2), nullable=False),
+        sa.Column('management_fee', sa.Numeric(precision=18, scale=2), nullable=False),
+        sa.Column('total_amount', sa.Numeric(precision=18, scale=2), nullable=False),
+        sa.Column('refreshed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('term_code', 'dorm_code', name='pk_dormitory_term_rollups')
+    )
+    op.create_index('idx_dormitory_term_rollups_factory', 'dormitory_term_rollups', ['term_code', 'factory_location'], unique=False)
+
+    # Backfill rollups for all existing terms
+    op.execute("""
+        INSERT INTO dormitory_term_rollups (
+            term_code, dorm_code, factory_location, occupant_count,
+            elec_usage, water_usage, elec_amount, water_amount,
+            shared_fee, management_fee, total_amount
+        )
+        SELECT
+            term_code, dorm_code, MAX(factory_location), COUNT(*),
+            COALESCE(SUM(elec_usage), 0), COALESCE(SUM(water_usage), 0),
+            COALESCE(SUM(elec_amount), 0), COALESCE(SUM(water_amount), 0),
+            COALESCE(SUM(shared_fee), 0), COALESCE(SUM(management_fee), 0),
+            COALESCE(SUM(total_amount), 0)
+        FROM dormitory_bills
+        GROUP BY term_code, dorm_code
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_dormitory_term_rollups_factory', table_name='dormitory_term_rollups')
+    op.drop_table('dormitory_term_rollups')
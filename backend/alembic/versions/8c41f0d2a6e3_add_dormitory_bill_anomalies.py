@@ -0,0 +1,48 @@
+"""add_dormitory_bill_anomalies
+
+Revision ID: 8c41f0d2a6e3
+Revises: 3a7d2c91e4b5
+Create Date: 2026-10-19 10:03:17.542913
+
+Changes:
+- Create dormitory_bill_anomalies table for meter-reading gaps, resets and usage spikes
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c41f0d2a6e3'
+down_revision: Union[str, None] = '3a7d2c91e4b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'dormitory_bill_anomalies',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('dorm_code', sa.String(length=20), nullable=False),
+        sa.Column('term_code', sa.String(length=10), nullable=False),
+        sa.Column('previous_term_code', sa.String(length=10), nullable=True),
+        sa.Column('meter', sa.String(length=10), nullable=False),
+        sa.Column('anomaly_type', sa.String(length=20), nullable=False),
+        sa.Column('expected_value', sa.Numeric(precision=14, scale=2), nullable=True),
+        sa.Column('actual_value', sa.Numeric(precision=14, scale=2), nullable=True),
+        sa.Column('deviation', sa.Numeric(precision=14, scale=2), nullable=True),
+        sa.Column('detected_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_dormitory_bill_anomalies_term', 'dormitory_bill_anomalies', ['term_code'], unique=False)
+    op.create_index('idx_dormitory_bill_anomalies_dorm_term', 'dormitory_bill_anomalies', ['dorm_code', 'term_code'], unique=False)
+    op.create_index('idx_dormitory_bill_anomalies_type', 'dormitory_bill_anomalies', ['anomaly_type'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_dormitory_bill_anomalies_type', table_name='dormitory_bill_anomalies')
+    op.drop_index('idx_dormitory_bill_anomalies_dorm_term', table_name='dormitory_bill_anomalies')
+    op.drop_index('idx_dormitory_bill_anomalies_term', table_name='dormitory_bill_anomalies')
+    op.drop_table('dormitory_bill_anomalies')
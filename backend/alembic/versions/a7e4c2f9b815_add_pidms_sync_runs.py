@@ -0,0 +1,45 @@
+"""add_pidms_sync_runs
+
+Revision ID: a7e4c2f9b815
+Revises: f1b3c5d7e902
+Create Date: 2026-10-19 12:52:31.904417
+
+Changes:
+- Create pidms_sync_runs table recording scheduled and manual PIDMS syncs
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7e4c2f9b815'
+down_revision: Union[str, None] = 'f1b3c5d7e902'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'pidms_sync_runs',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('trigger', sa.String(length=20), nullable=False),
+        sa.Column('mode', sa.String(length=20), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('worker', sa.String(length=255), nullable=True),
+        sa.Column('total_synced', sa.Integer(), nullable=False),
+        sa.Column('updated', sa.Integer(), nullable=False),
+        sa.Column('errors', sa.Integer(), nullable=False),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_pidms_sync_runs_started_at', 'pidms_sync_runs', ['started_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_pidms_sync_runs_started_at', table_name='pidms_sync_runs')
+    op.drop_table('pidms_sync_runs')
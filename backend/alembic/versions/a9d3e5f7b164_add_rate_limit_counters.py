@@ -0,0 +1,39 @@
+"""add_rate_limit_counters
+
+Revision ID: a9d3e5f7b164
+Revises: f3c9d1b7a248
+Create Date: 2026-10-19 16:10:27.530418
+
+Changes:
+- Create UNLOGGED rate_limit_counters table for the shared rate-limit backend
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9d3e5f7b164'
+down_revision: Union[str, None] = 'f3c9d1b7a248'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'rate_limit_counters',
+        sa.Column('bucket', sa.String(length=200), nullable=False),
+        sa.Column('window_start', sa.BigInteger(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('expires_at', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('bucket', 'window_start'),
+        prefixes=['UNLOGGED']
+    )
+    op.create_index('idx_rate_limit_counters_expires_at', 'rate_limit_counters', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_rate_limit_counters_expires_at', table_name='rate_limit_counters')
+    op.drop_table('rate_limit_counters')
@@ -0,0 +1,44 @@
+"""add_pidms_product_summary
+
+Revision ID: b2d8f4a6c931
+Revises: a7e4c2f9b815
+Create Date: 2026-10-19 13:40:12.618530
+
+Changes:
+- Create pidms_product_summary table (per-product key count / total remaining)
+- Backfill from pidms_keys
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2d8f4a6c931'
+down_revision: Union[str, None] = 'a7e4c2f9b815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'pidms_product_summary',
+        sa.Column('prd', sa.String(length=255), nullable=False),
+        sa.Column('key_count', sa.Integer(), nullable=False),
+        sa.Column('total_remaining', sa.BigInteger(), nullable=False),
+        sa.Column('refreshed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('prd')
+    )
+
+    op.execute("""
+        INSERT INTO pidms_product_summary (prd, key_count, total_remaining)
+        SELECT prd, COUNT(*), COALESCE(SUM(remaining), 0)
+        FROM pidms_keys
+        GROUP BY prd
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('pidms_product_summary')
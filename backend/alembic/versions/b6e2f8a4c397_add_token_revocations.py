@@ -0,0 +1,39 @@
+"""add_token_revocations
+
+Revision ID: b6e2f8a4c397
+Revises: a9d3e5f7b164
+Create Date: 2026-10-19 18:42:11.204735
+
+Changes:
+- Create revoked_tokens table (logout revocations, kept until token exp)
+- Add users.tokens_valid_after (per-user revocation cutoff)
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e2f8a4c397'
+down_revision: Union[str, None] = 'a9d3e5f7b164'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'revoked_tokens',
+        sa.Column('token_hash', sa.String(length=64), nullable=False),
+        sa.Column('expires_at', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('token_hash')
+    )
+    op.create_index('idx_revoked_tokens_expires_at', 'revoked_tokens', ['expires_at'], unique=False)
+    op.add_column('users', sa.Column('tokens_valid_after', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'tokens_valid_after')
+    op.drop_index('idx_revoked_tokens_expires_at', table_name='revoked_tokens')
+    op.drop_table('revoked_tokens')
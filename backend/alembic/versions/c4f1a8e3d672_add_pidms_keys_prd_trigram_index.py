@@ -0,0 +1,31 @@
+"""add_pidms_keys_prd_trigram_index
+
+Revision ID: c4f1a8e3d672
+Revises: b2d8f4a6c931
+Create Date: 2026-10-19 14:05:37.220184
+
+Changes:
+- Enable pg_trgm
+- Add GIN trigram index on pidms_keys.prd for ILIKE and fuzzy product search
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f1a8e3d672'
+down_revision: Union[str, None] = 'b2d8f4a6c931'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index('idx_pidms_keys_prd_trgm', 'pidms_keys', ['prd'], unique=False, postgresql_using='gin', postgresql_ops={'prd': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('idx_pidms_keys_prd_trgm', table_name='pidms_keys')
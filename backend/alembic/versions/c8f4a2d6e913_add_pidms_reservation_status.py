@@ -0,0 +1,56 @@
+"""add_pidms_reservation_status
+
+Revision ID: c8f4a2d6e913
+Revises: b6e2f8a4c397
+Create Date: 2026-10-19 20:16:37.512904
+
+Changes:
+- Add pidms_key_reservations.status (open / consumed / expired) and closed_at
+- Add partial index over open reservations per key
+- Close reservations older than their key's last check and recount
+  pidms_keys.reserved_count from the open ones
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8f4a2d6e913'
+down_revision: Union[str, None] = 'b6e2f8a4c397'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('pidms_key_reservations', sa.Column('status', sa.String(length=20), server_default='open', nullable=False))
+    op.add_column('pidms_key_reservations', sa.Column('closed_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index(
+        'idx_pidms_key_reservations_open', 'pidms_key_reservations',
+        ['key_id', 'reserved_at'],
+        unique=False,
+        postgresql_where=sa.text("status = 'open'")
+    )
+
+    # Until now every check reset reserved_count, i.e. treated earlier reservations as consumed
+    op.execute("""
+        UPDATE pidms_key_reservations r
+        SET status = 'consumed', closed_at = k.last_synced_at
+        FROM pidms_keys k
+        WHERE k.id = r.key_id AND r.reserved_at <= k.last_synced_at
+    """)
+    op.execute("""
+        UPDATE pidms_keys k
+        SET reserved_count = (
+            SELECT count(*) FROM pidms_key_reservations r
+            WHERE r.key_id = k.id AND r.status = 'open'
+        )
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_pidms_key_reservations_open', table_name='pidms_key_reservations')
+    op.drop_column('pidms_key_reservations', 'closed_at')
+    op.drop_column('pidms_key_reservations', 'status')
@@ -0,0 +1,130 @@
+"""partition_dormitory_bills_by_term
+
+Revision ID: d5e9a7b3c210
+Revises: 8c41f0d2a6e3
+Create Date: 2026-10-19 11:26:05.874132
+
+Changes:
+- Recreate dormitory_bills as a LIST-partitioned table on term_code
+- One partition per existing term (dormitory_bills_t_<term>), data copied over
+- Primary key becomes (bill_id, term_code) because the partition key must be
+  part of every unique constraint; bill_id keeps its sequence and values
+- New terms get their partition automatically on import
+
+"""
+import hashlib
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e9a7b3c210'
+down_revision: Union[str, None] = '8c41f0d2a6e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COLUMNS = """
+    bill_id, employee_id, term_code, dorm_code, factory_location,
+    elec_last_index, elec_curr_index, elec_usage, elec_amount,
+    water_last_index, water_curr_index, water_usage, water_amount,
+    shared_fee, management_fee, total_amount, created_at, updated_at
+"""
+
+COLUMN_DEFINITIONS = """
+    bill_id BIGINT NOT NULL DEFAULT nextval('dormitory_bills_bill_id_seq'),
+    employee_id VARCHAR(20) NOT NULL REFERENCES employees (id),
+    term_code VARCHAR(10) NOT NULL,
+    dorm_code VARCHAR(20) NOT NULL,
+    factory_location VARCHAR(100),
+    elec_last_index NUMERIC(10, 2),
+    elec_curr_index NUMERIC(10, 2),
+    elec_usage NUMERIC(10, 2),
+    elec_amount NUMERIC(15, 2),
+    water_last_index NUMERIC(10, 2),
+    water_curr_index NUMERIC(10, 2),
+    water_usage NUMERIC(10, 2),
+    water_amount NUMERIC(15, 2),
+    shared_fee NUMERIC(15, 2),
+    management_fee NUMERIC(15, 2),
+    total_amount NUMERIC(15, 2),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+    updated_at TIMESTAMP WITH TIME ZONE,
+    CONSTRAINT chk_elec_index CHECK (elec_curr_index >= elec_last_index),
+    CONSTRAINT chk_water_index CHECK (water_curr_index >= water_last_index),
+    CONSTRAINT chk_amounts CHECK (total_amount >= 0 AND elec_amount >= 0 AND water_amount >= 0 AND shared_fee >= 0 AND management_fee >= 0)
+"""
+
+
+def partition_name(term_code: str) -> str:
+    """Same naming as dormitory_bill_service.term_partition_name."""
+    slug = re.sub(r"[^0-9a-z]", "_", term_code.lower())
+    if not re.fullmatch(r"[0-9A-Z]+", term_code):
+        slug += "_" + hashlib.md5(term_code.encode()).hexdigest()[:8]
+    return f"dormitory_bills_t_{slug}"
+
+
+def create_indexes() -> None:
+    op.create_index('idx_dormitory_bills_sort', 'dormitory_bills', ['term_code', 'created_at'], unique=False, postgresql_using='btree', postgresql_ops={'term_code': 'DESC', 'created_at': 'DESC'})
+    op.create_index(op.f('ix_dormitory_bills_dorm_code'), 'dormitory_bills', ['dorm_code'], unique=False)
+    op.create_index(op.f('ix_dormitory_bills_employee_id'), 'dormitory_bills', ['employee_id'], unique=False)
+    op.create_index(op.f('ix_dormitory_bills_term_code'), 'dormitory_bills', ['term_code'], unique=False)
+    op.create_index(op.f('ix_dormitory_bills_total_amount'), 'dormitory_bills', ['total_amount'], unique=False)
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+
+    # Keep the sequence alive when the old table is dropped
+    op.execute("ALTER SEQUENCE dormitory_bills_bill_id_seq OWNED BY NONE")
+    op.execute("ALTER TABLE dormitory_bills RENAME TO dormitory_bills_old")
+    op.execute("ALTER TABLE dormitory_bills_old RENAME CONSTRAINT dormitory_bills_pkey TO dormitory_bills_old_pkey")
+    op.execute("ALTER TABLE dormitory_bills_old RENAME CONSTRAINT uq_bill_entry TO uq_bill_entry_old")
+    for index_name in (
+        'idx_dormitory_bills_sort', 'ix_dormitory_bills_dorm_code', 'ix_dormitory_bills_employee_id',
+        'ix_dormitory_bills_term_code', 'ix_dormitory_bills_total_amount',
+    ):
+        op.execute(f"ALTER INDEX {index_name} RENAME TO {index_name}_old")
+
+    # Partitioned parent table
+    op.execute(f"CREATE TABLE dormitory_bills ({COLUMN_DEFINITIONS}) PARTITION BY LIST (term_code)")
+    op.execute("ALTER SEQUENCE dormitory_bills_bill_id_seq OWNED BY dormitory_bills.bill_id")
+
+    # One partition per existing term
+    terms = conn.execute(sa.text("SELECT DISTINCT term_code FROM dormitory_bills_old")).scalars().all()
+    for term_code in terms:
+        literal = term_code.replace("'", "''")
+        op.execute(f"CREATE TABLE {partition_name(term_code)} PARTITION OF dormitory_bills FOR VALUES IN ('{literal}')")
+
+    op.execute(f"INSERT INTO dormitory_bills ({COLUMNS}) SELECT {COLUMNS} FROM dormitory_bills_old")
+    op.execute("DROP TABLE dormitory_bills_old")
+
+    # Constraints and indexes on the parent cascade to every partition
+    op.create_primary_key('dormitory_bills_pkey', 'dormitory_bills', ['bill_id', 'term_code'])
+    op.create_unique_constraint('uq_bill_entry', 'dormitory_bills', ['employee_id', 'term_code'])
+    create_indexes()
+
+
+def downgrade() -> None:
+    op.execute("ALTER SEQUENCE dormitory_bills_bill_id_seq OWNED BY NONE")
+    op.execute("ALTER TABLE dormitory_bills RENAME TO dormitory_bills_partitioned")
+    op.execute("ALTER TABLE dormitory_bills_partitioned RENAME CONSTRAINT dormitory_bills_pkey TO dormitory_bills_partitioned_pkey")
+    op.execute("ALTER TABLE dormitory_bills_partitioned RENAME CONSTRAINT uq_bill_entry TO uq_bill_entry_partitioned")
+    for index_name in (
+        'idx_dormitory_bills_sort', 'ix_dormitory_bills_dorm_code', 'ix_dormitory_bills_employee_id',
+        'ix_dormitory_bills_term_code', 'ix_dormitory_bills_total_amount',
+    ):
+        op.execute(f"ALTER INDEX {index_name} RENAME TO {index_name}_partitioned")
+
+    # Plain table again (detached partitions are not copied back)
+    op.execute(f"CREATE TABLE dormitory_bills ({COLUMN_DEFINITIONS})")
+    op.execute("ALTER SEQUENCE dormitory_bills_bill_id_seq OWNED BY dormitory_bills.bill_id")
+    op.execute(f"INSERT INTO dormitory_bills ({COLUMNS}) SELECT {COLUMNS} FROM dormitory_bills_partitioned")
+    op.execute("DROP TABLE dormitory_bills_partitioned CASCADE")
+
+    op.create_primary_key('dormitory_bills_pkey', 'dormitory_bills', ['bill_id'])
+    op.create_unique_constraint('uq_bill_entry', 'dormitory_bills', ['employee_id', 'term_code'])
+    create_indexes()
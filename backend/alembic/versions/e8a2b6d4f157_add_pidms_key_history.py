@@ -0,0 +1,49 @@
+"""add_pidms_key_history
+
+Revision ID: e8a2b6d4f157
+Revises: c4f1a8e3d672
+Create Date: 2026-10-19 14:37:52.471903
+
+Changes:
+- Create pidms_key_history table (appended when remaining/blocked changes)
+- Seed one row per existing key with its current state
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8a2b6d4f157'
+down_revision: Union[str, None] = 'c4f1a8e3d672'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'pidms_key_history',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('keyname', sa.String(length=255), nullable=False),
+        sa.Column('prd', sa.String(length=255), nullable=False),
+        sa.Column('remaining', sa.Integer(), nullable=False),
+        sa.Column('blocked', sa.Integer(), nullable=False),
+        sa.Column('recorded_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_pidms_key_history_prd_recorded', 'pidms_key_history', ['prd', 'recorded_at'], unique=False)
+    op.create_index('idx_pidms_key_history_keyname_recorded', 'pidms_key_history', ['keyname', 'recorded_at'], unique=False)
+
+    op.execute("""
+        INSERT INTO pidms_key_history (keyname, prd, remaining, blocked, recorded_at)
+        SELECT keyname, prd, remaining, blocked, COALESCE(last_synced_at, updated_at, created_at, now())
+        FROM pidms_keys
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_pidms_key_history_keyname_recorded', table_name='pidms_key_history')
+    op.drop_index('idx_pidms_key_history_prd_recorded', table_name='pidms_key_history')
+    op.drop_table('pidms_key_history')
@@ -0,0 +1,34 @@
+"""add_pidms_keys_last_synced_at
+
+Revision ID: f1b3c5d7e902
+Revises: d5e9a7b3c210
+Create Date: 2026-10-19 12:14:48.306251
+
+Changes:
+- Add pidms_keys.last_synced_at (our own check timestamp, unlike the upstream
+  datetime_checked_done string) with an index for staleness queries
+- Backfill from updated_at / created_at
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1b3c5d7e902'
+down_revision: Union[str, None] = 'd5e9a7b3c210'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('pidms_keys', sa.Column('last_synced_at', sa.DateTime(timezone=True), nullable=True))
+    op.execute("UPDATE pidms_keys SET last_synced_at = COALESCE(updated_at, created_at)")
+    op.create_index('idx_pidms_keys_last_synced_at', 'pidms_keys', ['last_synced_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_pidms_keys_last_synced_at', table_name='pidms_keys')
+    op.drop_column('pidms_keys', 'last_synced_at')
@@ -0,0 +1,56 @@
+"""add_pidms_key_reservations
+
+Revision ID: f3c9d1b7a248
+Revises: e8a2b6d4f157
+Create Date: 2026-10-19 15:02:44.183095
+
+Changes:
+- Add pidms_keys.reserved_count (local reservations since the last check)
+- Add partial expression index for picking the best reservable key per product
+- Create pidms_key_reservations table
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c9d1b7a248'
+down_revision: Union[str, None] = 'e8a2b6d4f157'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('pidms_keys', sa.Column('reserved_count', sa.Integer(), server_default='0', nullable=False))
+    op.create_index(
+        'idx_pidms_keys_reservable', 'pidms_keys',
+        ['prd', sa.text('(remaining - reserved_count) DESC')],
+        unique=False,
+        postgresql_where=sa.text('blocked = -1')
+    )
+
+    op.create_table(
+        'pidms_key_reservations',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('key_id', sa.Integer(), nullable=False),
+        sa.Column('keyname', sa.String(length=255), nullable=False),
+        sa.Column('prd', sa.String(length=255), nullable=False),
+        sa.Column('reserved_by', sa.String(length=255), nullable=False),
+        sa.Column('note', sa.Text(), nullable=True),
+        sa.Column('reserved_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['key_id'], ['pidms_keys.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_pidms_key_reservations_key_id', 'pidms_key_reservations', ['key_id'], unique=False)
+    op.create_index('idx_pidms_key_reservations_reserved_by', 'pidms_key_reservations', ['reserved_by', 'reserved_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_pidms_key_reservations_reserved_by', table_name='pidms_key_reservations')
+    op.drop_index('idx_pidms_key_reservations_key_id', table_name='pidms_key_reservations')
+    op.drop_table('pidms_key_reservations')
+    op.drop_index('idx_pidms_keys_reservable', table_name='pidms_keys')
+    op.drop_column('pidms_keys', 'reserved_count')
@@ -0,0 +1,212 @@
+"""
+In-process caches with cross-worker invalidation.
+
+Each uvicorn worker keeps its own TTL/LRU caches. Writers publish an
+invalidation with Postgres NOTIFY inside their transaction, so it is only
+delivered after commit; every worker runs a listener connection that drops
+the matching entries. The TTL is a safety net for missed notifications
+(e.g., while the listener reconnects).
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+import asyncpg
+from sqlalchemy import Text, cast, func, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.session import direct_database_url
+
+logger = logging.getLogger(__name__)
+
+# NOTIFY channel shared by all caches
+INVALIDATION_CHANNEL = "cache_invalidation"
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Small LRU cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 60.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value, or `default` if missing or expired."""
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING or entry[0] < time.monotonic():
+            if entry is not _MISSING:
+                del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value, evicting the least recently used entry when full."""
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one entry, or everything when key is None."""
+        if key is None:
+            self._data.clear()
+        else:
+            self._data.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"name": self.name, "size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_caches: Dict[str, TTLCache] = {}
+
+
+def get_cache(name: str, maxsize: int = 1024, ttl: float = 60.0) -> TTLCache:
+    """Get or create the named process-wide cache."""
+    if name not in _caches:
+        _caches[name] = TTLCache(name, maxsize=maxsize, ttl=ttl)
+    return _caches[name]
+
+
+_handlers: Dict[str, List[Callable[[Optional[Hashable]], None]]] = {}
+
+
+def add_invalidation_handler(name: str, handler: Callable[[Optional[Hashable]], None]) -> None:
+    """
+    Call `handler(key)` whenever `name` is invalidated in this worker.
+
+    For state derived from invalidation events rather than cached values
+    (e.g., token revocation lists); runs for local and NOTIFY invalidations.
+    """
+    _handlers.setdefault(name, []).append(handler)
+
+
+_reconnect_handlers: List[Callable[[], Awaitable[None]]] = []
+
+
+def add_reconnect_handler(handler: Callable[[], Awaitable[None]]) -> None:
+    """
+    Await `handler()` each time the listener (re)connects.
+
+    For state that is not a cache and must be reloaded from the database
+    instead of dropped, since notifications may have been missed while
+    disconnected. A failing handler makes the listener reconnect and retry.
+    """
+    _reconnect_handlers.append(handler)
+
+
+def _invalidate_local(name: str, key: Optional[Hashable]) -> None:
+    cache = _caches.get(name)
+    if cache is not None:
+        cache.invalidate(key)
+    for handler in _handlers.get(name, ()):
+        handler(key)
+
+
+async def publish_invalidation(db: AsyncSession, name: str, key: Optional[str] = None) -> None:
+    """
+    Invalidate a cache entry (or the whole cache) in every worker.
+
+    The local cache is cleared immediately; other workers are notified via
+    NOTIFY, which Postgres delivers when the caller's transaction commits.
+
+    Args:
+        db: Session of the transaction that changed the cached data
+        name: Cache name (see get_cache)
+        key: Entry to drop (None = whole cache)
+    """
+    _invalidate_local(name, key)
+    payload = json.dumps({"cache": name, "key": key})
+    await db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": INVALIDATION_CHANNEL, "payload": payload})
+
+
+def notify_invalidation_clause(name: str, key_column):
+    """
+    SQL expression that publishes an invalidation of `name` for `key_column`.
+
+    Put it in a RETURNING list to notify other workers per written row in
+    the same statement instead of a separate publish_invalidation call. The
+    caller still invalidates its own worker's entry.
+    """
+    payload = func.json_build_object("cache", name, "key", cast(key_column, Text))
+    return func.pg_notify(INVALIDATION_CHANNEL, cast(payload, Text))
+
+
+def _on_notification(connection, pid, channel, payload) -> None:
+    try:
+        message = json.loads(payload)
+        _invalidate_local(message["cache"], message.get("key"))
+    except (ValueError, KeyError, TypeError):
+        logger.warning(f"Ignoring malformed cache invalidation: {payload!r}")
+
+
+_listener_task: Optional[asyncio.Task] = None
+
+
+async def _listen_forever() -> None:
+    # LISTEN needs a session; bypasses PgBouncer transaction pooling if configured
+    dsn = direct_database_url().replace("postgresql+asyncpg://", "postgresql://")
+
+    while True:
+        connection = None
+        try:
+            connection = await asyncpg.connect(dsn)
+            await connection.add_listener(INVALIDATION_CHANNEL, _on_notification)
+            logger.info("Cache invalidation listener connected")
+
+            # Anything may have changed while disconnected
+            for cache in _caches.values():
+                cache.invalidate()
+            for handler in _reconnect_handlers:
+                await handler()
+
+            while not connection.is_closed():
+                await asyncio.sleep(5)
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Cache invalidation listener error: {e}, reconnecting in 5s")
+            await asyncio.sleep(5)
+        finally:
+            if connection is not None and not connection.is_closed():
+                await connection.close()
+
+
+def start_invalidation_listener() -> None:
+    """Start the background LISTEN connection for this worker."""
+    global _listener_task
+
+    if _listener_task is None or _listener_task.done():
+        _listener_task = asyncio.create_task(_listen_forever())
+
+
+async def stop_invalidation_listener() -> None:
+    """Stop the background LISTEN connection."""
+    global _listener_task
+
+    if _listener_task is None:
+        return
+
+    _listener_task.cancel()
+    try:
+        await _listener_task
+    except asyncio.CancelledError:
+        pass
+    _listener_task = None
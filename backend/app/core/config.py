@@ -5,6 +5,19 @@ class Settings(BaseSettings):
     # Database URL - required
     DATABASE_URL: str
 
+    # Connection pool (per worker; total connections = workers x (pool size + overflow))
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0  # Seconds to wait for a free connection before erroring
+    DB_POOL_RECYCLE: int = 1800  # Replace connections older than this (seconds, -1 = never)
+    DB_POOL_PRE_PING: bool = True  # Check connections on checkout (survives DB restarts / idle kills)
+    DB_STATEMENT_CACHE_SIZE: int = 100  # asyncpg prepared statements cached per connection
+    # PgBouncer transaction pooling: disables prepared statement caching. The cache
+    # invalidation LISTEN connection and the PIDMS sync advisory lock need a session,
+    # so they use DATABASE_DIRECT_URL (Postgres itself or a session-pooling port).
+    DB_PGBOUNCER_MODE: bool = False
+    DATABASE_DIRECT_URL: str = ""  # Direct connection for LISTEN / session advisory locks (empty = DATABASE_URL)
+
     # JWT Settings (dùng cho cả access token và OTP verification)
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
@@ -19,6 +32,18 @@ class Settings(BaseSettings):
 
     # Token Expiry
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440  # 24 hours
+    JWT_CACHE_MAXSIZE: int = 10000  # Verified tokens cached per worker
+    API_KEY_CACHE_TTL_SECONDS: int = 60  # Verified API keys cached per worker; revoke/delete invalidate immediately
+    API_KEY_USAGE_FLUSH_SECONDS: int = 30  # Batched last_used_at writes
+    USER_PROFILE_CACHE_TTL_SECONDS: int = 300  # /auth/me profiles; role/localId changes and logins invalidate
+
+    # Rate Limiting ("<count>/<second|minute|hour|day>", comma-separated; empty = unlimited)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # "memory" (per worker) or "postgres" (shared across workers)
+    RATE_LIMIT_DEFAULT: str = "600/minute"
+    RATE_LIMIT_HRS: str = "60/minute"  # HRS fan-out: /hrs-data, employee sync
+    RATE_LIMIT_IMPORT: str = "20/minute,500/day"  # Imports, PIDKey.com check/sync
+    RATE_LIMIT_AUTH: str = ""  # Logins share the factory NAT address
     PRE_AUTH_TOKEN_EXPIRE_MINUTES: int = 5  # 5 minutes
 
     # Google OAuth2
@@ -31,6 +56,7 @@ class Settings(BaseSettings):
 
     # FHS Integration
     FHS_HRS_BASE_URL: str = "https://www.fhs.com.tw/ads/api/Furnace/rest/json/hr"
+    FHS_HRS_RECORD_DIR: str = ""  # Save HRS responses here as stand-in fixtures (empty = off)
     FHS_AUTH_API_URL: str = "https://www.fhs.com.tw/fhs_covid_api/token"
     FHS_COVID_API_BASE_URL: str = (
         "https://www.fhs.com.tw/fhs_covid_api/api/reportVaccines/detail"
@@ -39,6 +65,19 @@ class Settings(BaseSettings):
     # PIDKey.com Integration
     PIDKEY_API_KEY: str = ""
     PIDKEY_BASE_URL: str = "https://pidkey.com/ajax/pidms_api"
+    PIDKEY_RATE_LIMIT_PER_SECOND: float = 2.0  # Sustained requests/second per process (0 = unlimited)
+    PIDKEY_RATE_LIMIT_BURST: int = 4
+    PIDKEY_RATE_LIMIT_MAX_RETRIES: int = 5  # 429 retries honouring Retry-After
+    PIDKEY_MAX_CONNECTIONS: int = 10
+    PIDMS_SYNC_BATCH_SIZE: int = 50  # Keys per PIDKey.com request
+    PIDMS_SYNC_CONCURRENCY: int = 4  # Batches in flight at once
+    PIDMS_SYNC_STALE_AFTER_HOURS: int = 24  # Incremental sync: re-check keys older than this
+    PIDMS_SYNC_MAX_KEYS: int = 2000  # Incremental sync: key budget per run
+    PIDMS_SYNC_SCHEDULE_ENABLED: bool = False  # Run sync periodically in the background
+    PIDMS_SYNC_INTERVAL_MINUTES: int = 60
+    PIDMS_SYNC_SCHEDULE_INCREMENTAL: bool = True  # Scheduled runs use incremental mode
+    PIDMS_RESERVATION_TTL_HOURS: int = 72  # Open reservations never seen activated are released after this
+    PIDMS_DEPLETION_ALERT_DAYS: int = 30  # Forecast flags products running out within this many days
 
     # Frontend & Cookie Settings
     FRONTEND_URL: str = "/"
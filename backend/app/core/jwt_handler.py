@@ -3,14 +3,30 @@
 JWT Token Handler - Generate & Verify tokens
 Support both access token và pre_auth token
 """
+import calendar
+import hashlib
 import logging
+import time
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Hashable
 import jwt
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import get_cache, publish_invalidation, add_invalidation_handler, add_reconnect_handler
 from app.core.config import settings
+from app.database.session import AsyncSessionLocal
+from app.models.revoked_token import RevokedToken
+from app.models.user import User
 
 logger = logging.getLogger(__name__)
 
+# Default access token lifetime; also how long revocations must be remembered
+ACCESS_TOKEN_LIFETIME = timedelta(hours=24)
+
+# Verified payloads by token hash, each kept until the token's own exp
+VERIFIED_TOKEN_CACHE = "verified_jwt"
+
 
 def create_access_token(
     user_id: str,
@@ -42,7 +58,7 @@ def create_access_token(
             expires_delta = timedelta(minutes=5)
         else:
             # Access token tồn tại 24 giờ
-            expires_delta = timedelta(hours=24)
+            expires_delta = ACCESS_TOKEN_LIFETIME
 
     expire = datetime.utcnow() + expires_delta
 
@@ -114,6 +130,170 @@ def verify_token(
         return None
 
 
+def _token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+# Revocations known to this worker, mirrored from revoked_tokens and
+# users.tokens_valid_after. Plain dicts rather than caches: an entry must not
+# be evicted or dropped on a listener reconnect while its token can still be used.
+_revoked_tokens: Dict[str, int] = {}  # token hash -> token exp (epoch seconds)
+_user_revocations: Dict[str, int] = {}  # user id -> tokens with iat <= this are revoked
+_next_prune = 0.0
+
+
+def _revoke_token_local(key_hash: str, expires_at: int) -> None:
+    _revoked_tokens[key_hash] = max(expires_at, _revoked_tokens.get(key_hash, 0))
+
+
+def _revoke_user_local(user_id: str, revoked_at: int) -> None:
+    _user_revocations[user_id] = max(revoked_at, _user_revocations.get(user_id, 0))
+
+
+def _prune_revocations(now: float) -> None:
+    """Forget revocations whose tokens have expired anyway."""
+    global _next_prune
+
+    for key_hash in [key for key, expires_at in _revoked_tokens.items() if expires_at <= now]:
+        del _revoked_tokens[key_hash]
+    oldest_live_iat = now - ACCESS_TOKEN_LIFETIME.total_seconds()
+    for user_id in [key for key, revoked_at in _user_revocations.items() if revoked_at < oldest_live_iat]:
+        del _user_revocations[user_id]
+    _next_prune = now + 60
+
+
+def _on_token_invalidation(key: Optional[Hashable]) -> None:
+    """Apply a revocation published by any worker (see revoke_token / revoke_user_tokens)."""
+    if not isinstance(key, str) or "@" not in key:
+        return
+    subject, _, timestamp = key.rpartition("@")
+    if subject.startswith("user:"):
+        _revoke_user_local(subject[len("user:"):], int(timestamp))
+    else:
+        _revoke_token_local(subject, int(timestamp))
+
+
+async def load_revocations() -> None:
+    """
+    Load unexpired revocations from the database into this worker.
+
+    Runs on startup and on every invalidation listener (re)connect, so
+    workers started later or disconnected while a revocation was published
+    still reject the token.
+    """
+    now = int(time.time())
+    async with AsyncSessionLocal() as db:
+        tokens = (await db.execute(
+            select(RevokedToken.token_hash, RevokedToken.expires_at).where(RevokedToken.expires_at > now)
+        )).all()
+        users = (await db.execute(
+            select(User.id, User.tokens_valid_after)
+            .where(User.tokens_valid_after > datetime.utcfromtimestamp(now) - ACCESS_TOKEN_LIFETIME)
+        )).all()
+
+    for key_hash, expires_at in tokens:
+        _revoke_token_local(key_hash, expires_at)
+    for user_id, tokens_valid_after in users:
+        _revoke_user_local(str(user_id), calendar.timegm(tokens_valid_after.utctimetuple()))
+
+    logger.info(f"Loaded {len(tokens)} revoked tokens and {len(users)} user revocations")
+
+
+add_invalidation_handler(VERIFIED_TOKEN_CACHE, _on_token_invalidation)
+add_reconnect_handler(load_revocations)
+
+
+def verify_token_cached(
+    token: str, required_scope: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    verify_token với cache theo hash của token
+
+    The decoded payload is cached until the token's exp, so repeated requests
+    with the same token skip jwt.decode. Revoked tokens and tokens issued
+    to a user before revoke_user_tokens are rejected.
+
+    Args:
+        token: JWT token string
+        required_scope: Required scope ("access" hoặc "pre_auth")
+
+    Returns:
+        dict: Copy of the token payload nếu valid, None nếu invalid/revoked
+    """
+    cache = get_cache(VERIFIED_TOKEN_CACHE, maxsize=settings.JWT_CACHE_MAXSIZE)
+    key = _token_hash(token)
+
+    now = time.time()
+    if now >= _next_prune:
+        _prune_revocations(now)
+
+    if key in _revoked_tokens:
+        return None
+
+    payload = cache.get(key)
+    if payload is None:
+        payload = verify_token(token)
+        if not payload:
+            return None
+        remaining = payload["exp"] - now
+        if remaining > 0:
+            cache.set(key, payload, ttl=remaining)
+
+    # A revocation in the same second as issuing also rejects the token (iat has 1s resolution)
+    revoked_at = _user_revocations.get(str(payload.get("user_id")))
+    if revoked_at is not None and payload.get("iat", 0) <= revoked_at:
+        return None
+
+    if required_scope and payload.get("scope") != required_scope:
+        logger.warning(
+            f"Token scope mismatch. Expected {required_scope}, got {payload.get('scope')}"
+        )
+        return None
+
+    return dict(payload)
+
+
+async def revoke_token(db: AsyncSession, token: str) -> None:
+    """
+    Thu hồi một token (logout) trên mọi worker
+
+    Stored in revoked_tokens until the token expires. Takes effect in other
+    workers when the caller's transaction commits.
+    """
+    payload = get_token_payload(token)
+    if not payload or payload.get("exp", 0) <= time.time():
+        return
+
+    key_hash = _token_hash(token)
+    expires_at = int(payload["exp"])
+    await db.execute(
+        pg_insert(RevokedToken)
+        .values(token_hash=key_hash, expires_at=expires_at)
+        .on_conflict_do_nothing(index_elements=[RevokedToken.token_hash])
+    )
+    await db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= int(time.time())))
+    # The expiry travels with the event so every worker knows when to forget it
+    await publish_invalidation(db, VERIFIED_TOKEN_CACHE, f"{key_hash}@{expires_at}")
+
+
+async def revoke_user_tokens(db: AsyncSession, user_id: Any) -> None:
+    """
+    Thu hồi mọi token đã cấp cho user (đổi role / localId)
+
+    Tokens issued before now stop working; the user signs in again to get
+    a token with the new claims. Stored in users.tokens_valid_after. Takes
+    effect in other workers on commit.
+    """
+    revoked_at = int(time.time())
+    await db.execute(
+        update(User)
+        .where(User.id == int(user_id))
+        .values(tokens_valid_after=datetime.utcfromtimestamp(revoked_at))
+    )
+    # The timestamp travels with the event so every worker applies the same cutoff
+    await publish_invalidation(db, VERIFIED_TOKEN_CACHE, f"user:{user_id}@{revoked_at}")
+
+
 def get_token_payload(token: str) -> Optional[Dict[str, Any]]:
     """
     Lấy payload từ token (không verify expiry, dùng cho debug)
@@ -0,0 +1,335 @@
+"""
+Per-client rate limiting.
+
+ASGI middleware that counts requests per client and route group and answers
+429 (with Retry-After) before any endpoint, database or upstream work runs.
+
+- Client: valid API key, else JWT user, else IP
+- Route groups: path prefixes or exact method + path rules with their own
+  limits, e.g. "60/minute,2000/day"
+  (RATE_LIMIT_HRS / RATE_LIMIT_IMPORT / RATE_LIMIT_DEFAULT; empty = unlimited)
+- Algorithm: sliding window counter - the current window's count plus the
+  previous window's count weighted by how much of it still overlaps
+- Backends: "memory" (per worker, so N workers allow N x limit) or
+  "postgres" (rate_limit_counters table, shared by all workers at the cost
+  of one short query per limited request)
+
+Rejected requests are counted too, so a client that keeps retrying without
+backing off stays limited. Backend errors fail open.
+
+Responses carry X-RateLimit-Limit (requests), X-RateLimit-Window (seconds)
+and X-RateLimit-Remaining of the most restrictive limit of the group.
+"""
+
+import hashlib
+import logging
+import math
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+from app.core.jwt_handler import verify_token_cached
+
+logger = logging.getLogger(__name__)
+
+WINDOW_SECONDS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    limit: int
+    window_seconds: int
+
+    def __str__(self) -> str:
+        unit = next(name for name, seconds in WINDOW_SECONDS.items() if seconds == self.window_seconds)
+        return f"{self.limit}/{unit}"
+
+
+@dataclass(frozen=True)
+class RouteRule:
+    path: str
+    method: Optional[str] = None  # None = any method
+    exact: bool = False  # False = path prefix
+
+    def matches(self, method: str, path: str) -> bool:
+        if self.method is not None and method != self.method:
+            return False
+        return path == self.path if self.exact else path.startswith(self.path)
+
+
+def endpoint(method: str, path: str) -> RouteRule:
+    """Rule matching exactly one method + path."""
+    return RouteRule(path, method, exact=True)
+
+
+@dataclass(frozen=True)
+class RouteGroup:
+    name: str
+    rules: Tuple[RouteRule, ...]
+    limits: Tuple[RateLimit, ...]
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    limit: RateLimit
+    remaining: int
+    retry_after: int
+
+
+def parse_limits(spec: str) -> Tuple[RateLimit, ...]:
+    """
+    Parse "60/minute,2000/day" into RateLimit tuples (empty = unlimited).
+
+    Raises:
+        ValueError: Malformed spec or unknown window
+    """
+    limits = []
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        count, _, unit = part.partition("/")
+        if unit.strip() not in WINDOW_SECONDS:
+            raise ValueError(f"Invalid rate limit '{part}': window must be one of {', '.join(WINDOW_SECONDS)}")
+        limits.append(RateLimit(limit=int(count), window_seconds=WINDOW_SECONDS[unit.strip()]))
+    return tuple(limits)
+
+
+def build_route_groups() -> List[RouteGroup]:
+    """Route groups in match order; the first group with a matching rule wins."""
+    return [
+        # OAuth logins at shift change arrive from one factory NAT address
+        RouteGroup("auth", (RouteRule("/api/auth/"),), parse_limits(settings.RATE_LIMIT_AUTH)),
+        # Fan out to the FHS HRS API
+        RouteGroup("hrs", (
+            RouteRule("/api/hrs-data/"),
+            endpoint("POST", "/api/employees/sync"),
+            endpoint("POST", "/api/employees/bulk-sync"),
+        ), parse_limits(settings.RATE_LIMIT_HRS)),
+        # Bulk writes and PIDKey.com calls (their status / read endpoints stay in default)
+        RouteGroup("import", (
+            endpoint("POST", "/api/evaluations/upload"),
+            endpoint("POST", "/api/dormitory-bills/import"),
+            endpoint("POST", "/api/dormitory-bills/import/file"),
+            endpoint("POST", "/api/pidms/check"),
+            endpoint("POST", "/api/pidms/sync"),
+        ), parse_limits(settings.RATE_LIMIT_IMPORT)),
+        RouteGroup("default", (RouteRule("/api/"),), parse_limits(settings.RATE_LIMIT_DEFAULT)),
+    ]
+
+
+def match_route_group(groups: List[RouteGroup], method: str, path: str) -> Optional[RouteGroup]:
+    for group in groups:
+        if any(rule.matches(method, path) for rule in group.rules):
+            return group
+    return None
+
+
+async def _is_valid_api_key(key_hash: str) -> bool:
+    """Resolve a key like verify_api_key does (cached per worker; DB only on a miss)."""
+    from app.database.session import AsyncSessionLocal
+    from app.services.api_key_service import lookup_api_key
+
+    try:
+        async with AsyncSessionLocal() as db:
+            info = await lookup_api_key(db, key_hash)
+    except Exception as e:
+        logger.warning(f"API key lookup for rate limiting failed: {e}")
+        return False
+
+    return bool(
+        info
+        and info["is_active"]
+        and not (info["expires_at"] and info["expires_at"] < datetime.now(timezone.utc))
+    )
+
+
+async def client_identity(request: Request) -> str:
+    """
+    Rate-limit identity of the caller.
+
+    Valid API keys count as themselves, resolved through the same per-worker
+    cache as verify_api_key; unknown, inactive or expired keys (e.g., random
+    keys to dodge the limit) count per IP.
+    """
+    api_key = request.headers.get("x-api-key")
+    if api_key:
+        key_hash = hashlib.sha256(api_key.encode()).hexdigest()
+        if await _is_valid_api_key(key_hash):
+            return f"key:{key_hash[:16]}"
+
+    token = None
+    authorization = request.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        token = authorization[7:].strip()
+    token = token or request.cookies.get("access_token")
+    if token:
+        payload = verify_token_cached(token)
+        if payload and payload.get("user_id") is not None:
+            return f"user:{payload['user_id']}"
+
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def _evaluate(limit: RateLimit, current: int, previous: int, now: float) -> RateLimitResult:
+    """Sliding window decision from the current and previous window counts."""
+    elapsed = now % limit.window_seconds
+    weighted = current + previous * (1 - elapsed / limit.window_seconds)
+    allowed = weighted <= limit.limit
+    return RateLimitResult(
+        allowed=allowed,
+        limit=limit,
+        remaining=max(0, int(limit.limit - weighted)),
+        retry_after=0 if allowed else max(1, math.ceil(limit.window_seconds - elapsed)),
+    )
+
+
+class MemoryBackend:
+    """Per-worker counters."""
+
+    def __init__(self):
+        self._counts: Dict[Tuple[str, int], int] = {}
+        self._next_prune = 0.0
+
+    async def hit(self, bucket: str, limit: RateLimit, now: float) -> RateLimitResult:
+        window_start = int(now // limit.window_seconds) * limit.window_seconds
+        key = (bucket, window_start)
+        self._counts[key] = self._counts.get(key, 0) + 1
+        previous = self._counts.get((bucket, window_start - limit.window_seconds), 0)
+
+        if now >= self._next_prune:
+            self._prune(now)
+
+        return _evaluate(limit, self._counts[key], previous, now)
+
+    def _prune(self, now: float) -> None:
+        # Buckets end with the window length; drop windows older than the previous one
+        self._counts = {
+            (bucket, window_start): count
+            for (bucket, window_start), count in self._counts.items()
+            if window_start + 2 * int(bucket.rsplit(":", 1)[1]) > now
+        }
+        self._next_prune = now + 60
+
+
+class PostgresBackend:
+    """Counters in rate_limit_counters, shared by all workers."""
+
+    HIT_SQL = text("""
+        WITH hit AS (
+            INSERT INTO rate_limit_counters (bucket, window_start, count, expires_at)
+            VALUES (:bucket, :window_start, 1, :expires_at)
+            ON CONFLICT (bucket, window_start) DO UPDATE SET count = rate_limit_counters.count + 1
+            RETURNING count
+        )
+        SELECT
+            (SELECT count FROM hit) AS current,
+            COALESCE((
+                SELECT count FROM rate_limit_counters
+                WHERE bucket = :bucket AND window_start = :previous_start
+            ), 0) AS previous
+    """)
+
+    def __init__(self):
+        self._next_prune = 0.0
+
+    async def hit(self, bucket: str, limit: RateLimit, now: float) -> RateLimitResult:
+        from app.database.session import engine
+
+        window_start = int(now // limit.window_seconds) * limit.window_seconds
+        params = {
+            "bucket": bucket,
+            "window_start": window_start,
+            "previous_start": window_start - limit.window_seconds,
+            "expires_at": window_start + 2 * limit.window_seconds,
+        }
+
+        async with engine.connect() as conn:
+            row = (await conn.execute(self.HIT_SQL, params)).one()
+            if now >= self._next_prune:
+                await conn.execute(text("DELETE FROM rate_limit_counters WHERE expires_at < :now"), {"now": int(now)})
+                self._next_prune = now + 60
+            await conn.commit()
+
+        return _evaluate(limit, row.current, row.previous, now)
+
+
+def create_backend():
+    if settings.RATE_LIMIT_BACKEND == "postgres":
+        return PostgresBackend()
+    if settings.RATE_LIMIT_BACKEND != "memory":
+        logger.warning(f"Unknown RATE_LIMIT_BACKEND '{settings.RATE_LIMIT_BACKEND}', using memory")
+    return MemoryBackend()
+
+
+class RateLimitMiddleware:
+    """ASGI middleware enforcing the route group limits; adds X-RateLimit-* headers."""
+
+    def __init__(self, app):
+        self.app = app
+        self.groups = build_route_groups()
+        self.backend = create_backend()
+
+    async def check(self, group: RouteGroup, identity: str) -> Optional[RateLimitResult]:
+        """Hit every limit of the group; returns the most restrictive result."""
+        now = time.time()
+        results = [
+            await self.backend.hit(f"{group.name}:{identity}:{limit.window_seconds}", limit, now)
+            for limit in group.limits
+        ]
+        rejected = [result for result in results if not result.allowed]
+        if rejected:
+            return max(rejected, key=lambda result: result.retry_after)
+        return min(results, key=lambda result: result.remaining)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        group = match_route_group(self.groups, scope["method"], scope["path"])
+        if group is None or not group.limits:
+            await self.app(scope, receive, send)
+            return
+
+        identity = await client_identity(Request(scope))
+        try:
+            result = await self.check(group, identity)
+        except Exception as e:
+            logger.warning(f"Rate limit check failed, allowing request: {e}")
+            await self.app(scope, receive, send)
+            return
+
+        # Limit stays a bare integer for clients parsing it; the window goes separately
+        headers = {
+            "X-RateLimit-Limit": str(result.limit.limit),
+            "X-RateLimit-Remaining": str(result.remaining),
+            "X-RateLimit-Window": str(result.limit.window_seconds),
+        }
+
+        if not result.allowed:
+            logger.info(f"Rate limit exceeded: {identity} on {group.name} ({result.limit})")
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": f"Rate limit exceeded ({result.limit}). Retry in {result.retry_after}s."},
+                headers={**headers, "Retry-After": str(result.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -3,9 +3,9 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials, APIKeyHea
 from typing import Optional, Union
 from datetime import datetime, timezone
 import hashlib
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.jwt_handler import verify_token
+from app.core.jwt_handler import verify_token_cached
+from app.database.session import get_db
 
 security = HTTPBearer(auto_error=False)
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
@@ -45,7 +45,7 @@ async def get_current_user(
         )
 
     try:
-        payload = verify_token(token)
+        payload = verify_token_cached(token)
         if not payload:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -140,54 +140,49 @@ async def verify_api_key(
     Raises:
         HTTPException: 401 if invalid, 403 if insufficient scope
     """
-    from app.models.api_key import ApiKey
+    from app.services import api_key_service
 
     # Hash the API key to look it up
     key_hash = hashlib.sha256(api_key.encode()).hexdigest()
 
-    # Query database for this key
-    stmt = select(ApiKey).where(ApiKey.id == key_hash)
-    result = await db.execute(stmt)
-    api_key_obj = result.scalar_one_or_none()
+    # Cached per worker; revoke/delete invalidate it in every worker
+    api_key_info = await api_key_service.lookup_api_key(db, key_hash)
 
     # Check if key exists
-    if not api_key_obj:
+    if not api_key_info:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid API key"
         )
 
     # Check if key is active
-    if not api_key_obj.is_active:
+    if not api_key_info["is_active"]:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="API key is inactive"
         )
 
     # Check if key is expired
-    if api_key_obj.expires_at and api_key_obj.expires_at < datetime.now(timezone.utc):
+    if api_key_info["expires_at"] and api_key_info["expires_at"] < datetime.now(timezone.utc):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="API key has expired"
         )
 
     # Check scope if required
-    if required_scope:
-        scopes = [s.strip() for s in api_key_obj.scopes.split(",")]
-        if required_scope not in scopes:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"API key does not have required scope: {required_scope}"
-            )
+    if required_scope and required_scope not in api_key_info["scope_set"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"API key does not have required scope: {required_scope}"
+        )
 
-    # Update last_used_at
-    api_key_obj.last_used_at = datetime.now(timezone.utc)
-    await db.commit()
+    # last_used_at is written by the periodic batched flush, not per request
+    api_key_service.record_api_key_use(api_key_info["key_id"])
 
     return {
-        "key_id": api_key_obj.id,
-        "key_name": api_key_obj.name,
-        "scopes": scopes
+        "key_id": api_key_info["key_id"],
+        "key_name": api_key_info["key_name"],
+        "scopes": list(api_key_info["scopes"])
     }
 
 
@@ -204,11 +199,9 @@ def require_api_key(required_scope: str):
             ...
     """
     async def api_key_checker(
-        api_key: Optional[str] = Depends(api_key_header)
+        api_key: Optional[str] = Depends(api_key_header),
+        db: AsyncSession = Depends(get_db)
     ) -> dict:
-        # Import here to avoid circular dependency
-        from app.database.session import get_db
-
         if not api_key:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -216,10 +209,7 @@ def require_api_key(required_scope: str):
                 headers={"WWW-Authenticate": "ApiKey"}
             )
 
-        # Get database session
-        async for db in get_db():
-            result = await verify_api_key(api_key, db, required_scope)
-            return result
+        return await verify_api_key(api_key, db, required_scope)
 
     return api_key_checker
 
@@ -227,7 +217,8 @@ def require_api_key(required_scope: str):
 async def get_current_user_or_api_key(
     request: Request,
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    api_key: Optional[str] = Depends(api_key_header)
+    api_key: Optional[str] = Depends(api_key_header),
+    db: AsyncSession = Depends(get_db)
 ) -> Union[dict, None]:
     """
     Try to authenticate with either JWT token OR API key.
@@ -243,13 +234,10 @@ async def get_current_user_or_api_key(
     """
     # Try API key first
     if api_key:
-        from app.database.session import get_db
-        async for db in get_db():
-            try:
-                return await verify_api_key(api_key, db)
-            except HTTPException:
-                pass  # Fall through to JWT
-            break
+        try:
+            return await verify_api_key(api_key, db)
+        except HTTPException:
+            pass  # Fall through to JWT
 
     # Try JWT token
     try:
@@ -283,24 +271,21 @@ def require_api_key_or_admin(required_scope: Optional[str] = None):
     async def auth_checker(
         request: Request,
         credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-        api_key: Optional[str] = Depends(api_key_header)
+        api_key: Optional[str] = Depends(api_key_header),
+        db: AsyncSession = Depends(get_db)
     ) -> dict:
-        from app.database.session import get_db
-
         # Try API key first
         if api_key:
-            async for db in get_db():
-                try:
-                    api_key_info = await verify_api_key(api_key, db, required_scope)
-                    return {
-                        "auth_type": "api_key",
-                        "key_id": api_key_info["key_id"],
-                        "key_name": api_key_info["key_name"],
-                        "scopes": api_key_info["scopes"]
-                    }
-                except HTTPException:
-                    pass  # Fall through to JWT
-                break
+            try:
+                api_key_info = await verify_api_key(api_key, db, required_scope)
+                return {
+                    "auth_type": "api_key",
+                    "key_id": api_key_info["key_id"],
+                    "key_name": api_key_info["key_name"],
+                    "scopes": api_key_info["scopes"]
+                }
+            except HTTPException:
+                pass  # Fall through to JWT
 
         # Try JWT token - must be admin
         try:
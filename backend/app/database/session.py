@@ -1,12 +1,71 @@
+import logging
+from uuid import uuid4
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+
+def _connect_args(pgbouncer: bool) -> dict:
+    """asyncpg connection arguments (statement caching / PgBouncer compatibility)."""
+    if pgbouncer:
+        # Transaction pooling hands each transaction a different server connection,
+        # so named prepared statements must be unique and never reused
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    return {
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+    }
+
+
 # Create async engine using DATABASE_URL from settings
 engine = create_async_engine(
     settings.DATABASE_URL,
     echo=False,
     future=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    connect_args=_connect_args(settings.DB_PGBOUNCER_MODE),
+)
+
+
+def direct_database_url() -> str:
+    """
+    URL for session-level features: LISTEN and session advisory locks.
+
+    PgBouncer transaction pooling moves each transaction to another server
+    connection, which drops LISTEN registrations and leaks or loses
+    session advisory locks, so these go to DATABASE_DIRECT_URL when set.
+    """
+    return settings.DATABASE_DIRECT_URL or settings.DATABASE_URL
+
+
+if settings.DB_PGBOUNCER_MODE and not settings.DATABASE_DIRECT_URL:
+    logger.warning(
+        "DB_PGBOUNCER_MODE is on without DATABASE_DIRECT_URL: cache invalidation LISTEN "
+        "and the PIDMS sync lock go through PgBouncer and will not work in transaction pooling"
+    )
+
+# Unpooled engine for the few long-lived session-level connections (same engine without a direct URL)
+direct_engine = (
+    create_async_engine(
+        settings.DATABASE_DIRECT_URL,
+        echo=False,
+        future=True,
+        poolclass=NullPool,
+        connect_args=_connect_args(False),
+    )
+    if settings.DATABASE_DIRECT_URL else engine
 )
 
 # Async session factory
@@ -17,6 +76,50 @@ AsyncSessionLocal = sessionmaker(
 )
 
 
+# Pool event counters since startup (see get_pool_stats)
+_pool_events = {"connections_created": 0, "checkouts": 0, "invalidated": 0}
+
+
+@event.listens_for(engine.sync_engine, "connect")
+def _on_connect(dbapi_connection, connection_record):
+    _pool_events["connections_created"] += 1
+
+
+@event.listens_for(engine.sync_engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    _pool_events["checkouts"] += 1
+
+
+@event.listens_for(engine.sync_engine, "invalidate")
+def _on_invalidate(dbapi_connection, connection_record, exception):
+    _pool_events["invalidated"] += 1
+
+
+def get_pool_stats() -> dict:
+    """Current pool usage and configuration of this worker's engine."""
+    pool = engine.pool
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pre_ping": settings.DB_POOL_PRE_PING,
+        "pgbouncer_mode": settings.DB_PGBOUNCER_MODE,
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(0, pool.overflow()),
+        **_pool_events,
+    }
+
+
 async def get_db():
+    """
+    Request-scoped database session.
+
+    FastAPI caches dependencies per request, so auth dependencies and the
+    endpoint that declare Depends(get_db) share one session. The session
+    checks out a pooled connection on its first query (requests served from
+    caches never take one) and returns it when the request finishes.
+    """
     async with AsyncSessionLocal() as db:
         yield db
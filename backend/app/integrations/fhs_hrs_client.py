@@ -1,11 +1,19 @@
 import asyncio
 import httpx
+import json
 import logging
+import time
+from pathlib import Path
 from typing import Optional, Dict, List
-from datetime import date
+from datetime import date, datetime, timezone
+
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Per-request log written next to the recorded response bodies
+RECORD_MANIFEST = "requests.jsonl"
+
 
 def _parse_number(value: str) -> float:
     """Parse a string to float, return 0.0 if empty or invalid
@@ -142,12 +150,56 @@ def _parse_salary_response(fields: List[str]) -> dict:
     }
 
 
+def _record_response(record_dir: str, path: str, status_code: int, text: str, elapsed_ms: float) -> None:
+    """Save one HRS response as a replay fixture (see app.stand_ins.hrs).
+
+    Successful bodies go to <record_dir>/<path>.txt (e.g. s16/VNW0006204vkokv2024-01.txt);
+    every request, including failures, is appended to <record_dir>/requests.jsonl
+    with its status and latency so the stand-in can replay the traffic shape.
+
+    Recording never fails the request; errors are only logged.
+    """
+    try:
+        root = Path(record_dir)
+        fixture = root / f"{path.strip('/')}.txt"
+        if status_code == 200 and fixture.resolve().is_relative_to(root.resolve()):
+            fixture.parent.mkdir(parents=True, exist_ok=True)
+            fixture.write_text(text, encoding="utf-8")
+
+        root.mkdir(parents=True, exist_ok=True)
+        entry = {
+            "path": path.strip("/"),
+            "status": status_code,
+            "elapsed_ms": round(elapsed_ms, 1),
+            "bytes": len(text.encode("utf-8")),
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+        }
+        with open(root / RECORD_MANIFEST, "a", encoding="utf-8") as manifest:
+            manifest.write(json.dumps(entry) + "\n")
+    except OSError as e:
+        logger.warning(f"Failed to record HRS response for {path}: {e}")
+
+
 class FHSHRSClient:
-    """Client for FHS HRS API - fetches employee information without authentication"""
+    """Client for FHS HRS API - fetches employee information without authentication
 
-    def __init__(self):
-        self.base_url = "https://www.fhs.com.tw/ads/api/Furnace/rest/json/hr"
+    Args:
+        base_url: Defaults to settings.FHS_HRS_BASE_URL (point it at the stand-in for local runs)
+        transport: Optional httpx transport, e.g. httpx.ASGITransport(app=app.stand_ins.hrs.app)
+        record_dir: Recorder mode - save every response as a stand-in fixture
+            (defaults to settings.FHS_HRS_RECORD_DIR; recordings contain personal data)
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        record_dir: Optional[str] = None
+    ):
+        self.base_url = (base_url or settings.FHS_HRS_BASE_URL).rstrip("/")
         self.timeout = 30.0
+        self.transport = transport
+        self.record_dir = record_dir or settings.FHS_HRS_RECORD_DIR or None
         self.headers = {
             "User-Agent": "FHSHRSClient/1.0",
             "Accept": "text/plain; charset=utf-8",
@@ -159,11 +211,15 @@ class FHSHRSClient:
         Returns None if request fails (no exceptions raised)
         """
         url = f"{self.base_url}/{path.lstrip('/')}"
+        started = time.perf_counter()
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
+            async with httpx.AsyncClient(timeout=self.timeout, transport=self.transport) as client:
                 resp = await client.get(url, headers=self.headers)
-                resp.raise_for_status()
                 resp.encoding = "utf-8"  # Force UTF-8 for Chinese/Vietnamese text
+                if self.record_dir:
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                    _record_response(self.record_dir, path, resp.status_code, resp.text, elapsed_ms)
+                resp.raise_for_status()
                 return resp.text
         except httpx.HTTPStatusError as e:
             logger.error(f"HRS API HTTP error: {url} - Status {e.response.status_code}")
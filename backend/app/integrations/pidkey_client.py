@@ -3,34 +3,166 @@ PIDKey.com API Client
 
 HTTP client for validating Microsoft product keys via PIDKey.com API.
 Handles key formatting, API communication, retry logic, and error handling.
+
+All client instances share one connection pool and one token-bucket rate
+limiter per process, so concurrent sync batches stay within the PIDKey.com
+rate limit instead of failing on 429.
 """
 
+import asyncio
 import httpx
 import logging
-from typing import List, Dict
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import List, Dict, Optional
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
+from app.core.config import settings
+
 logger = logging.getLogger(__name__)
 
 
+def normalize_key(key: str) -> str:
+    """
+    Normalize one product key the way PIDKey.com receives it (and stores keyname).
+
+    Example:
+        " 6NRGD-KHFCF-Y4TF7 " -> "6NRGDKHFCFY4TF7"
+    """
+    # Remove dashes, spaces, and any whitespace
+    return key.replace("-", "").replace(" ", "").strip()
+
+
+class _TokenBucket:
+    """Async token bucket: `rate` requests per second with bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float) -> None:
+        """Block all acquirers for `seconds` (e.g., after a 429 with Retry-After)."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+        self._updated_at = self._paused_until
+
+    async def acquire(self) -> None:
+        """Wait until one request may be sent."""
+        if self.rate <= 0:
+            return
+
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class _BatchTooLargeError(Exception):
+    """PIDKey.com rejected a request because it contained too many keys."""
+
+
+# Process-wide connection pool and rate limiter shared by all PIDKeyClient instances
+_shared_http_client: Optional[httpx.AsyncClient] = None
+_rate_limiter = _TokenBucket(settings.PIDKEY_RATE_LIMIT_PER_SECOND, settings.PIDKEY_RATE_LIMIT_BURST)
+
+
+def _get_shared_http_client(timeout: float) -> httpx.AsyncClient:
+    """Lazily create the shared pooled httpx client."""
+    global _shared_http_client
+
+    if _shared_http_client is None or _shared_http_client.is_closed:
+        _shared_http_client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=settings.PIDKEY_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.PIDKEY_MAX_CONNECTIONS
+            )
+        )
+    return _shared_http_client
+
+
+async def close_shared_client() -> None:
+    """Close the shared connection pool (called on application shutdown)."""
+    global _shared_http_client
+
+    if _shared_http_client is not None:
+        await _shared_http_client.aclose()
+        _shared_http_client = None
+
+
+def _retry_after_seconds(response: httpx.Response, default: float) -> float:
+    """Parse Retry-After (delta-seconds or HTTP-date), falling back to `default`."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return default
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return default
+
+
 class PIDKeyClient:
     """Client for PIDKey.com API - validates Microsoft product keys."""
 
-    def __init__(self, api_key: str, base_url: str = "https://pidkey.com/ajax/pidms_api"):
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://pidkey.com/ajax/pidms_api",
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
         """
         Initialize PIDKey.com API client.
 
         Args:
             api_key: PIDKey.com API key for authentication
             base_url: Base URL for PIDKey.com API
+            transport: Optional custom transport (gets its own client instead
+                of the shared pool; used for stand-ins and benchmarks)
         """
         self.api_key = api_key
         self.base_url = base_url
         self.timeout = 30.0
+        self.max_rate_limit_retries = settings.PIDKEY_RATE_LIMIT_MAX_RETRIES
         self.headers = {
             "User-Agent": "FHS-ProSight/1.0",
             "Accept": "application/json",
         }
+        self._own_client = (
+            httpx.AsyncClient(timeout=self.timeout, transport=transport) if transport is not None else None
+        )
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """Client used for requests (shared pool unless a transport was given)."""
+        return self._own_client or _get_shared_http_client(self.timeout)
+
+    async def aclose(self) -> None:
+        """Close the client's own connection pool (no-op for the shared pool)."""
+        if self._own_client is not None:
+            await self._own_client.aclose()
 
     def _format_keys(self, keys: List[str]) -> str:
         """
@@ -47,26 +179,22 @@ class PIDKeyClient:
         """
         normalized = []
         for key in keys:
-            # Remove dashes, spaces, and any whitespace
-            clean_key = key.replace("-", "").replace(" ", "").strip()
+            clean_key = normalize_key(key)
             if clean_key:  # Only add non-empty keys
                 normalized.append(clean_key)
 
         # Join with \r\n as required by PIDKey.com API
         return "\\r\\n".join(normalized)
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type((httpx.TimeoutException, httpx.NetworkError)),
-        reraise=True
-    )
     async def check_keys(self, keys: List[str]) -> List[Dict]:
         """
         Check product keys against PIDKey.com API.
 
         Makes HTTP GET request to PIDKey.com with formatted keys and returns
         validation results including remaining activations and blocked status.
+        Requests wait for the shared rate limiter, 429 responses are retried
+        after Retry-After, and a batch rejected as too large is split in half
+        and retried.
 
         Args:
             keys: List of product keys (with or without dashes)
@@ -84,6 +212,7 @@ class PIDKeyClient:
             httpx.HTTPStatusError: If API returns error status
             httpx.TimeoutException: If request times out (with retry)
             httpx.NetworkError: If network issues occur (with retry)
+            ValueError: Invalid API key or rate limit retries exhausted
 
         Example:
             >>> client = PIDKeyClient(api_key="xxx")
@@ -95,6 +224,29 @@ class PIDKeyClient:
             logger.warning("check_keys called with empty keys list")
             return []
 
+        return await self._check_batch(keys)
+
+    async def _check_batch(self, keys: List[str]) -> List[Dict]:
+        """Check one batch, splitting it in half while PIDKey.com rejects it as too large."""
+        try:
+            return await self._request(keys)
+
+        except _BatchTooLargeError:
+            if len(keys) == 1:
+                raise ValueError("PIDKey.com rejected a single-key request as too large")
+
+            middle = len(keys) // 2
+            logger.warning(f"PIDKey.com rejected {len(keys)} keys as too large, splitting into {middle} + {len(keys) - middle}")
+            return await self._check_batch(keys[:middle]) + await self._check_batch(keys[middle:])
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        retry=retry_if_exception_type((httpx.TimeoutException, httpx.NetworkError)),
+        reraise=True
+    )
+    async def _request(self, keys: List[str]) -> List[Dict]:
+        """Send one rate-limited request, waiting out 429 responses."""
         formatted_keys = self._format_keys(keys)
 
         params = {
@@ -104,13 +256,26 @@ class PIDKeyClient:
         }
 
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
+            for attempt in range(self.max_rate_limit_retries + 1):
+                await _rate_limiter.acquire()
+
                 logger.info(
                     f"Calling PIDKey.com API with {len(keys)} keys "
                     f"(API key: {self.api_key[:8]}***)"
                 )
 
-                resp = await client.get(self.base_url, params=params, headers=self.headers)
+                resp = await self.http_client.get(self.base_url, params=params, headers=self.headers)
+
+                if resp.status_code == 429 and attempt < self.max_rate_limit_retries:
+                    # Back off every request in this process, not just this one
+                    delay = _retry_after_seconds(resp, default=2.0 ** attempt)
+                    logger.warning(f"PIDKey.com rate limited, retrying in {delay:.1f}s (attempt {attempt + 1})")
+                    _rate_limiter.pause(delay)
+                    continue
+
+                if resp.status_code in (413, 414):
+                    raise _BatchTooLargeError()
+
                 resp.raise_for_status()
 
                 data = resp.json()
@@ -142,6 +307,9 @@ class PIDKeyClient:
             logger.error(f"PIDKey.com API network error: {e}")
             raise
 
+        except _BatchTooLargeError:
+            raise
+
         except Exception as e:
             logger.error(f"PIDKey.com API unexpected error: {e}", exc_info=True)
             raise
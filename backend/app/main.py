@@ -1,3 +1,5 @@
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
@@ -5,7 +7,33 @@ from fastapi.responses import FileResponse
 from starlette.middleware.sessions import SessionMiddleware
 from pathlib import Path
 from app.core.config import settings
-from app.routers import auth, users, employees, hrs_data, evaluations, dormitory_bills, pidms, api_keys
+from app.core import cache, jwt_handler
+from app.core.rate_limit import RateLimitMiddleware
+from app.routers import auth, users, employees, hrs_data, evaluations, dormitory_bills, pidms, api_keys, system
+from app.services import pidms_sync_scheduler, api_key_service
+from app.integrations import pidkey_client
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Revocations must be known before the first request; the listener reloads them on reconnect
+    try:
+        await jwt_handler.load_revocations()
+    except Exception as e:
+        logger.warning(f"Could not load token revocations, the invalidation listener will retry: {e}")
+
+    # Background tasks run in every worker; each one coordinates through the database
+    cache.start_invalidation_listener()
+    pidms_sync_scheduler.start()
+    api_key_service.start_usage_flusher()
+    yield
+    await api_key_service.stop_usage_flusher()
+    await pidms_sync_scheduler.stop()
+    await cache.stop_invalidation_listener()
+    await pidkey_client.close_shared_client()
+
 
 app = FastAPI(
     title="FHS Pro Sight Backend",
@@ -14,11 +42,15 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
+    lifespan=lifespan,
 )
 
 # Add middleware - order matters! SessionMiddleware must be added first (but will be the last in the chain)
 app.add_middleware(SessionMiddleware, secret_key=settings.SECRET_KEY)
 
+# Rate limiting runs inside CORS so 429 responses still carry CORS headers
+app.add_middleware(RateLimitMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -37,6 +69,7 @@ app.include_router(evaluations.router, prefix="/api")
 app.include_router(dormitory_bills.router, prefix="/api")
 app.include_router(pidms.router, prefix="/api")
 app.include_router(api_keys.router, prefix="/api")
+app.include_router(system.router, prefix="/api")
 
 # Serve frontend static files
 static_dir = Path("/app/static")
@@ -2,6 +2,14 @@ from app.models.user import User, Base
 from app.models.employee import Employee
 from app.models.evaluation import Evaluation
 from app.models.dormitory_bill import DormitoryBill
+from app.models.dormitory_term_rollup import DormitoryTermRollup
+from app.models.dormitory_bill_anomaly import DormitoryBillAnomaly
 from app.models.pidms_key import PIDMSKey
+from app.models.pidms_sync_run import PIDMSSyncRun
+from app.models.pidms_product_summary import PIDMSProductSummary
+from app.models.pidms_key_history import PIDMSKeyHistory
+from app.models.pidms_key_reservation import PIDMSKeyReservation
+from app.models.rate_limit_counter import RateLimitCounter
+from app.models.revoked_token import RevokedToken
 
-__all__ = ["User", "Employee", "Evaluation", "DormitoryBill", "PIDMSKey", "Base"]
+__all__ = ["User", "Employee", "Evaluation", "DormitoryBill", "DormitoryTermRollup", "DormitoryBillAnomaly", "PIDMSKey", "PIDMSSyncRun", "PIDMSProductSummary", "PIDMSKeyHistory", "PIDMSKeyReservation", "RateLimitCounter", "RevokedToken", "Base"]
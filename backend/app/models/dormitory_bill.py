@@ -3,6 +3,9 @@ Dormitory Bill Model
 
 Stores employee dormitory billing information including electricity, water,
 and management fees with composite unique key on (employee_id, term_code).
+
+The table is LIST-partitioned by term_code (one partition per term, named
+dormitory_bills_t_<term>), so the partition key is part of the primary key.
 """
 
 from sqlalchemy import Column, BigInteger, String, Numeric, DateTime, ForeignKey, UniqueConstraint, CheckConstraint, Index
@@ -15,12 +18,12 @@ class DormitoryBill(Base):
 
     __tablename__ = "dormitory_bills"
 
-    # Primary Key
+    # Primary Key (bill_id, term_code) - term_code is the partition key
     bill_id = Column(BigInteger, primary_key=True, autoincrement=True)
 
     # Foreign Keys & Required Fields
     employee_id = Column(String(20), ForeignKey("employees.id"), nullable=False, index=True)
-    term_code = Column(String(10), nullable=False, index=True)
+    term_code = Column(String(10), primary_key=True, nullable=False, index=True)
     dorm_code = Column(String(20), nullable=False, index=True)
 
     # Optional Fields
@@ -54,4 +57,5 @@ class DormitoryBill(Base):
         CheckConstraint('water_curr_index >= water_last_index', name='chk_water_index'),
         CheckConstraint('total_amount >= 0 AND elec_amount >= 0 AND water_amount >= 0 AND shared_fee >= 0 AND management_fee >= 0', name='chk_amounts'),
         Index('idx_dormitory_bills_sort', 'term_code', 'created_at', postgresql_using='btree', postgresql_ops={'term_code': 'DESC', 'created_at': 'DESC'}),
+        {'postgresql_partition_by': 'LIST (term_code)'},
     )
@@ -0,0 +1,43 @@
+"""
+Dormitory Bill Anomaly Model
+
+Stores meter-reading anomalies found by the batch analysis job:
+index gaps and resets between consecutive terms of a dorm, and usage
+spikes that are statistical outliers in the dorm's history.
+"""
+
+from sqlalchemy import Column, BigInteger, String, Numeric, DateTime, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class DormitoryBillAnomaly(Base):
+    """Meter-reading anomaly for one dorm in one billing term."""
+
+    __tablename__ = "dormitory_bill_anomalies"
+
+    # Primary Key
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+
+    # Location & Period
+    dorm_code = Column(String(20), nullable=False)
+    term_code = Column(String(10), nullable=False)
+    previous_term_code = Column(String(10), nullable=True)
+
+    # Anomaly Classification
+    meter = Column(String(10), nullable=False)  # "elec" or "water"
+    anomaly_type = Column(String(20), nullable=False)  # "gap", "reset" or "spike"
+
+    # Measurements
+    expected_value = Column(Numeric(14, 2), nullable=True)  # Previous current index, or average usage for spikes
+    actual_value = Column(Numeric(14, 2), nullable=True)  # Last index, or usage for spikes
+    deviation = Column(Numeric(14, 2), nullable=True)  # Index difference, or z-score for spikes
+
+    # Timestamps
+    detected_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index('idx_dormitory_bill_anomalies_term', 'term_code'),
+        Index('idx_dormitory_bill_anomalies_dorm_term', 'dorm_code', 'term_code'),
+        Index('idx_dormitory_bill_anomalies_type', 'anomaly_type'),
+    )
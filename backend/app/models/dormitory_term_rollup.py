@@ -0,0 +1,46 @@
+"""
+Dormitory Term Rollup Model
+
+Precomputed per-term, per-dorm aggregates of dormitory bills used by the
+usage analytics endpoints. Rows are rebuilt for the affected terms after
+each bill import.
+"""
+
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, PrimaryKeyConstraint, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class DormitoryTermRollup(Base):
+    """Aggregated dormitory usage for one dorm in one billing term."""
+
+    __tablename__ = "dormitory_term_rollups"
+
+    # Composite Key
+    term_code = Column(String(10), nullable=False)
+    dorm_code = Column(String(20), nullable=False)
+
+    # Grouping
+    factory_location = Column(String(100))
+
+    # Occupancy
+    occupant_count = Column(Integer, nullable=False, default=0)
+
+    # Usage Totals
+    elec_usage = Column(Numeric(14, 2), nullable=False, default=0)
+    water_usage = Column(Numeric(14, 2), nullable=False, default=0)
+
+    # Amount Totals
+    elec_amount = Column(Numeric(18, 2), nullable=False, default=0)
+    water_amount = Column(Numeric(18, 2), nullable=False, default=0)
+    shared_fee = Column(Numeric(18, 2), nullable=False, default=0)
+    management_fee = Column(Numeric(18, 2), nullable=False, default=0)
+    total_amount = Column(Numeric(18, 2), nullable=False, default=0)
+
+    # Timestamps
+    refreshed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('term_code', 'dorm_code', name='pk_dormitory_term_rollups'),
+        Index('idx_dormitory_term_rollups_factory', 'term_code', 'factory_location'),
+    )
@@ -5,7 +5,7 @@ Stores Microsoft product license keys from PIDKey.com API with activation tracki
 blocked status, and product information.
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Index
+from sqlalchemy import Column, Integer, String, DateTime, Index, text
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -32,6 +32,7 @@ class PIDMSKey(Base):
     # Activation Status
     remaining = Column(Integer, nullable=False, default=0, index=True)  # Remaining activations
     blocked = Column(Integer, nullable=False, default=-1, index=True)  # -1=not blocked, 1=blocked
+    reserved_count = Column(Integer, nullable=False, default=0, server_default="0")  # Open reservations not yet seen as activations
 
     # Error Tracking
     errorcode = Column(String(255), nullable=True)
@@ -40,6 +41,7 @@ class PIDMSKey(Base):
 
     # Last Check Information
     datetime_checked_done = Column(String(255), nullable=True)  # Timestamp from PIDKey.com
+    last_synced_at = Column(DateTime(timezone=True), nullable=True)  # When we last checked it (drives incremental sync)
 
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -50,4 +52,9 @@ class PIDMSKey(Base):
         Index('idx_pidms_keys_prd', 'prd'),
         Index('idx_pidms_keys_remaining', 'remaining'),
         Index('idx_pidms_keys_blocked', 'blocked'),
+        Index('idx_pidms_keys_last_synced_at', 'last_synced_at'),
+        # pg_trgm: serves ILIKE '%...%' product filters and ranked fuzzy search
+        Index('idx_pidms_keys_prd_trgm', 'prd', postgresql_using='gin', postgresql_ops={'prd': 'gin_trgm_ops'}),
+        # Reservation: best unblocked key of a product by locally available activations
+        Index('idx_pidms_keys_reservable', 'prd', text('(remaining - reserved_count) DESC'), postgresql_where=text('blocked = -1')),
     )
@@ -0,0 +1,37 @@
+"""
+PIDMS Key History Model
+
+Append-only time series of key activation state. A row is written only
+when a check finds a new key or a changed remaining / blocked value, so
+the table stays small while preserving the consumption history used for
+depletion forecasts.
+"""
+
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class PIDMSKeyHistory(Base):
+    """Remaining / blocked value of a key from the time it was observed."""
+
+    __tablename__ = "pidms_key_history"
+
+    # Primary Key
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+
+    # Key Information (no FK: history outlives deleted keys)
+    keyname = Column(String(255), nullable=False)
+    prd = Column(String(255), nullable=False)
+
+    # Observed State
+    remaining = Column(Integer, nullable=False)
+    blocked = Column(Integer, nullable=False)
+
+    # Timestamps
+    recorded_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('idx_pidms_key_history_prd_recorded', 'prd', 'recorded_at'),
+        Index('idx_pidms_key_history_keyname_recorded', 'keyname', 'recorded_at'),
+    )
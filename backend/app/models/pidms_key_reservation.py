@@ -0,0 +1,46 @@
+"""
+PIDMS Key Reservation Model
+
+Records which user was handed which key, so concurrent technicians never
+receive the same key and allocations can be audited.
+
+A reservation stays 'open' until a key check sees remaining drop (oldest
+open reservations become 'consumed') or it outlives
+PIDMS_RESERVATION_TTL_HOURS ('expired'). pidms_keys.reserved_count is the
+number of open reservations of the key.
+"""
+
+from sqlalchemy import Column, BigInteger, Integer, String, Text, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func, text
+from app.core.database import Base
+
+
+class PIDMSKeyReservation(Base):
+    """One key handed out to a user."""
+
+    __tablename__ = "pidms_key_reservations"
+
+    # Primary Key
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+
+    # Reserved Key
+    key_id = Column(Integer, ForeignKey("pidms_keys.id", ondelete="CASCADE"), nullable=False)
+    keyname = Column(String(255), nullable=False)
+    prd = Column(String(255), nullable=False)
+
+    # Reservation Information
+    reserved_by = Column(String(255), nullable=False)  # User email / id from the JWT
+    note = Column(Text, nullable=True)  # e.g., machine name or ticket number
+
+    # Timestamps
+    reserved_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    closed_at = Column(DateTime(timezone=True), nullable=True)  # Set when consumed / expired
+
+    # Lifecycle: open, consumed, expired
+    status = Column(String(20), nullable=False, default="open", server_default="open")
+
+    __table_args__ = (
+        Index('idx_pidms_key_reservations_key_id', 'key_id'),
+        Index('idx_pidms_key_reservations_reserved_by', 'reserved_by', 'reserved_at'),
+        Index('idx_pidms_key_reservations_open', 'key_id', 'reserved_at', postgresql_where=text("status = 'open'")),
+    )
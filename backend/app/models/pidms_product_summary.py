@@ -0,0 +1,27 @@
+"""
+PIDMS Product Summary Model
+
+Per-product key count and remaining activation totals, maintained by the
+key upsert for the products it touches so the products endpoint never
+aggregates the whole pidms_keys table.
+"""
+
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class PIDMSProductSummary(Base):
+    """Aggregated statistics of one product code."""
+
+    __tablename__ = "pidms_product_summary"
+
+    # Primary Key
+    prd = Column(String(255), primary_key=True)
+
+    # Aggregates
+    key_count = Column(Integer, nullable=False, default=0)
+    total_remaining = Column(BigInteger, nullable=False, default=0)
+
+    # Timestamps
+    refreshed_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
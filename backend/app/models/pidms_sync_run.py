@@ -0,0 +1,39 @@
+"""
+PIDMS Sync Run Model
+
+One row per PIDMS sync execution (scheduled or manual) with timing,
+outcome and counters, used to report sync status.
+"""
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class PIDMSSyncRun(Base):
+    """Execution record of a PIDMS sync."""
+
+    __tablename__ = "pidms_sync_runs"
+
+    # Primary Key
+    id = Column(Integer, primary_key=True, autoincrement=True)
+
+    # Run Information
+    trigger = Column(String(20), nullable=False)  # "scheduled" or "manual"
+    mode = Column(String(20), nullable=False)  # "full" or "incremental"
+    status = Column(String(20), nullable=False, default="running")  # "running", "success", "failed", "cancelled"
+    worker = Column(String(255), nullable=True)  # hostname:pid that executed the run
+
+    # Counters
+    total_synced = Column(Integer, nullable=False, default=0)
+    updated = Column(Integer, nullable=False, default=0)
+    errors = Column(Integer, nullable=False, default=0)
+    error_message = Column(Text, nullable=True)
+
+    # Timestamps
+    started_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index('idx_pidms_sync_runs_started_at', 'started_at'),
+    )
@@ -0,0 +1,30 @@
+"""
+Rate Limit Counter Model
+
+Request counters per client and time window for the shared ("postgres")
+rate-limit backend, so limits hold across uvicorn workers. The table is
+UNLOGGED: counters are short-lived and losing them on a crash is harmless.
+"""
+
+from sqlalchemy import Column, Integer, BigInteger, String, Index
+from app.core.database import Base
+
+
+class RateLimitCounter(Base):
+    """Number of requests one client made to one route group in one window."""
+
+    __tablename__ = "rate_limit_counters"
+
+    # Primary Key: "<group>:<client>:<window seconds>" + window start (epoch seconds)
+    bucket = Column(String(200), primary_key=True)
+    window_start = Column(BigInteger, primary_key=True)
+
+    count = Column(Integer, nullable=False, default=0)
+
+    # Epoch seconds after which the row no longer affects any decision
+    expires_at = Column(BigInteger, nullable=False)
+
+    __table_args__ = (
+        Index('idx_rate_limit_counters_expires_at', 'expires_at'),
+        {'prefixes': ['UNLOGGED']},
+    )
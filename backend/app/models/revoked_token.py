@@ -0,0 +1,26 @@
+"""
+Revoked Token Model
+
+Hashes of access tokens revoked before their expiry (logout). Workers load
+the unexpired rows on startup and whenever their invalidation listener
+reconnects, so a revocation survives restarts and missed notifications.
+"""
+
+from sqlalchemy import Column, BigInteger, String, Index
+from app.core.database import Base
+
+
+class RevokedToken(Base):
+    """One revoked access token, kept until the token itself expires."""
+
+    __tablename__ = "revoked_tokens"
+
+    # Primary Key: SHA-256 hex digest of the token
+    token_hash = Column(String(64), primary_key=True)
+
+    # Token exp (epoch seconds); the row is useless afterwards
+    expires_at = Column(BigInteger, nullable=False)
+
+    __table_args__ = (
+        Index('idx_revoked_tokens_expires_at', 'expires_at'),
+    )
@@ -31,5 +31,8 @@ class User(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     last_login = Column(DateTime, nullable=True)
 
+    # Tokens issued at or before this time are rejected (set on role / localId changes)
+    tokens_valid_after = Column(DateTime, nullable=True)
+
     def __repr__(self):
         return f"<User(id={self.id}, email={self.email}, provider={self.provider})>"
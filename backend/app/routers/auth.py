@@ -1,9 +1,15 @@
-from fastapi import APIRouter, Request, HTTPException, Cookie, Response
+import logging
+from fastapi import APIRouter, Request, HTTPException, Cookie, Response, Depends
 from fastapi.responses import RedirectResponse, JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from app.services.auth_service import get_google_auth_url, handle_google_callback, handle_github_callback, get_github_auth_url, get_current_user
 from app.schemas.auth import SocialLoginUser
 from app.core.config import settings
+from app.core.jwt_handler import revoke_token
+from app.database.session import get_db
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -15,9 +21,9 @@ async def login_google(request: Request) -> dict:
 
 
 @router.get("/google/callback")
-async def google_callback(request: Request) -> RedirectResponse:
+async def google_callback(request: Request, db: AsyncSession = Depends(get_db)) -> RedirectResponse:
     """Handle Google OAuth callback and redirect with HttpOnly cookie"""
-    return await handle_google_callback(request)
+    return await handle_google_callback(request, db)
 
 @router.get("/login/github")
 async def github_login(request: Request):
@@ -25,22 +31,37 @@ async def github_login(request: Request):
     return await get_github_auth_url(request)
 
 @router.get("/github/callback")
-async def github_callback(request: Request) -> RedirectResponse:
+async def github_callback(request: Request, db: AsyncSession = Depends(get_db)) -> RedirectResponse:
     """Handle GitHub OAuth callback and redirect with HttpOnly cookie"""
-    return await handle_github_callback(request)
+    return await handle_github_callback(request, db)
 
 @router.get("/me", response_model=SocialLoginUser)
-async def get_me(access_token: Optional[str] = Cookie(None)) -> SocialLoginUser:
+async def get_me(
+    access_token: Optional[str] = Cookie(None),
+    db: AsyncSession = Depends(get_db)
+) -> SocialLoginUser:
     """Get current user information from HttpOnly cookie"""
     if not access_token:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
-    user = await get_current_user(access_token)
+    user = await get_current_user(access_token, db)
     return user
 
 @router.post("/logout")
-async def logout(response: Response):
-    """Logout user by clearing HttpOnly cookie"""
+async def logout(
+    response: Response,
+    access_token: Optional[str] = Cookie(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """Logout user by revoking the token and clearing HttpOnly cookie"""
+    if access_token:
+        try:
+            await revoke_token(db, access_token)
+            await db.commit()
+        except Exception as e:
+            # Revoked in this worker already; clearing the cookie must not fail
+            logger.warning(f"Failed to publish token revocation: {e}")
+
     response = JSONResponse(content={"message": "Logged out successfully"})
 
     # Clear the access_token cookie with same settings used when setting it
@@ -5,18 +5,26 @@ REST API endpoints for dormitory billing operations.
 """
 
 import logging
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional
+from typing import Optional, List
 
 from app.schemas.dormitory_bill import (
     DormitoryBillImport,
     SearchResponse,
-    ImportSummary
+    ImportSummary,
+    TermAnalyticsResponse,
+    TermTrendResponse,
+    RollupRefreshResponse,
+    AnomalySearchResponse,
+    AnomalyScanResponse,
+    TermPartitionListResponse,
+    PartitionDetachResponse
 )
-from app.services import dormitory_bill_service
+from app.services import dormitory_bill_service, dormitory_analytics_service, dormitory_anomaly_service
 from app.database.session import get_db
 from app.core.security import require_role, require_authenticated_user, require_api_key_or_admin
+from app.utils.columnar_utils import is_columnar_file, COLUMNAR_EXTENSIONS
 
 logger = logging.getLogger(__name__)
 
@@ -67,6 +75,7 @@ async def import_dormitory_bills(
     - 200: Import summary with created/updated counts
     - 400: Invalid JSON format
     - 403: Forbidden (not admin)
+    - 409: A term's partition name is taken by a table that is not attached
     - 422: Validation errors (invalid employee_id, negative amounts)
     - 500: Server error
 
@@ -133,6 +142,84 @@ async def import_dormitory_bills(
             detail=f"Failed to import bills: {str(e)}"
         )
 
+@router.post(
+    "/import/file",
+    response_model=ImportSummary,
+    summary="Import dormitory bills from Parquet / Arrow file",
+    description="Bulk import dormitory billing data from a Parquet or Arrow IPC file (requires API key with 'dormitory-bills:import' scope OR admin token)"
+)
+async def import_dormitory_bills_file(
+    file: UploadFile = File(..., description="Parquet (.parquet) or Arrow IPC (.arrow, .feather, .ipc) file"),
+    auth_info: dict = Depends(require_api_key_or_admin("dormitory-bills:import")),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Import dormitory bills from a columnar file with bulk upsert logic.
+
+    **Access:** Same as `/import` (API key with 'dormitory-bills:import' scope OR admin JWT)
+
+    **File Requirements:**
+    - Format: .parquet, .arrow, .feather or .ipc
+    - Max size: 100MB
+    - Columns: same names as the JSON import fields
+      (employee_id, term_code, dorm_code required; missing numeric columns default to 0)
+
+    **Validation:**
+    Rows are validated column-wise before any database work: required keys,
+    non-negative amounts and `elec_curr_index >= elec_last_index`.
+    Invalid rows are reported in `error_details`, the rest are imported.
+
+    **Response:**
+    - 200: Import summary with created/updated counts
+    - 400: Invalid file format or missing required columns
+    - 403: Forbidden (not admin)
+    - 409: A term's partition name is taken by a table that is not attached
+    - 413: File too large (>100MB)
+    - 500: Server error
+    """
+    logger.info(f"Importing bills from file: {file.filename} (auth: {auth_info.get('auth_type')})")
+
+    if not file.filename or not is_columnar_file(file.filename):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid file format. Accepted: {', '.join(COLUMNAR_EXTENSIONS)}"
+        )
+
+    # Validate file size (max 100MB)
+    MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
+    file_content = await file.read()
+    file_size = len(file_content)
+
+    if file_size > MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large. Maximum size is 100MB, but file is {file_size / 1024 / 1024:.2f}MB"
+        )
+
+    if file_size == 0:
+        raise HTTPException(
+            status_code=400,
+            detail="Empty file uploaded"
+        )
+
+    try:
+        result = await dormitory_bill_service.import_bills_from_columnar(db, file_content, file.filename)
+
+        logger.info(f"Import complete: {result['summary']}")
+        return result
+
+    except HTTPException:
+        # Re-raise HTTP exceptions from service layer
+        raise
+
+    except Exception as e:
+        logger.error(f"Unexpected error during file import: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to import bills: {str(e)}"
+        )
+
+
 @router.get(
     "/search",
     response_model=SearchResponse,
@@ -229,3 +316,241 @@ async def search_dormitory_bills(
             status_code=500,
             detail=f"Failed to search bills: {str(e)}"
         )
+
+
+@router.get(
+    "/analytics/terms/{term_code}",
+    response_model=TermAnalyticsResponse,
+    summary="Get dormitory usage analytics for a term",
+    description="Per-dorm or per-factory usage totals with comparison to the previous term (authenticated users)"
+)
+async def get_term_analytics(
+    term_code: str,
+    group_by: str = Query("dorm", description="Group by 'dorm' or 'factory'"),
+    top_n: int = Query(10, ge=1, le=100, description="Number of top consuming dorms (default: 10, max: 100)"),
+    rank_by: str = Query("total_amount", description="Column to rank top consumers (elec_usage, water_usage, total_amount, ...)"),
+    current_user: dict = Depends(require_authenticated_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get usage analytics for one billing term.
+
+    Served from the precomputed `dormitory_term_rollups` table, which is
+    refreshed for the affected terms after every import.
+
+    **Access:** Authenticated users only (blocks guest users)
+
+    **Query Parameters:**
+    - group_by: 'dorm' (default) or 'factory'
+    - top_n: Number of top consuming dorms to return
+    - rank_by: Column used for top consumers ranking
+
+    **Response:**
+    - 200: Term totals, previous term totals, grouped breakdown and top consumers
+    - 403: Forbidden (guest user not allowed)
+    - 404: No billing data for the term
+    - 422: Invalid group_by or rank_by
+    """
+    logger.info(f"User {current_user.get('localId')} requesting analytics: term_code={term_code}, group_by={group_by}")
+
+    return await dormitory_analytics_service.get_term_analytics(
+        db=db,
+        term_code=term_code,
+        group_by=group_by,
+        top_n=top_n,
+        rank_by=rank_by
+    )
+
+
+@router.get(
+    "/analytics/trend",
+    response_model=TermTrendResponse,
+    summary="Get dormitory usage trend across terms",
+    description="Totals for the most recent terms with term-over-term change (authenticated users)"
+)
+async def get_term_trend(
+    limit: int = Query(12, ge=1, le=100, description="Number of most recent terms (default: 12, max: 100)"),
+    factory_location: Optional[str] = Query(None, description="Filter by factory location (exact match)"),
+    current_user: dict = Depends(require_authenticated_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get usage totals for the most recent terms.
+
+    **Access:** Authenticated users only (blocks guest users)
+
+    **Response:**
+    - 200: Terms ordered by term_code ascending with totals and change vs previous term
+    - 403: Forbidden (guest user not allowed)
+    """
+    logger.info(f"User {current_user.get('localId')} requesting usage trend: limit={limit}, factory_location={factory_location}")
+
+    return await dormitory_analytics_service.get_term_trend(db=db, limit=limit, factory_location=factory_location)
+
+
+@router.post(
+    "/analytics/refresh",
+    response_model=RollupRefreshResponse,
+    summary="Rebuild dormitory usage rollups",
+    description="Rebuild precomputed rollups for the given terms or all terms (admin only)"
+)
+async def refresh_term_rollups(
+    term_code: Optional[List[str]] = Query(None, description="Terms to rebuild (repeatable, default: all terms with bills)"),
+    current_user: dict = Depends(require_role("admin")),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Rebuild rollups from the bills table.
+
+    Imports refresh their own terms automatically; this endpoint is for
+    backfills and manual corrections.
+
+    **Access:** Admin only
+
+    **Response:**
+    - 200: Number of rollup rows rebuilt
+    - 403: Forbidden (not admin)
+    - 500: Server error
+    """
+    logger.info(f"Admin {current_user.get('localId')} refreshing rollups: terms={term_code or 'all'}")
+
+    try:
+        rows = await dormitory_analytics_service.refresh_term_rollups(db, term_code)
+        await db.commit()
+        return {"success": True, "rows_refreshed": rows}
+
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Rollup refresh failed: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to refresh rollups: {str(e)}"
+        )
+
+
+@router.post(
+    "/anomalies/scan",
+    response_model=AnomalyScanResponse,
+    summary="Scan all bills for meter-reading anomalies",
+    description="Detect index gaps, resets and usage spikes across all terms (admin only)"
+)
+async def scan_anomalies(
+    z_threshold: float = Query(3.0, gt=0, description="Usage z-score above which a term is flagged as spike"),
+    min_terms: int = Query(4, ge=2, description="Minimum terms of history a dorm needs for spike detection"),
+    current_user: dict = Depends(require_role("admin")),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Re-run meter-reading analysis over all historical bills.
+
+    For every dorm, readings are ordered by term_code and compared with the
+    previous term in a single window-function query:
+    - gap: last index is higher than the previous term's current index
+    - reset: last index is lower than the previous term's current index
+    - spike: usage z-score against the dorm's other terms exceeds `z_threshold`
+
+    Previous scan results are replaced.
+
+    **Access:** Admin only
+
+    **Response:**
+    - 200: Anomaly counts by type
+    - 403: Forbidden (not admin)
+    - 500: Server error
+    """
+    logger.info(f"Admin {current_user.get('localId')} scanning anomalies: z_threshold={z_threshold}, min_terms={min_terms}")
+
+    return await dormitory_anomaly_service.scan_anomalies(db, z_threshold=z_threshold, min_terms=min_terms)
+
+
+@router.get(
+    "/anomalies",
+    response_model=AnomalySearchResponse,
+    summary="Search meter-reading anomalies",
+    description="Search anomalies found by the last scan with filters and pagination (authenticated users)"
+)
+async def search_anomalies(
+    term_code: Optional[str] = Query(None, description="Filter by term code (exact match, e.g., '25A')"),
+    dorm_code: Optional[str] = Query(None, description="Filter by room code (exact match, e.g., 'A01')"),
+    meter: Optional[str] = Query(None, description="Filter by meter ('elec' or 'water')"),
+    anomaly_type: Optional[str] = Query(None, description="Filter by type ('gap', 'reset' or 'spike')"),
+    page: int = Query(1, ge=1, description="Page number (1-indexed, default: 1)"),
+    page_size: int = Query(50, ge=1, le=100, description="Items per page (default: 50, max: 100)"),
+    current_user: dict = Depends(require_authenticated_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Search stored meter-reading anomalies.
+
+    **Access:** Authenticated users only (blocks guest users)
+
+    **Response:**
+    - 200: Paginated anomalies ordered by term_code DESC, dorm_code
+    - 403: Forbidden (guest user not allowed)
+    - 422: Invalid filter or pagination parameters
+    """
+    logger.info(f"User {current_user.get('localId')} searching anomalies: term_code={term_code}, dorm_code={dorm_code}, meter={meter}, anomaly_type={anomaly_type}")
+
+    return await dormitory_anomaly_service.search_anomalies(
+        db=db,
+        term_code=term_code,
+        dorm_code=dorm_code,
+        meter=meter,
+        anomaly_type=anomaly_type,
+        page=page,
+        page_size=page_size
+    )
+
+
+@router.get(
+    "/partitions",
+    response_model=TermPartitionListResponse,
+    summary="List term partitions",
+    description="List dormitory bill partitions (one per term) with estimated row counts (admin only)"
+)
+async def list_term_partitions(
+    current_user: dict = Depends(require_role("admin")),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    List attached term partitions of the bills table.
+
+    **Access:** Admin only
+
+    **Response:**
+    - 200: Partitions with term_code and estimated row count
+    - 403: Forbidden (not admin)
+    """
+    return await dormitory_bill_service.list_term_partitions(db)
+
+
+@router.post(
+    "/partitions/{term_code}/detach",
+    response_model=PartitionDetachResponse,
+    summary="Detach a term partition",
+    description="Detach one term's bills from the live table for archiving (admin only)"
+)
+async def detach_term_partition(
+    term_code: str,
+    current_user: dict = Depends(require_role("admin")),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Detach a term partition.
+
+    The term's bills disappear from search and import conflict checks but
+    stay in a standalone table (renamed with a _detached_<timestamp> suffix)
+    that can be dumped or dropped; the term can be imported again. Rollups
+    for the term are kept, so analytics and trends still include it.
+
+    **Access:** Admin only
+
+    **Response:**
+    - 200: Archived table name
+    - 403: Forbidden (not admin)
+    - 404: No partition for the term
+    - 500: Server error
+    """
+    logger.info(f"Admin {current_user.get('localId')} detaching partition for term {term_code}")
+
+    return await dormitory_bill_service.detach_term_partition(db, term_code)
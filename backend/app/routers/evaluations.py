@@ -2,7 +2,7 @@
 Evaluations API Router.
 
 Provides 2 endpoints:
-1. POST /upload - Upload Excel file to import evaluations (admin only)
+1. POST /upload - Upload Excel / Parquet / Arrow file to import evaluations (admin only)
 2. GET /search - Search evaluations with filters (authenticated users)
 """
 
@@ -17,6 +17,7 @@ from app.schemas.evaluation import UploadSummary, SearchResponse
 from app.services import evaluation_service
 from app.database.session import get_db
 from app.core.security import require_role, require_authenticated_user, require_api_key_or_admin
+from app.utils.columnar_utils import is_columnar_file
 
 logger = logging.getLogger(__name__)
 
@@ -30,15 +31,15 @@ router = APIRouter(
     "/upload",
     response_model=UploadSummary,
     summary="Upload evaluation Excel file",
-    description="Upload Excel file to import/update employee evaluations (requires API key with 'evaluations:import' scope OR admin token)"
+    description="Upload Excel, Parquet or Arrow IPC file to import/update employee evaluations (requires API key with 'evaluations:import' scope OR admin token)"
 )
 async def upload_evaluations(
-    file: UploadFile = File(..., description="Excel file (.xlsx or .xls)"),
+    file: UploadFile = File(..., description="Excel (.xlsx, .xls), Parquet (.parquet) or Arrow IPC (.arrow, .feather, .ipc) file"),
     auth_info: dict = Depends(require_api_key_or_admin("evaluations:import")),
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Upload evaluation data from Excel file.
+    Upload evaluation data from Excel or columnar (Parquet / Arrow IPC) file.
 
     **Access:** Requires EITHER:
     - API key with 'evaluations:import' scope (for external integrations)
@@ -52,15 +53,15 @@ async def upload_evaluations(
        - Must have admin role
 
     **File Requirements:**
-    - Format: .xlsx or .xls
-    - Max size: 10MB
-    - Required columns: 評核年月, 工號
+    - Format: .xlsx or .xls (max 10MB)
+    - Format: .parquet, .arrow, .feather or .ipc (max 100MB)
+    - Required columns: 評核年月, 工號 (columnar files may also use term_code, employee_id)
 
     **Response:**
     - 200: Upload summary with created/updated counts
     - 400: Invalid file format or missing required columns
     - 403: Forbidden (not admin)
-    - 413: File too large (>10MB)
+    - 413: File too large (>10MB Excel, >100MB columnar)
     - 500: Processing error
 
     **Example Response:**
@@ -86,21 +87,24 @@ async def upload_evaluations(
             detail="Filename is required"
         )
 
-    if not file.filename.lower().endswith(('.xlsx', '.xls')):
+    is_columnar = is_columnar_file(file.filename)
+
+    if not is_columnar and not file.filename.lower().endswith(('.xlsx', '.xls')):
         raise HTTPException(
             status_code=400,
-            detail="Invalid file format. Only .xlsx and .xls files are accepted."
+            detail="Invalid file format. Only .xlsx, .xls, .parquet, .arrow, .feather and .ipc files are accepted."
         )
 
-    # Validate file size (max 10MB)
-    MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+    # Validate file size (max 10MB for Excel, 100MB for columnar files)
+    MAX_FILE_SIZE_MB = 100 if is_columnar else 10
+    MAX_FILE_SIZE = MAX_FILE_SIZE_MB * 1024 * 1024
     file_content = await file.read()
     file_size = len(file_content)
 
     if file_size > MAX_FILE_SIZE:
         raise HTTPException(
             status_code=413,
-            detail=f"File too large. Maximum size is 10MB, but file is {file_size / 1024 / 1024:.2f}MB"
+            detail=f"File too large. Maximum size is {MAX_FILE_SIZE_MB}MB, but file is {file_size / 1024 / 1024:.2f}MB"
         )
 
     if file_size == 0:
@@ -109,6 +113,24 @@ async def upload_evaluations(
             detail="Empty file uploaded"
         )
 
+    # Columnar files are decoded in memory, no temp file needed
+    if is_columnar:
+        try:
+            result = await evaluation_service.upload_evaluations_from_columnar(db, file_content, file.filename)
+
+            logger.info(f"Upload complete: {result['summary']}")
+            return result
+
+        except HTTPException:
+            raise
+
+        except Exception as e:
+            logger.error(f"Unexpected error during columnar upload: {e}", exc_info=True)
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to process columnar file: {str(e)}"
+            )
+
     # Create temp file
     temp_file = None
     temp_path = None
@@ -10,7 +10,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
-from app.core.security import require_role
+from app.core.security import require_role, require_authenticated_user
 from app.core.config import settings
 from app.database.session import get_db
 from app.schemas.pidms import (
@@ -20,8 +20,12 @@ from app.schemas.pidms import (
     PIDMSProductsResponse,
     PIDMSSyncRequest,
     PIDMSSyncResponse,
+    PIDMSSyncStatusResponse,
+    PIDMSForecastResponse,
+    PIDMSReserveRequest,
+    PIDMSReservationResponse,
 )
-from app.services import pidms_service
+from app.services import pidms_service, pidms_forecast_service
 from app.integrations.pidkey_client import PIDKeyClient
 
 logger = logging.getLogger(__name__)
@@ -59,6 +63,8 @@ async def check_keys(
 
     **Request Body:**
     - keys: Newline or comma-separated list of product keys (with or without dashes)
+    - only_unknown: Answer keys checked within `stale_after_hours` from the database
+      (status 'cached') and send only unknown or stale keys to PIDKey.com
 
     **Response:**
     - 200: Check summary with new/updated counts and detailed results
@@ -103,6 +109,9 @@ async def check_keys(
 
     logger.info(f"Admin {current_user.get('email')} checking {len(keys_list)} keys")
 
+    if request.only_unknown:
+        return await pidms_service.check_unknown_keys(db, keys_list, client, request.stale_after_hours)
+
     result = await pidms_service.check_and_upsert_keys(db, keys_list, client)
     return result
 
@@ -120,6 +129,8 @@ async def search_keys(
     blocked: Optional[int] = Query(None, description="Blocked status (-1=not blocked, 1=blocked)"),
     page: int = Query(1, ge=1, description="Page number (1-indexed)"),
     page_size: int = Query(50, ge=1, le=100, description="Items per page (max 100)"),
+    fuzzy: bool = Query(False, description="Rank products by trigram similarity instead of substring match"),
+    min_similarity: float = Query(0.3, ge=0, le=1, description="Fuzzy mode similarity cutoff (0-1)"),
     current_user: dict = Depends(require_role("admin")),
     db: AsyncSession = Depends(get_db)
 ):
@@ -135,6 +146,9 @@ async def search_keys(
     - blocked: Filter by blocked status (-1 or 1)
     - page: Page number (default: 1)
     - page_size: Items per page (default: 50, max: 100)
+    - fuzzy: Match `product` by similarity (e.g., 'office 2019 pro' finds Office19ProPlusVL codes),
+      most similar products first
+    - min_similarity: Fuzzy mode cutoff (default: 0.3)
 
     **Response:**
     - 200: Paginated search results
@@ -168,7 +182,8 @@ async def search_keys(
     logger.info(f"Admin {current_user.get('email')} searching keys: product={product}")
 
     result = await pidms_service.search_keys(
-        db, product, min_remaining, max_remaining, blocked, page, page_size
+        db, product, min_remaining, max_remaining, blocked, page, page_size,
+        fuzzy=fuzzy, min_similarity=min_similarity
     )
     return result
 
@@ -220,6 +235,68 @@ async def get_products(
     return result
 
 
+@router.post(
+    "/reserve",
+    response_model=PIDMSReservationResponse,
+    summary="Reserve a product key",
+    description="Atomically hand out the best available key of a product (authenticated users)"
+)
+async def reserve_key(
+    request: PIDMSReserveRequest,
+    current_user: dict = Depends(require_authenticated_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Reserve the unblocked key with the most available activations.
+
+    Concurrent requests never receive the same key: rows being reserved are
+    skipped (SELECT ... FOR UPDATE SKIP LOCKED) and the key's local
+    reserved_count is incremented until the next check refreshes remaining.
+
+    **Access:** Authenticated users only (blocks guest users)
+
+    **Response:**
+    - 200: Reserved key with updated counters
+    - 403: Forbidden (guest user not allowed)
+    - 404: No available key for the product
+    - 500: Server error
+    """
+    reserved_by = current_user.get("email") or current_user.get("localId") or "unknown"
+    logger.info(f"User {reserved_by} reserving key for product {request.product}")
+
+    return await pidms_service.reserve_key(db, request.product, reserved_by, request.note)
+
+
+@router.get(
+    "/forecast",
+    response_model=PIDMSForecastResponse,
+    summary="Forecast product depletion",
+    description="Per-product burn rate and days-to-depletion from key history (admin only)"
+)
+async def get_forecast(
+    window_days: int = Query(90, ge=1, le=730, description="History window in days used for the regression"),
+    product: Optional[str] = Query(None, description="Partial product name match (e.g., 'Office')"),
+    current_user: dict = Depends(require_role("admin")),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Forecast when each product runs out of activations.
+
+    Every sync appends to the key history when a key's remaining or blocked
+    value changes. The burn rate is a least-squares fit of each key's
+    remaining count over the window, summed per product.
+
+    **Access:** Admin only
+
+    **Response:**
+    - 200: Products ordered by days_to_depletion (soonest first)
+    - 403: Forbidden (not admin)
+    """
+    logger.info(f"Admin {current_user.get('email')} requesting depletion forecast (window: {window_days} days)")
+
+    return await pidms_forecast_service.get_depletion_forecast(db, window_days, product)
+
+
 @router.post(
     "/sync",
     response_model=PIDMSSyncResponse,
@@ -239,10 +316,16 @@ async def sync_keys(
 
     **Request Body:**
     - product_filter: Optional filter to sync only specific product type
+    - incremental: Only sync keys not checked within `stale_after_hours`,
+      lowest remaining and most-stocked products first, at most `max_keys`
+
+    Runs under the same cluster-wide lock as the background scheduler and
+    is recorded in the sync status history.
 
     **Response:**
     - 200: Sync summary with total_synced, updated, and error counts
     - 403: Forbidden (not admin)
+    - 409: Another sync is already running
     - 500: Server error (API failure, database error)
 
     **Example Request:**
@@ -272,5 +355,39 @@ async def sync_keys(
     """
     logger.info(f"Admin {current_user.get('email')} requested sync (filter: {request.product_filter or 'all'})")
 
-    result = await pidms_service.sync_all_keys(db, client, request.product_filter)
+    result = await pidms_service.run_locked_sync(
+        db, client,
+        trigger="manual",
+        product_filter=request.product_filter,
+        incremental=request.incremental,
+        stale_after_hours=request.stale_after_hours,
+        max_keys=request.max_keys
+    )
+
+    if result is None:
+        raise HTTPException(status_code=409, detail="Another PIDMS sync is already running")
+
     return result
+
+
+@router.get(
+    "/sync/status",
+    response_model=PIDMSSyncStatusResponse,
+    summary="Get sync status",
+    description="Get background scheduler settings and recent sync runs (admin only)"
+)
+async def get_sync_status(
+    limit: int = Query(10, ge=1, le=100, description="Number of recent runs to return"),
+    current_user: dict = Depends(require_role("admin")),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get PIDMS sync status.
+
+    **Access:** Admin only
+
+    **Response:**
+    - 200: Scheduler settings, whether a sync is running, and recent runs
+    - 403: Forbidden (not admin)
+    """
+    return await pidms_service.get_sync_status(db, limit)
@@ -0,0 +1,32 @@
+"""
+System Router
+
+Operational endpoints (admin only).
+"""
+
+from fastapi import APIRouter, Depends
+
+from app.core.security import require_role
+from app.database.session import get_pool_stats
+from app.schemas.system import DBPoolStatsResponse
+
+router = APIRouter(prefix="/system", tags=["system"])
+
+
+@router.get(
+    "/db-pool",
+    response_model=DBPoolStatsResponse,
+    summary="Database pool statistics",
+    description="Connection pool settings and usage of the worker answering the request (admin only)"
+)
+async def get_db_pool_stats(
+    current_user: dict = Depends(require_role("admin"))
+):
+    """
+    Show connection pool usage.
+
+    Each uvicorn worker has its own pool; repeated calls may hit different workers.
+    checked_out close to pool_size + max_overflow means requests are waiting
+    for connections (raise DB_POOL_SIZE or reduce per-request connection use).
+    """
+    return get_pool_stats()
@@ -1,10 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
 from app.core.security import require_role
+from app.core.jwt_handler import revoke_user_tokens
+from app.core.cache import publish_invalidation
+from app.services.auth_service import USER_PROFILE_CACHE
 from app.models.user import User
-from app.database.session import AsyncSessionLocal
+from app.database.session import get_db
 from app.schemas.users import (
     AssignLocalIdRequest,
     UpdateRoleRequest,
@@ -20,7 +24,8 @@ router = APIRouter(prefix="/users", tags=["users"])
 async def assign_local_id(
     user_id: int,
     request: AssignLocalIdRequest,
-    current_user: dict = Depends(require_role("admin"))
+    current_user: dict = Depends(require_role("admin")),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Admin assigns or updates localId for a user.
@@ -39,44 +44,47 @@ async def assign_local_id(
         403: If user is not admin
         404: If target user not found
     """
-    async with AsyncSessionLocal() as db:
-        # Get user
-        stmt = select(User).where(User.id == user_id)
-        result = await db.execute(stmt)
-        user = result.scalars().first()
-
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"User with ID {user_id} not found"
-            )
+    # Get user
+    stmt = select(User).where(User.id == user_id)
+    result = await db.execute(stmt)
+    user = result.scalars().first()
+
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User with ID {user_id} not found"
+        )
 
-        # Update localId
-        user.localId = request.localId
-        await db.commit()
-        await db.refresh(user)
-
-        return UserActionResponse(
-            success=True,
-            message=f"LocalId '{request.localId}' assigned to user {user.email}",
-            user=UserResponse(
-                id=user.id,
-                email=user.email,
-                full_name=user.full_name,
-                localId=user.localId,
-                role=user.role,
-                provider=user.provider,
-                is_active=user.is_active,
-                created_at=user.created_at
-            )
+    # Update localId; tokens carry the old localId, so they are revoked
+    if user.localId != request.localId:
+        await revoke_user_tokens(db, user.id)
+    await publish_invalidation(db, USER_PROFILE_CACHE, str(user.id))
+    user.localId = request.localId
+    await db.commit()
+    await db.refresh(user)
+
+    return UserActionResponse(
+        success=True,
+        message=f"LocalId '{request.localId}' assigned to user {user.email}",
+        user=UserResponse(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            localId=user.localId,
+            role=user.role,
+            provider=user.provider,
+            is_active=user.is_active,
+            created_at=user.created_at
         )
+    )
 
 
 @router.put("/{user_id}/role", response_model=UserActionResponse)
 async def update_user_role(
     user_id: int,
     request: UpdateRoleRequest,
-    current_user: dict = Depends(require_role("admin"))
+    current_user: dict = Depends(require_role("admin")),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Admin updates user role.
@@ -97,46 +105,49 @@ async def update_user_role(
         404: If target user not found
         400: If admin tries to demote themselves
     """
-    async with AsyncSessionLocal() as db:
-        # Get user
-        stmt = select(User).where(User.id == user_id)
-        result = await db.execute(stmt)
-        user = result.scalars().first()
-
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"User with ID {user_id} not found"
-            )
+    # Get user
+    stmt = select(User).where(User.id == user_id)
+    result = await db.execute(stmt)
+    user = result.scalars().first()
+
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User with ID {user_id} not found"
+        )
 
-        # Prevent self-demotion from admin
-        current_user_id = int(current_user.get("user_id"))
-        if user.id == current_user_id and request.role != "admin":
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Cannot demote yourself from admin role"
-            )
+    # Prevent self-demotion from admin
+    current_user_id = int(current_user.get("user_id"))
+    if user.id == current_user_id and request.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot demote yourself from admin role"
+        )
 
-        # Update role
-        old_role = user.role
-        user.role = request.role
-        await db.commit()
-        await db.refresh(user)
-
-        return UserActionResponse(
-            success=True,
-            message=f"Role updated: {old_role} → {request.role}",
-            user=UserResponse(
-                id=user.id,
-                email=user.email,
-                full_name=user.full_name,
-                localId=user.localId,
-                role=user.role,
-                provider=user.provider,
-                is_active=user.is_active,
-                created_at=user.created_at
-            )
+    # Update role
+    old_role = user.role
+    if old_role != request.role:
+        # Tokens carry the role claim; force a new sign-in
+        await revoke_user_tokens(db, user.id)
+    await publish_invalidation(db, USER_PROFILE_CACHE, str(user.id))
+    user.role = request.role
+    await db.commit()
+    await db.refresh(user)
+
+    return UserActionResponse(
+        success=True,
+        message=f"Role updated: {old_role} → {request.role}",
+        user=UserResponse(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            localId=user.localId,
+            role=user.role,
+            provider=user.provider,
+            is_active=user.is_active,
+            created_at=user.created_at
         )
+    )
 
 
 @router.get("", response_model=UserListResponse)
@@ -146,7 +157,8 @@ async def list_users(
     email: Optional[str] = None,
     limit: int = 50,
     offset: int = 0,
-    current_user: dict = Depends(require_role("admin"))
+    current_user: dict = Depends(require_role("admin")),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Admin lists users with optional filters.
@@ -167,52 +179,51 @@ async def list_users(
     Raises:
         403: If user is not admin
     """
-    async with AsyncSessionLocal() as db:
-        # Build query
-        stmt = select(User)
-
-        # Apply filters
-        if localId:
-            stmt = stmt.where(User.localId == localId)
-        if provider:
-            stmt = stmt.where(User.provider == provider)
-        if email:
-            stmt = stmt.where(User.email.ilike(f"%{email}%"))
-
-        # Count total (before pagination)
-        count_stmt = select(func.count(User.id))
-        if localId:
-            count_stmt = count_stmt.where(User.localId == localId)
-        if provider:
-            count_stmt = count_stmt.where(User.provider == provider)
-        if email:
-            count_stmt = count_stmt.where(User.email.ilike(f"%{email}%"))
-
-        count_result = await db.execute(count_stmt)
-        total = count_result.scalar()
-
-        # Apply pagination
-        stmt = stmt.limit(limit).offset(offset)
-
-        # Execute query
-        result = await db.execute(stmt)
-        users = result.scalars().all()
-
-        return UserListResponse(
-            users=[
-                UserResponse(
-                    id=u.id,
-                    email=u.email,
-                    full_name=u.full_name,
-                    localId=u.localId,
-                    role=u.role,
-                    provider=u.provider,
-                    is_active=u.is_active,
-                    created_at=u.created_at
-                )
-                for u in users
-            ],
-            total=total,
-            limit=limit,
-            offset=offset
-        )
+    # Build query
+    stmt = select(User)
+
+    # Apply filters
+    if localId:
+        stmt = stmt.where(User.localId == localId)
+    if provider:
+        stmt = stmt.where(User.provider == provider)
+    if email:
+        stmt = stmt.where(User.email.ilike(f"%{email}%"))
+
+    # Count total (before pagination)
+    count_stmt = select(func.count(User.id))
+    if localId:
+        count_stmt = count_stmt.where(User.localId == localId)
+    if provider:
+        count_stmt = count_stmt.where(User.provider == provider)
+    if email:
+        count_stmt = count_stmt.where(User.email.ilike(f"%{email}%"))
+
+    count_result = await db.execute(count_stmt)
+    total = count_result.scalar()
+
+    # Apply pagination
+    stmt = stmt.limit(limit).offset(offset)
+
+    # Execute query
+    result = await db.execute(stmt)
+    users = result.scalars().all()
+
+    return UserListResponse(
+        users=[
+            UserResponse(
+                id=u.id,
+                email=u.email,
+                full_name=u.full_name,
+                localId=u.localId,
+                role=u.role,
+                provider=u.provider,
+                is_active=u.is_active,
+                created_at=u.created_at
+            )
+            for u in users
+        ],
+        total=total,
+        limit=limit,
+        offset=offset
+    )
@@ -18,5 +18,17 @@ from .dormitory_bill import (
     DormitoryBillImport,
     DormitoryBillResponse,
     SearchResponse as DormitorySearchResponse,
-    ImportSummary as DormitoryImportSummary
+    ImportSummary as DormitoryImportSummary,
+    UsageTotals,
+    UsageGroup,
+    TermAnalyticsResponse,
+    TermTrendPoint,
+    TermTrendResponse,
+    RollupRefreshResponse,
+    AnomalyResponse,
+    AnomalySearchResponse,
+    AnomalyScanResponse,
+    TermPartition,
+    TermPartitionListResponse,
+    PartitionDetachResponse
 )
\ No newline at end of file
@@ -124,3 +124,109 @@ class ImportSummary(BaseModel):
                 "error_details": []
             }
         }
+
+
+class UsageTotals(BaseModel):
+    """Aggregated usage and amounts with per-occupant averages."""
+    occupant_count: int = Field(..., description="Number of billed occupants", ge=0)
+    elec_usage: float = Field(..., description="Total electricity usage (kWh)")
+    water_usage: float = Field(..., description="Total water usage (m³)")
+    elec_amount: float = Field(..., description="Total electricity amount (VND)")
+    water_amount: float = Field(..., description="Total water amount (VND)")
+    shared_fee: float = Field(..., description="Total shared facility fee (VND)")
+    management_fee: float = Field(..., description="Total management fee (VND)")
+    total_amount: float = Field(..., description="Total billed amount (VND)")
+    cost_per_occupant: float = Field(..., description="Average total amount per occupant (VND)")
+    elec_usage_per_occupant: float = Field(..., description="Average electricity usage per occupant (kWh)")
+    water_usage_per_occupant: float = Field(..., description="Average water usage per occupant (m³)")
+
+
+class UsageGroup(UsageTotals):
+    """Usage totals for one dorm or factory with change vs previous term."""
+    key: str = Field(..., description="Group key (dorm_code or factory_location)")
+    factory_location: Optional[str] = Field(None, description="Factory location/wing")
+    previous_total_amount: Optional[float] = Field(None, description="Total amount in previous term (VND)")
+    total_amount_change: Optional[float] = Field(None, description="Total amount change vs previous term (VND)")
+    total_amount_change_pct: Optional[float] = Field(None, description="Total amount change vs previous term (%)")
+    elec_usage_change_pct: Optional[float] = Field(None, description="Electricity usage change vs previous term (%)")
+    water_usage_change_pct: Optional[float] = Field(None, description="Water usage change vs previous term (%)")
+
+
+class TermAnalyticsResponse(BaseModel):
+    """Schema for per-term usage analytics."""
+    term_code: str = Field(..., description="Billing term code")
+    previous_term_code: Optional[str] = Field(None, description="Previous term used for comparison")
+    group_by: str = Field(..., description="Grouping: 'dorm' or 'factory'")
+    totals: UsageTotals = Field(..., description="Totals for the whole term")
+    previous_totals: Optional[UsageTotals] = Field(None, description="Totals for the previous term")
+    groups: List[UsageGroup] = Field(..., description="Per-dorm or per-factory breakdown")
+    top_consumers: List[UsageGroup] = Field(..., description="Top-N dorms ranked by the requested column")
+
+
+class TermTrendPoint(UsageTotals):
+    """Totals of one term in a trend series."""
+    term_code: str = Field(..., description="Billing term code")
+    dorm_count: int = Field(..., description="Number of billed dorms", ge=0)
+    total_amount_change_pct: Optional[float] = Field(None, description="Total amount change vs previous term (%)")
+
+
+class TermTrendResponse(BaseModel):
+    """Schema for multi-term usage trend."""
+    terms: List[TermTrendPoint] = Field(..., description="Terms ordered by term_code ascending")
+
+
+class RollupRefreshResponse(BaseModel):
+    """Schema for rollup refresh result."""
+    success: bool = Field(..., description="Whether refresh succeeded")
+    rows_refreshed: int = Field(..., description="Number of rollup rows rebuilt", ge=0)
+
+
+class AnomalyResponse(BaseModel):
+    """Schema for a stored meter-reading anomaly."""
+    id: int = Field(..., description="Anomaly ID")
+    dorm_code: str = Field(..., description="Dormitory room code")
+    term_code: str = Field(..., description="Billing term where the anomaly was found")
+    previous_term_code: Optional[str] = Field(None, description="Previous billing term of the dorm")
+    meter: str = Field(..., description="Meter: 'elec' or 'water'")
+    anomaly_type: str = Field(..., description="'gap', 'reset' or 'spike'")
+    expected_value: Optional[float] = Field(None, description="Previous current index (gap/reset) or average usage (spike)")
+    actual_value: Optional[float] = Field(None, description="Last index (gap/reset) or usage (spike)")
+    deviation: Optional[float] = Field(None, description="Index difference (gap/reset) or z-score (spike)")
+    detected_at: Optional[datetime] = Field(None, description="Scan timestamp")
+
+    class Config:
+        from_attributes = True
+
+
+class AnomalySearchResponse(BaseModel):
+    """Schema for paginated anomaly results."""
+    total: int = Field(..., description="Total matching anomalies", ge=0)
+    page: int = Field(..., description="Current page number", ge=1)
+    page_size: int = Field(..., description="Items per page", ge=1, le=100)
+    results: List[AnomalyResponse] = Field(..., description="Anomaly records")
+
+
+class AnomalyScanResponse(BaseModel):
+    """Schema for anomaly scan result."""
+    success: bool = Field(..., description="Whether scan succeeded")
+    summary: dict = Field(..., description="Anomaly counts (total, gap, reset, spike)")
+
+
+class TermPartition(BaseModel):
+    """Schema for one term partition of dormitory_bills."""
+    term_code: Optional[str] = Field(None, description="Billing term stored in the partition")
+    partition_name: str = Field(..., description="Partition table name")
+    estimated_rows: int = Field(..., description="Planner row estimate (updated by ANALYZE)", ge=0)
+
+
+class TermPartitionListResponse(BaseModel):
+    """Schema for attached partition list."""
+    total: int = Field(..., description="Number of attached partitions", ge=0)
+    partitions: List[TermPartition] = Field(..., description="Partitions ordered by name descending")
+
+
+class PartitionDetachResponse(BaseModel):
+    """Schema for partition detach result."""
+    success: bool = Field(..., description="Whether detach succeeded")
+    term_code: str = Field(..., description="Detached billing term")
+    partition_name: str = Field(..., description="Archived table name (data is kept, renamed with a _detached_<timestamp> suffix)")
@@ -7,7 +7,7 @@ Covers check, sync, search, and products operations.
 
 from pydantic import BaseModel, Field
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, date
 
 
 class PIDMSKeyCheckRequest(BaseModel):
@@ -17,6 +17,15 @@ class PIDMSKeyCheckRequest(BaseModel):
         description="Newline or comma-separated list of product keys (with or without dashes)",
         min_length=1
     )
+    only_unknown: bool = Field(
+        False,
+        description="Answer keys checked within stale_after_hours from the database and only send unknown/stale keys to PIDKey.com"
+    )
+    stale_after_hours: Optional[int] = Field(
+        None,
+        ge=0,
+        description="only_unknown mode: keys last checked longer ago than this are re-checked (default from settings)"
+    )
 
 
 class PIDMSKeyResponse(BaseModel):
@@ -30,14 +39,16 @@ class PIDMSKeyResponse(BaseModel):
     is_retail: Optional[int] = Field(None, description="1=retail, 2=volume license")
     remaining: int = Field(..., description="Remaining activation count")
     blocked: int = Field(..., description="-1=not blocked, 1=blocked")
+    reserved_count: Optional[int] = Field(None, description="Local reservations since the last check")
     errorcode: Optional[str] = Field(None, description="Error code from PIDKey.com")
     sub: Optional[str] = Field(None, description="Subscription code")
     had_occurred: Optional[int] = Field(None, description="Occurrence flag")
     invalid: Optional[int] = Field(None, description="0=valid, 1=invalid")
     datetime_checked_done: Optional[str] = Field(None, description="Last check timestamp from PIDKey.com")
+    last_synced_at: Optional[datetime] = Field(None, description="When this key was last checked by us")
     created_at: Optional[datetime] = Field(None, description="Record creation timestamp")
     updated_at: Optional[datetime] = Field(None, description="Record update timestamp")
-    status: Optional[str] = Field(None, description="Operation status: 'new' or 'updated'")
+    status: Optional[str] = Field(None, description="Operation status: 'new', 'updated' or 'cached'")
 
     class Config:
         from_attributes = True
@@ -49,6 +60,7 @@ class PIDMSCheckSummary(BaseModel):
     new_keys: int = Field(..., description="Number of new keys inserted")
     updated_keys: int = Field(..., description="Number of existing keys updated")
     errors: int = Field(..., description="Number of errors encountered")
+    cached_keys: int = Field(0, description="Keys answered from the database without calling PIDKey.com")
 
 
 class PIDMSCheckResponse(BaseModel):
@@ -64,6 +76,20 @@ class PIDMSSyncRequest(BaseModel):
         None,
         description="Optional product filter (e.g., 'Office' to sync only Office products)"
     )
+    incremental: bool = Field(
+        False,
+        description="Only sync keys not checked recently, lowest remaining and most-stocked products first"
+    )
+    stale_after_hours: Optional[int] = Field(
+        None,
+        ge=0,
+        description="Incremental mode: re-check keys last synced more than this many hours ago (default from settings)"
+    )
+    max_keys: Optional[int] = Field(
+        None,
+        ge=1,
+        description="Incremental mode: maximum keys to check in this run (default from settings)"
+    )
 
 
 class PIDMSSyncSummary(BaseModel):
@@ -89,6 +115,35 @@ class PIDMSSyncResponse(BaseModel):
     )
 
 
+class PIDMSSyncRunResponse(BaseModel):
+    """Response schema for one recorded sync run."""
+    id: int
+    trigger: str = Field(..., description="'scheduled' or 'manual'")
+    mode: str = Field(..., description="'full' or 'incremental'")
+    status: str = Field(..., description="'running', 'success', 'failed' or 'cancelled'")
+    worker: Optional[str] = Field(None, description="hostname:pid that executed the run")
+    total_synced: int = Field(..., description="Total keys synced")
+    updated: int = Field(..., description="Number of keys updated")
+    errors: int = Field(..., description="Number of errors encountered")
+    error_message: Optional[str] = Field(None, description="Failure reason for failed runs")
+    started_at: datetime = Field(..., description="Run start timestamp")
+    finished_at: Optional[datetime] = Field(None, description="Run end timestamp")
+
+    class Config:
+        from_attributes = True
+
+
+class PIDMSSyncStatusResponse(BaseModel):
+    """Response schema for sync status endpoint."""
+    scheduler_enabled: bool = Field(..., description="Whether periodic background sync is enabled")
+    interval_minutes: int = Field(..., description="Minutes between scheduled syncs")
+    incremental: bool = Field(..., description="Whether scheduled syncs run in incremental mode")
+    running: bool = Field(..., description="True if a sync currently holds the sync lock")
+    last_run: Optional[PIDMSSyncRunResponse] = Field(None, description="Most recent run")
+    last_success: Optional[PIDMSSyncRunResponse] = Field(None, description="Most recent successful run among recent_runs")
+    recent_runs: List[PIDMSSyncRunResponse] = Field(..., description="Recent runs, newest first")
+
+
 class PIDMSSearchResponse(BaseModel):
     """Response schema for search endpoint with pagination."""
     total: int = Field(..., description="Total matching keys")
@@ -112,3 +167,42 @@ class PIDMSProductsResponse(BaseModel):
         ...,
         description="List of all product types with statistics"
     )
+
+
+class PIDMSProductForecast(BaseModel):
+    """Depletion forecast for a single product type."""
+    prd: str = Field(..., description="Product code")
+    key_count: int = Field(..., description="Keys with history for this product")
+    total_remaining: int = Field(..., description="Current sum of remaining activations")
+    burn_rate_per_day: float = Field(..., description="Activations consumed per day (regression over the window)")
+    days_to_depletion: Optional[float] = Field(None, description="Days until total_remaining reaches 0 (None = no consumption)")
+    depletion_date: Optional[date] = Field(None, description="Projected depletion date")
+    low_inventory: bool = Field(..., description="True if total_remaining < 5 or depletion within alert_days")
+
+
+class PIDMSForecastResponse(BaseModel):
+    """Response schema for depletion forecast endpoint."""
+    window_days: int = Field(..., description="History window used for the regression")
+    alert_days: int = Field(..., description="Depletion horizon that flags low_inventory")
+    generated_at: datetime = Field(..., description="Forecast timestamp")
+    products: List[PIDMSProductForecast] = Field(..., description="Products, soonest depletion first")
+
+
+class PIDMSReserveRequest(BaseModel):
+    """Request schema for reserving a key."""
+    product: str = Field(..., description="Exact product code (e.g., Office19ProPlusVL_MAK)", min_length=1)
+    note: Optional[str] = Field(None, description="Optional note, e.g., machine name or ticket number", max_length=500)
+
+
+class PIDMSReservationResponse(BaseModel):
+    """Response schema for a key reservation."""
+    reservation_id: int = Field(..., description="Reservation ID")
+    keyname: str = Field(..., description="Product key without dashes")
+    keyname_with_dash: str = Field(..., description="Product key with dashes for display")
+    prd: str = Field(..., description="Product code")
+    remaining: int = Field(..., description="Remaining activations from the last check")
+    reserved_count: int = Field(..., description="Local reservations since the last check (including this one)")
+    available: int = Field(..., description="remaining - reserved_count")
+    reserved_by: str = Field(..., description="User the key was handed to")
+    note: Optional[str] = Field(None, description="Reservation note")
+    reserved_at: datetime = Field(..., description="Reservation timestamp")
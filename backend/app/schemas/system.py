@@ -0,0 +1,23 @@
+"""
+System Pydantic Schemas
+
+Response schemas for operational endpoints.
+"""
+
+from pydantic import BaseModel, Field
+
+
+class DBPoolStatsResponse(BaseModel):
+    """Database connection pool configuration and usage of the answering worker."""
+    pool_size: int = Field(..., description="Persistent connections kept in the pool")
+    max_overflow: int = Field(..., description="Extra connections allowed above pool_size")
+    pool_timeout: float = Field(..., description="Seconds a request waits for a connection before failing")
+    pool_recycle: int = Field(..., description="Connection max age in seconds (-1 = never)")
+    pre_ping: bool = Field(..., description="Whether connections are checked on checkout")
+    pgbouncer_mode: bool = Field(..., description="Prepared statement caching disabled for PgBouncer")
+    checked_out: int = Field(..., description="Connections currently in use")
+    checked_in: int = Field(..., description="Idle connections in the pool")
+    overflow: int = Field(..., description="Overflow connections currently open")
+    connections_created: int = Field(..., description="Connections opened since startup")
+    checkouts: int = Field(..., description="Connection checkouts since startup")
+    invalidated: int = Field(..., description="Connections discarded as broken since startup")
@@ -4,19 +4,33 @@ API Key Service
 Business logic for managing API keys.
 """
 
+import asyncio
 import logging
 import secrets
 import hashlib
-from typing import List, Optional
-from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, update, bindparam
 from fastapi import HTTPException
 
+from app.core.cache import get_cache, publish_invalidation
+from app.core.config import settings
+from app.database.session import AsyncSessionLocal
 from app.models.api_key import ApiKey
 
 logger = logging.getLogger(__name__)
 
+# Verified keys by hash: {"key_id", "key_name", "is_active", "expires_at", "scopes", "scope_set"}
+API_KEY_CACHE = "api_keys"
+
+# Unknown hashes are cached too, so invalid keys don't hit the database either
+_UNKNOWN_KEY = False
+
+# key_id -> latest use not yet written to api_keys.last_used_at
+_pending_usage: Dict[str, datetime] = {}
+_flusher_task: Optional[asyncio.Task] = None
+
 
 def generate_api_key() -> tuple[str, str, str]:
     """
@@ -146,6 +160,119 @@ async def get_api_key(
     return result.scalar_one_or_none()
 
 
+def _api_key_cache():
+    return get_cache(API_KEY_CACHE, maxsize=4096, ttl=settings.API_KEY_CACHE_TTL_SECONDS)
+
+
+async def lookup_api_key(
+    db: AsyncSession,
+    key_hash: str
+) -> Optional[dict]:
+    """
+    Get the verification data for an API key hash, cached per worker.
+
+    Args:
+        db: Database session (only used on a cache miss)
+        key_hash: SHA256 hash of the presented key
+
+    Returns:
+        dict with key_id, key_name, is_active, expires_at, scopes (list)
+        and scope_set (frozenset), or None if the key does not exist
+    """
+    cache = _api_key_cache()
+    cached = cache.get(key_hash)
+    if cached is not None:
+        return cached or None
+
+    api_key = await get_api_key(db, key_hash)
+    if not api_key:
+        cache.set(key_hash, _UNKNOWN_KEY)
+        return None
+
+    scopes = [s.strip() for s in api_key.scopes.split(",") if s.strip()]
+    entry = {
+        "key_id": api_key.id,
+        "key_name": api_key.name,
+        "is_active": api_key.is_active,
+        "expires_at": api_key.expires_at,
+        "scopes": scopes,
+        "scope_set": frozenset(scopes),
+    }
+    cache.set(key_hash, entry)
+    return entry
+
+
+def record_api_key_use(key_id: str) -> None:
+    """Remember that a key was used; written by the periodic usage flush."""
+    _pending_usage[key_id] = datetime.now(timezone.utc)
+
+
+async def flush_api_key_usage() -> int:
+    """
+    Write pending last_used_at values in one batched UPDATE.
+
+    GREATEST keeps the newest timestamp when several workers flush the
+    same key.
+
+    Returns:
+        int: Number of keys written
+    """
+    if not _pending_usage:
+        return 0
+
+    pending = list(_pending_usage.items())
+    _pending_usage.clear()
+
+    table = ApiKey.__table__
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam("key_id"))
+        .values(last_used_at=func.greatest(table.c.last_used_at, bindparam("used_at", type_=table.c.last_used_at.type)))
+    )
+
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.execute(stmt, [{"key_id": key_id, "used_at": used_at} for key_id, used_at in pending])
+            await db.commit()
+    except Exception as e:
+        # Keep the timestamps for the next flush unless newer ones arrived meanwhile
+        for key_id, used_at in pending:
+            _pending_usage.setdefault(key_id, used_at)
+        logger.warning(f"API key usage flush failed ({len(pending)} keys): {e}")
+        return 0
+
+    return len(pending)
+
+
+async def _flush_forever() -> None:
+    while True:
+        await asyncio.sleep(settings.API_KEY_USAGE_FLUSH_SECONDS)
+        await flush_api_key_usage()
+
+
+def start_usage_flusher() -> None:
+    """Start the periodic last_used_at flush for this worker."""
+    global _flusher_task
+
+    if _flusher_task is None or _flusher_task.done():
+        _flusher_task = asyncio.create_task(_flush_forever())
+
+
+async def stop_usage_flusher() -> None:
+    """Stop the periodic flush and write whatever is still pending."""
+    global _flusher_task
+
+    if _flusher_task is not None:
+        _flusher_task.cancel()
+        try:
+            await _flusher_task
+        except asyncio.CancelledError:
+            pass
+        _flusher_task = None
+
+    await flush_api_key_usage()
+
+
 async def revoke_api_key(
     db: AsyncSession,
     key_id: str
@@ -172,6 +299,7 @@ async def revoke_api_key(
         )
 
     api_key.is_active = False
+    await publish_invalidation(db, API_KEY_CACHE, key_id)
     await db.commit()
 
     logger.info(f"API key revoked: {api_key.name} (prefix: {api_key.key_prefix})")
@@ -204,7 +332,9 @@ async def delete_api_key(
         )
 
     await db.delete(api_key)
+    await publish_invalidation(db, API_KEY_CACHE, key_id)
     await db.commit()
+    _pending_usage.pop(key_id, None)
 
     logger.info(f"API key deleted: {api_key.name} (prefix: {api_key.key_prefix})")
     return True
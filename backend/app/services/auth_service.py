@@ -1,10 +1,12 @@
 from app.integrations import GoogleAuthClient, GitHubAuthClient
 from app.schemas import LoginResponse, SocialLoginUser
-from app.core.jwt_handler import create_access_token, verify_token
+from app.core.jwt_handler import create_access_token, verify_token_cached
 from app.core.config import settings
+from app.core.cache import get_cache, notify_invalidation_clause
 from app.models import User
-from app.database.session import AsyncSessionLocal
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 from fastapi.responses import RedirectResponse
 from fastapi import HTTPException
@@ -13,42 +15,34 @@ from fastapi import HTTPException
 google_auth = GoogleAuthClient()
 github_auth = GitHubAuthClient()
 
+# /auth/me profiles by user id (str); invalidated on login and role/localId changes
+USER_PROFILE_CACHE = "user_profiles"
 
-async def get_or_create_user(social_id: str, provider: str, email: str, full_name: str, avatar: str) -> dict:
-    """Get existing user or create new one"""
+
+def _user_profile_cache():
+    return get_cache(USER_PROFILE_CACHE, maxsize=4096, ttl=settings.USER_PROFILE_CACHE_TTL_SECONDS)
+
+
+async def get_or_create_user(db: AsyncSession, social_id: str, provider: str, email: str, full_name: str, avatar: str) -> dict:
+    """
+    Get existing user or create new one
+
+    One INSERT ... ON CONFLICT (social_id) DO UPDATE SET last_login: existing
+    users get last_login updated, new users are created as guests, and
+    concurrent first logins cannot race on the unique social_id. The same
+    statement notifies other workers to drop the cached profile.
+    """
     try:
-        async with AsyncSessionLocal() as db:
-            # Đảm bảo email không null (đặc biệt cho github)
-            if not email:
-                email = f"{provider}_{social_id}@no-email.local"
-            
-            # Check if user exists by social_id
-            stmt = select(User).where(
-                (User.social_id == social_id) & (User.provider == provider)
-            )
-            result = await db.execute(stmt)
-            user = result.scalars().first()
-            
-            if user:
-                # Update last_login
-                user.last_login = datetime.utcnow()
-                await db.commit()
-                await db.refresh(user)
-                return {
-                    "id": user.id,
-                    "social_id": user.social_id,
-                    "provider": user.provider,
-                    "email": user.email,
-                    "full_name": user.full_name,
-                    "avatar": user.avatar,
-                    "role": user.role,
-                    "localId": user.localId,
-                    "is_active": user.is_active,
-                    "is_verified": user.is_verified,
-                }
-            
-            # Create new user
-            new_user = User(
+        # Đảm bảo email không null (đặc biệt cho github)
+        if not email:
+            email = f"{provider}_{social_id}@no-email.local"
+
+        # Timestamps are naive UTC like the rest of the users table
+        now = datetime.utcnow()
+        users = User.__table__
+        stmt = (
+            pg_insert(users)
+            .values(
                 social_id=social_id,
                 provider=provider,
                 email=email,
@@ -58,24 +52,44 @@ async def get_or_create_user(social_id: str, provider: str, email: str, full_nam
                 localId=None,
                 is_active=True,
                 is_verified=False,
+                created_at=now,
+                updated_at=now,
+            )
+            .on_conflict_do_update(
+                index_elements=[users.c.social_id],
+                set_={"last_login": now, "updated_at": now},
+                # social_id registered with another provider: no row comes back
+                where=(users.c.provider == provider)
             )
-            db.add(new_user)
-            await db.commit()
-            await db.refresh(new_user)
-            return {
-                "id": new_user.id,
-                "social_id": new_user.social_id,
-                "provider": new_user.provider,
-                "email": new_user.email,
-                "full_name": new_user.full_name,
-                "avatar": new_user.avatar,
-                "role": new_user.role,
-                "localId": new_user.localId,
-                "is_active": new_user.is_active,
-                "is_verified": new_user.is_verified,
-            }
+            .returning(
+                users.c.id, users.c.social_id, users.c.provider, users.c.email,
+                users.c.full_name, users.c.avatar, users.c.role, users.c.localId,
+                users.c.is_active, users.c.is_verified,
+                notify_invalidation_clause(USER_PROFILE_CACHE, users.c.id),
+            )
+        )
+        row = (await db.execute(stmt)).first()
+        await db.commit()
+
+        if row is None:
+            raise ValueError(f"social_id {social_id} is registered with another provider")
+
+        _user_profile_cache().invalidate(str(row.id))
+        return {
+            "id": row.id,
+            "social_id": row.social_id,
+            "provider": row.provider,
+            "email": row.email,
+            "full_name": row.full_name,
+            "avatar": row.avatar,
+            "role": row.role,
+            "localId": row.localId,
+            "is_active": row.is_active,
+            "is_verified": row.is_verified,
+        }
     except Exception as e:
         # Fallback nếu database không available - tạo user object tạm thời
+        await db.rollback()
         print(f"Database error: {e}. Using fallback user creation.")
         return {
             "id": 0,  # Temporary ID
@@ -100,7 +114,7 @@ async def get_github_auth_url(request):
     return await github_auth.get_authorization_url(request)
 
 
-async def handle_google_callback(request) -> RedirectResponse:
+async def handle_google_callback(request, db: AsyncSession) -> RedirectResponse:
     userinfo = await google_auth.get_user_info(request)
 
     social_id = userinfo.get("sub")
@@ -110,6 +124,7 @@ async def handle_google_callback(request) -> RedirectResponse:
 
     # Get or create user in database
     user_data = await get_or_create_user(
+        db,
         social_id=social_id,
         provider="google",
         email=email,
@@ -153,7 +168,7 @@ async def handle_google_callback(request) -> RedirectResponse:
     return response
 
 
-async def handle_github_callback(request) -> RedirectResponse:
+async def handle_github_callback(request, db: AsyncSession) -> RedirectResponse:
     userinfo = await github_auth.get_user_info(request)
 
     social_id = str(userinfo.get("id"))
@@ -163,6 +178,7 @@ async def handle_github_callback(request) -> RedirectResponse:
 
     # Get or create user in database
     user_data = await get_or_create_user(
+        db,
         social_id=social_id,
         provider="github",
         email=email,
@@ -206,12 +222,13 @@ async def handle_github_callback(request) -> RedirectResponse:
     return response
 
 
-async def get_current_user(access_token: str) -> SocialLoginUser:
+async def get_current_user(access_token: str, db: AsyncSession) -> SocialLoginUser:
     """
     Get current user information from access token
 
     Args:
         access_token: JWT access token from HttpOnly cookie
+        db: Request-scoped database session
 
     Returns:
         SocialLoginUser: User information
@@ -220,37 +237,43 @@ async def get_current_user(access_token: str) -> SocialLoginUser:
         HTTPException: If token is invalid or user not found
     """
     # Verify token
-    payload = verify_token(access_token, required_scope="access")
+    payload = verify_token_cached(access_token, required_scope="access")
 
     if not payload:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
 
-    user_id = payload.get("user_id")
+    user_id = str(payload.get("user_id"))
+
+    cache = _user_profile_cache()
+    profile = cache.get(user_id)
+    if profile is not None:
+        return SocialLoginUser(**profile)
 
     try:
-        async with AsyncSessionLocal() as db:
-            # Get user from database
-            stmt = select(User).where(User.id == int(user_id))
-            result = await db.execute(stmt)
-            user = result.scalars().first()
-
-            if not user:
-                raise HTTPException(status_code=404, detail="User not found")
-
-            # Return user info
-            return SocialLoginUser(
-                id=user.id,
-                social_id=user.social_id,
-                provider=user.provider,
-                email=user.email,
-                full_name=user.full_name,
-                avatar=user.avatar,
-                role=user.role,
-                localId=user.localId,
-                is_active=user.is_active,
-                is_verified=user.is_verified,
-                is_new_user=False,
-            )
+        # Get user from database
+        stmt = select(User).where(User.id == int(user_id))
+        result = await db.execute(stmt)
+        user = result.scalars().first()
+
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        # Return user info
+        profile = {
+            "id": user.id,
+            "social_id": user.social_id,
+            "provider": user.provider,
+            "email": user.email,
+            "full_name": user.full_name,
+            "avatar": user.avatar,
+            "role": user.role,
+            "localId": user.localId,
+            "is_active": user.is_active,
+            "is_verified": user.is_verified,
+            "is_new_user": False,
+        }
+        cache.set(user_id, profile)
+        return SocialLoginUser(**profile)
     except HTTPException:
         raise
     except Exception as e:
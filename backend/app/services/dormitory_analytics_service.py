@@ -0,0 +1,285 @@
+"""
+Dormitory Analytics Service
+
+Business logic for dormitory usage analytics backed by the precomputed
+dormitory_term_rollups table:
+1. Incremental rollup refresh for the terms touched by an import
+2. Per-term breakdown by dorm or factory with term-over-term comparison
+3. Multi-term trend of totals
+"""
+
+import logging
+from typing import List, Dict, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from fastapi import HTTPException
+
+from app.models.dormitory_bill import DormitoryBill
+from app.models.dormitory_term_rollup import DormitoryTermRollup
+
+logger = logging.getLogger(__name__)
+
+
+# Summed usage / amount columns (same names on bills and rollups)
+ROLLUP_SUM_COLUMNS = [
+    "elec_usage", "water_usage",
+    "elec_amount", "water_amount",
+    "shared_fee", "management_fee", "total_amount",
+]
+
+GROUP_BY_OPTIONS = ("dorm", "factory")
+
+# Advisory lock class of the per-term rollup refresh ("DRUP"; second key = hashtext(term_code))
+ROLLUP_LOCK_CLASS = 0x44525550
+
+
+async def refresh_term_rollups(db: AsyncSession, term_codes: Optional[List[str]] = None) -> int:
+    """
+    Rebuild rollup rows for the given terms from dormitory_bills.
+
+    Only the listed terms are re-aggregated, so the cost is proportional to
+    the imported terms, not the whole bills table. Rows are upserted and
+    dorms that no longer have bills in the term are removed; concurrent
+    refreshes of the same term take turns on a per-term transaction
+    advisory lock. Does not commit - callers run it inside their own
+    transaction.
+
+    Args:
+        db: Database session
+        term_codes: Terms to rebuild (None = all terms that have bills;
+            rollups of detached terms are kept)
+
+    Returns:
+        Number of rollup rows written
+    """
+    if term_codes is None:
+        result = await db.execute(select(DormitoryBill.term_code).distinct())
+        term_codes = result.scalars().all()
+    if not term_codes:
+        return 0
+    term_codes = sorted(set(term_codes))
+
+    # Locked in sorted order so overlapping imports cannot deadlock
+    await db.execute(
+        text(
+            "SELECT pg_advisory_xact_lock(:lock_class, hashtext(term_code)) "
+            "FROM unnest(CAST(:term_codes AS text[])) AS term_code"
+        ),
+        {"lock_class": ROLLUP_LOCK_CLASS, "term_codes": term_codes}
+    )
+
+    source = select(
+        DormitoryBill.term_code,
+        DormitoryBill.dorm_code,
+        func.max(DormitoryBill.factory_location),
+        func.count(),
+        *[func.coalesce(func.sum(getattr(DormitoryBill, col)), 0) for col in ROLLUP_SUM_COLUMNS]
+    ).where(DormitoryBill.term_code.in_(term_codes)).group_by(DormitoryBill.term_code, DormitoryBill.dorm_code)
+
+    # Dorms whose last bill of the term is gone
+    await db.execute(
+        delete(DormitoryTermRollup).where(
+            DormitoryTermRollup.term_code.in_(term_codes),
+            ~select(DormitoryBill.bill_id)
+            .where(
+                DormitoryBill.term_code == DormitoryTermRollup.term_code,
+                DormitoryBill.dorm_code == DormitoryTermRollup.dorm_code
+            )
+            .exists()
+        )
+    )
+
+    upsert_stmt = pg_insert(DormitoryTermRollup).from_select(
+        ["term_code", "dorm_code", "factory_location", "occupant_count", *ROLLUP_SUM_COLUMNS],
+        source
+    )
+    upsert_stmt = upsert_stmt.on_conflict_do_update(
+        constraint="pk_dormitory_term_rollups",
+        set_={
+            **{
+                col: upsert_stmt.excluded[col]
+                for col in ["factory_location", "occupant_count", *ROLLUP_SUM_COLUMNS]
+            },
+            "refreshed_at": func.now(),
+        }
+    )
+    result = await db.execute(upsert_stmt)
+
+    logger.info(f"Refreshed {result.rowcount} rollup rows for terms: {term_codes}")
+    return result.rowcount
+
+
+def _with_per_occupant(totals: Dict) -> Dict:
+    """Add per-occupant averages to a totals dict."""
+    occupants = totals["occupant_count"]
+    totals["cost_per_occupant"] = round(totals["total_amount"] / occupants, 2) if occupants else 0.0
+    totals["elec_usage_per_occupant"] = round(totals["elec_usage"] / occupants, 2) if occupants else 0.0
+    totals["water_usage_per_occupant"] = round(totals["water_usage"] / occupants, 2) if occupants else 0.0
+    return totals
+
+
+def _sum_rows(rows: List[Dict]) -> Dict:
+    """Sum rollup rows into one totals dict."""
+    totals = {"occupant_count": sum(row["occupant_count"] for row in rows)}
+    for col in ROLLUP_SUM_COLUMNS:
+        totals[col] = round(sum(row[col] for row in rows), 2)
+    return _with_per_occupant(totals)
+
+
+def _pct_change(current: float, previous: Optional[float]) -> Optional[float]:
+    """Percentage change, None if there is no usable previous value."""
+    if not previous:
+        return None
+    return round((current - previous) / previous * 100, 2)
+
+
+async def _fetch_term_rows(db: AsyncSession, term_code: str) -> List[Dict]:
+    """Fetch all dorm rollup rows of one term as plain dicts (floats)."""
+    stmt = select(DormitoryTermRollup).where(DormitoryTermRollup.term_code == term_code)
+    result = await db.execute(stmt)
+
+    rows = []
+    for rollup in result.scalars().all():
+        row = {
+            "dorm_code": rollup.dorm_code,
+            "factory_location": rollup.factory_location,
+            "occupant_count": rollup.occupant_count,
+        }
+        for col in ROLLUP_SUM_COLUMNS:
+            row[col] = float(getattr(rollup, col) or 0)
+        rows.append(row)
+    return rows
+
+
+def _group_rows(rows: List[Dict], group_by: str) -> Dict[str, Dict]:
+    """Group dorm rows by dorm_code or factory_location into totals dicts."""
+    buckets: Dict[str, List[Dict]] = {}
+    for row in rows:
+        key = row["dorm_code"] if group_by == "dorm" else (row["factory_location"] or "UNKNOWN")
+        buckets.setdefault(key, []).append(row)
+
+    groups = {}
+    for key, bucket in buckets.items():
+        totals = _sum_rows(bucket)
+        totals["key"] = key
+        totals["factory_location"] = bucket[0]["factory_location"]
+        groups[key] = totals
+    return groups
+
+
+async def get_term_analytics(
+    db: AsyncSession,
+    term_code: str,
+    group_by: str = "dorm",
+    top_n: int = 10,
+    rank_by: str = "total_amount"
+) -> dict:
+    """
+    Get usage analytics for one term with comparison to the previous term.
+
+    Args:
+        db: Database session
+        term_code: Billing term (e.g., '25A')
+        group_by: 'dorm' or 'factory'
+        top_n: Number of top consuming dorms to return
+        rank_by: Column used to rank top consumers (e.g., 'elec_usage')
+
+    Returns:
+        dict matching TermAnalyticsResponse schema
+
+    Raises:
+        HTTPException(422): Invalid group_by / rank_by
+        HTTPException(404): No rollups for the term
+    """
+    if group_by not in GROUP_BY_OPTIONS:
+        raise HTTPException(status_code=422, detail=f"group_by must be one of: {', '.join(GROUP_BY_OPTIONS)}")
+    if rank_by not in ROLLUP_SUM_COLUMNS:
+        raise HTTPException(status_code=422, detail=f"rank_by must be one of: {', '.join(ROLLUP_SUM_COLUMNS)}")
+
+    logger.info(f"Term analytics: term_code={term_code}, group_by={group_by}, top_n={top_n}, rank_by={rank_by}")
+
+    current_rows = await _fetch_term_rows(db, term_code)
+    if not current_rows:
+        raise HTTPException(status_code=404, detail=f"No billing data for term {term_code}")
+
+    # Previous term = closest lower term_code that has rollups
+    stmt = select(func.max(DormitoryTermRollup.term_code)).where(DormitoryTermRollup.term_code < term_code)
+    previous_term_code = (await db.execute(stmt)).scalar()
+    previous_rows = await _fetch_term_rows(db, previous_term_code) if previous_term_code else []
+
+    current_groups = _group_rows(current_rows, group_by)
+    previous_groups = _group_rows(previous_rows, group_by)
+
+    groups = []
+    for key, group in current_groups.items():
+        previous = previous_groups.get(key)
+        group["previous_total_amount"] = previous["total_amount"] if previous else None
+        group["total_amount_change"] = round(group["total_amount"] - previous["total_amount"], 2) if previous else None
+        group["total_amount_change_pct"] = _pct_change(group["total_amount"], previous["total_amount"] if previous else None)
+        group["elec_usage_change_pct"] = _pct_change(group["elec_usage"], previous["elec_usage"] if previous else None)
+        group["water_usage_change_pct"] = _pct_change(group["water_usage"], previous["water_usage"] if previous else None)
+        groups.append(group)
+
+    groups.sort(key=lambda g: g["key"])
+
+    # Top consumers are always ranked at dorm level
+    dorm_groups = current_groups if group_by == "dorm" else _group_rows(current_rows, "dorm")
+    top_consumers = sorted(dorm_groups.values(), key=lambda g: g[rank_by], reverse=True)[:top_n]
+
+    return {
+        "term_code": term_code,
+        "previous_term_code": previous_term_code,
+        "group_by": group_by,
+        "totals": _sum_rows(current_rows),
+        "previous_totals": _sum_rows(previous_rows) if previous_rows else None,
+        "groups": groups,
+        "top_consumers": top_consumers,
+    }
+
+
+async def get_term_trend(
+    db: AsyncSession,
+    limit: int = 12,
+    factory_location: Optional[str] = None
+) -> dict:
+    """
+    Get totals for the most recent terms with term-over-term change.
+
+    Args:
+        db: Database session
+        limit: Number of most recent terms to return
+        factory_location: Optional exact filter on factory
+
+    Returns:
+        {"terms": [...]} ordered by term_code ascending
+    """
+    stmt = select(
+        DormitoryTermRollup.term_code,
+        func.count().label("dorm_count"),
+        func.sum(DormitoryTermRollup.occupant_count).label("occupant_count"),
+        *[func.sum(getattr(DormitoryTermRollup, col)).label(col) for col in ROLLUP_SUM_COLUMNS]
+    ).group_by(DormitoryTermRollup.term_code)
+
+    if factory_location:
+        stmt = stmt.where(DormitoryTermRollup.factory_location == factory_location)
+
+    stmt = stmt.order_by(DormitoryTermRollup.term_code.desc()).limit(limit)
+    rows = (await db.execute(stmt)).all()
+
+    terms = []
+    previous = None
+    for row in reversed(rows):
+        point = {"occupant_count": int(row.occupant_count or 0)}
+        for col in ROLLUP_SUM_COLUMNS:
+            point[col] = float(getattr(row, col) or 0)
+        point = _with_per_occupant(point)
+        point["term_code"] = row.term_code
+        point["dorm_count"] = row.dorm_count
+        point["total_amount_change_pct"] = _pct_change(point["total_amount"], previous["total_amount"] if previous else None)
+        terms.append(point)
+        previous = point
+
+    logger.info(f"Term trend: {len(terms)} terms (factory: {factory_location or 'all'})")
+
+    return {"terms": terms}
@@ -0,0 +1,238 @@
+"""
+Dormitory Anomaly Service
+
+Batch meter-reading analysis over all dormitory bills:
+1. Continuity - a term's last index must equal the previous term's current index
+   (higher = gap, lower = reset)
+2. Usage spikes - per-dorm z-score of a term's usage against the dorm's
+   other terms (leave-one-out mean and standard deviation)
+
+The whole history is analysed in one INSERT ... SELECT using window
+functions (LAG / COUNT / SUM over term_code per dorm).
+"""
+
+import logging
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, insert, func, literal, union_all
+from fastapi import HTTPException
+
+from app.models.dormitory_bill import DormitoryBill
+from app.models.dormitory_bill_anomaly import DormitoryBillAnomaly
+
+logger = logging.getLogger(__name__)
+
+
+METERS = ("elec", "water")
+ANOMALY_TYPES = ("gap", "reset", "spike")
+
+ANOMALY_COLUMNS = [
+    "dorm_code", "term_code", "previous_term_code", "meter", "anomaly_type",
+    "expected_value", "actual_value", "deviation",
+]
+
+
+def _build_anomaly_select(z_threshold: float, min_terms: int):
+    """
+    Build one SELECT returning all anomalies for all dorms and terms.
+
+    Dorm-level readings per term are taken as MIN(last_index) / MAX(curr_index)
+    across the dorm's occupants, since occupants share the same meters.
+    """
+    # Step 1: One meter reading per dorm per term
+    readings = select(
+        DormitoryBill.dorm_code,
+        DormitoryBill.term_code,
+        *[
+            column
+            for meter in METERS
+            for column in (
+                func.min(getattr(DormitoryBill, f"{meter}_last_index")).label(f"{meter}_last"),
+                func.max(getattr(DormitoryBill, f"{meter}_curr_index")).label(f"{meter}_curr"),
+            )
+        ]
+    ).group_by(DormitoryBill.dorm_code, DormitoryBill.term_code).cte("readings")
+
+    # Step 2: Previous term reading and per-dorm usage baseline
+    by_dorm = {"partition_by": readings.c.dorm_code}
+    by_dorm_ordered = {"partition_by": readings.c.dorm_code, "order_by": readings.c.term_code}
+
+    windowed_columns = [
+        readings.c.dorm_code,
+        readings.c.term_code,
+        func.lag(readings.c.term_code).over(**by_dorm_ordered).label("previous_term_code"),
+        func.count().over(**by_dorm).label("term_count"),
+    ]
+    for meter in METERS:
+        last = readings.c[f"{meter}_last"]
+        curr = readings.c[f"{meter}_curr"]
+        usage = curr - last
+        # Leave-one-out baseline: mean / sample stddev of the dorm's *other* terms,
+        # so a spike does not inflate its own baseline (which would cap |z|)
+        others = func.count(usage).over(**by_dorm) - 1
+        usage_avg = (func.sum(usage).over(**by_dorm) - usage) / func.nullif(others, 0)
+        usage_var = (
+            func.sum(usage * usage).over(**by_dorm) - usage * usage - others * usage_avg * usage_avg
+        ) / func.nullif(others - 1, 0)
+        windowed_columns += [
+            last.label(f"{meter}_last"),
+            func.lag(curr).over(**by_dorm_ordered).label(f"{meter}_previous_curr"),
+            usage.label(f"{meter}_usage"),
+            usage_avg.label(f"{meter}_usage_avg"),
+            func.sqrt(func.greatest(usage_var, 0)).label(f"{meter}_usage_std"),
+        ]
+    windowed = select(*windowed_columns).cte("windowed")
+    w = windowed.c
+
+    # Step 3: One branch per (meter, anomaly type)
+    branches = []
+    for meter in METERS:
+        last = w[f"{meter}_last"]
+        previous_curr = w[f"{meter}_previous_curr"]
+        usage = w[f"{meter}_usage"]
+        usage_avg = w[f"{meter}_usage_avg"]
+        usage_std = w[f"{meter}_usage_std"]
+
+        continuity = [
+            ("gap", last > previous_curr),
+            ("reset", last < previous_curr),
+        ]
+        for anomaly_type, condition in continuity:
+            branches.append(
+                select(
+                    w.dorm_code, w.term_code, w.previous_term_code,
+                    literal(meter), literal(anomaly_type),
+                    previous_curr, last, last - previous_curr,
+                ).where(previous_curr.is_not(None), condition)
+            )
+
+        z_score = (usage - usage_avg) / func.nullif(usage_std, 0)
+        branches.append(
+            select(
+                w.dorm_code, w.term_code, w.previous_term_code,
+                literal(meter), literal("spike"),
+                usage_avg, usage, z_score,
+            ).where(w.term_count >= min_terms, z_score > z_threshold)
+        )
+
+    return union_all(*branches)
+
+
+async def scan_anomalies(
+    db: AsyncSession,
+    z_threshold: float = 3.0,
+    min_terms: int = 4
+) -> dict:
+    """
+    Re-run anomaly detection over all historical bills.
+
+    Previous results are replaced in the same transaction.
+
+    Args:
+        db: Database session
+        z_threshold: Usage z-score above which a term is a spike
+        min_terms: Minimum number of terms a dorm needs for spike detection
+
+    Returns:
+        {"success": True, "summary": {"total": int, "gap": int, "reset": int, "spike": int}}
+
+    Raises:
+        HTTPException(500): Analysis failed
+    """
+    logger.info(f"Starting anomaly scan: z_threshold={z_threshold}, min_terms={min_terms}")
+
+    try:
+        await db.execute(delete(DormitoryBillAnomaly))
+
+        insert_stmt = insert(DormitoryBillAnomaly).from_select(
+            ANOMALY_COLUMNS,
+            _build_anomaly_select(z_threshold, min_terms)
+        )
+        await db.execute(insert_stmt)
+
+        stmt = select(
+            DormitoryBillAnomaly.anomaly_type,
+            func.count()
+        ).group_by(DormitoryBillAnomaly.anomaly_type)
+        counts = dict((await db.execute(stmt)).all())
+
+        await db.commit()
+
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Anomaly scan failed: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Anomaly scan failed: {str(e)}")
+
+    summary = {anomaly_type: counts.get(anomaly_type, 0) for anomaly_type in ANOMALY_TYPES}
+    summary["total"] = sum(summary.values())
+
+    logger.info(f"Anomaly scan complete: {summary}")
+
+    return {"success": True, "summary": summary}
+
+
+async def search_anomalies(
+    db: AsyncSession,
+    term_code: Optional[str] = None,
+    dorm_code: Optional[str] = None,
+    meter: Optional[str] = None,
+    anomaly_type: Optional[str] = None,
+    page: int = 1,
+    page_size: int = 50
+) -> dict:
+    """
+    Search stored anomalies with filters and pagination.
+
+    Args:
+        db: Database session
+        term_code: Exact match filter (e.g., '25A')
+        dorm_code: Exact match filter (e.g., 'A01')
+        meter: 'elec' or 'water'
+        anomaly_type: 'gap', 'reset' or 'spike'
+        page: Page number (1-indexed)
+        page_size: Items per page (1-100)
+
+    Returns:
+        {"total": int, "page": int, "page_size": int, "results": [...]}
+
+    Raises:
+        HTTPException(422): Invalid filter or pagination parameters
+    """
+    if page < 1:
+        raise HTTPException(status_code=422, detail="Page number must be >= 1")
+    if page_size < 1 or page_size > 100:
+        raise HTTPException(status_code=422, detail="Page size must be between 1 and 100")
+    if meter and meter not in METERS:
+        raise HTTPException(status_code=422, detail=f"meter must be one of: {', '.join(METERS)}")
+    if anomaly_type and anomaly_type not in ANOMALY_TYPES:
+        raise HTTPException(status_code=422, detail=f"anomaly_type must be one of: {', '.join(ANOMALY_TYPES)}")
+
+    query = select(DormitoryBillAnomaly)
+
+    if term_code:
+        query = query.where(DormitoryBillAnomaly.term_code == term_code)
+    if dorm_code:
+        query = query.where(DormitoryBillAnomaly.dorm_code == dorm_code)
+    if meter:
+        query = query.where(DormitoryBillAnomaly.meter == meter)
+    if anomaly_type:
+        query = query.where(DormitoryBillAnomaly.anomaly_type == anomaly_type)
+
+    count_query = select(func.count()).select_from(query.subquery())
+    total = (await db.execute(count_query)).scalar()
+
+    query = query.order_by(DormitoryBillAnomaly.term_code.desc(), DormitoryBillAnomaly.dorm_code)
+    offset = (page - 1) * page_size
+    query = query.offset(offset).limit(page_size)
+
+    result = await db.execute(query)
+    anomalies = result.scalars().all()
+
+    logger.info(f"Anomaly search: {total} total, returning {len(anomalies)} results")
+
+    return {
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "results": anomalies
+    }
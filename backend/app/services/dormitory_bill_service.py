@@ -4,22 +4,50 @@ Dormitory Bill Service
 Business logic for dormitory billing operations including bulk import and search.
 """
 
+import hashlib
 import logging
-from typing import List, Dict, Optional
+import re
+from datetime import datetime, timezone
+from typing import List, Dict, Optional, Tuple
+import pandas as pd
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_, func
+from sqlalchemy import select, func, literal_column, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from fastapi import HTTPException
 
 from app.models.dormitory_bill import DormitoryBill
 from app.models.employee import Employee
+from app.services import dormitory_analytics_service
+from app.utils.columnar_utils import read_columnar_frame, frame_to_records
 
 logger = logging.getLogger(__name__)
 
 
+# Bill columns accepted from import payloads (JSON keys / columnar file columns)
+BILL_KEY_COLUMNS = ["employee_id", "term_code", "dorm_code"]
+BILL_TEXT_COLUMNS = BILL_KEY_COLUMNS + ["factory_location"]
+BILL_NUMERIC_COLUMNS = [
+    "elec_last_index", "elec_curr_index", "elec_usage", "elec_amount",
+    "water_last_index", "water_curr_index", "water_usage", "water_amount",
+    "shared_fee", "management_fee", "total_amount",
+]
+BILL_COLUMNS = BILL_TEXT_COLUMNS + BILL_NUMERIC_COLUMNS
+
+# 15 bind parameters per row -> stays well below the asyncpg 32767 parameter limit
+UPSERT_CHUNK_SIZE = 1000
+
+# Transaction advisory lock serializing partition creation ("DBPT")
+PARTITION_LOCK_KEY = 0x44425054
+
+
 async def import_bills(db: AsyncSession, bills: List[Dict]) -> dict:
     """
     Import dormitory bills with bulk upsert logic.
 
+    All rows are pre-validated against the table's check constraints and the
+    (employee_id, term_code) key before any SQL runs, so a bad row is
+    reported in error_details instead of failing the whole commit.
+
     Args:
         db: Database session
         bills: List of bill dictionaries from JSON
@@ -32,137 +60,218 @@ async def import_bills(db: AsyncSession, bills: List[Dict]) -> dict:
         }
     """
     total_records = len(bills)
+    logger.info(f"Starting import of {total_records} bills")
+
+    # Step 1: Vectorised validation of all bills (no database work yet)
+    frame = pd.DataFrame.from_records(bills, columns=BILL_COLUMNS)
+    valid, error_details, skipped_count = validate_bill_frame(frame)
+
+    # Step 2: Employee check, bulk upsert and dorm_id sync for the valid rows
+    provided_columns = {key for bill in bills for key in bill}
+    return await _import_bill_frame(
+        db, valid, total_records, skipped_count, error_details,
+        update_columns=[col for col in BILL_COLUMNS if col in provided_columns]
+    )
+
+
+def validate_bill_frame(frame: pd.DataFrame) -> Tuple[pd.DataFrame, List[Dict], int]:
+    """
+    Validate a frame of bills with vectorised column checks.
+
+    Rows without employee_id are skipped silently.
+    Other invalid rows are reported in error_details and excluded.
+
+    Checks (mirror the dormitory_bills constraints):
+    - Required keys: term_code, dorm_code
+    - Numeric columns parse as numbers and are non-negative (chk_amounts)
+    - elec_curr_index >= elec_last_index (chk_elec_index)
+    - water_curr_index >= water_last_index (chk_water_index)
+    - (employee_id, term_code) unique within the payload (uq_bill_entry),
+      the last occurrence wins and earlier ones are reported
+
+    Args:
+        frame: DataFrame with bill columns, index = 0-based row position
+
+    Returns:
+        (valid_frame, error_details, skipped_count)
+
+    Raises:
+        HTTPException(400): Required columns missing from the file
+    """
+    missing_columns = [col for col in BILL_KEY_COLUMNS if col not in frame.columns]
+    if missing_columns:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Missing required columns: {', '.join(missing_columns)}"
+        )
+
+    # Keep only known columns, missing optional ones become NaN (defaults to 0 below)
+    frame = frame.reindex(columns=BILL_COLUMNS)
+
+    # Normalise text columns, empty strings count as missing
+    for col in BILL_TEXT_COLUMNS:
+        text = frame[col].astype("string").str.strip()
+        frame[col] = text.mask(text == "")
+
+    # Skip bills without employee_id (silently ignore)
+    no_employee = frame["employee_id"].isna()
+    skipped_count = int(no_employee.sum())
+    frame = frame[~no_employee]
+
+    # Coerce numeric columns, remembering values that could not be parsed
+    raw_numeric = frame[BILL_NUMERIC_COLUMNS]
+    numeric = raw_numeric.apply(pd.to_numeric, errors="coerce")
+    not_a_number = numeric.isna() & raw_numeric.notna()
+    numeric = numeric.fillna(0).astype(float)
+
+    # One boolean column per rule, message as column name
+    violations = {
+        "Missing required fields: term_code or dorm_code":
+            frame["term_code"].isna() | frame["dorm_code"].isna(),
+        "elec_curr_index must be >= elec_last_index":
+            numeric["elec_curr_index"] < numeric["elec_last_index"],
+        "water_curr_index must be >= water_last_index":
+            numeric["water_curr_index"] < numeric["water_last_index"],
+    }
+    for col in BILL_NUMERIC_COLUMNS:
+        violations[f"{col} is not a number"] = not_a_number[col]
+        violations[f"{col} must be >= 0"] = numeric[col] < 0
+    violations = pd.DataFrame(violations, index=frame.index)
+
+    # Composite key duplicates among otherwise valid rows (last occurrence wins)
+    passing = ~violations.any(axis=1)
+    duplicated = pd.Series(False, index=frame.index)
+    duplicated[passing] = frame.loc[passing].duplicated(subset=["employee_id", "term_code"], keep="last")
+    violations["Duplicate (employee_id, term_code) in payload, superseded by a later row"] = duplicated
+
+    failed = violations.any(axis=1)
+    error_details = [
+        {"row": int(idx) + 1, "error": "; ".join(row.index[row.to_numpy()])}
+        for idx, row in violations[failed].iterrows()
+    ]
+
+    valid = frame[~failed].copy()
+    valid[BILL_NUMERIC_COLUMNS] = numeric[~failed]
+
+    logger.info(f"Validated {len(valid)} bills, {skipped_count} skipped (no employee_id), {len(error_details)} errors")
+
+    return valid, error_details, skipped_count
+
+
+async def _upsert_bill_records(
+    db: AsyncSession,
+    records: List[Dict],
+    update_columns: Optional[List[str]] = None
+) -> Tuple[int, int]:
+    """
+    Upsert bill rows with INSERT ... ON CONFLICT (employee_id, term_code) DO UPDATE.
+
+    Records must be unique on (employee_id, term_code). New rows get every
+    column (missing optional ones already default to 0); existing rows only
+    get `update_columns`, so columns absent from the upload keep their
+    stored values instead of being overwritten with those defaults.
+
+    Args:
+        db: Database session
+        records: Validated bill rows
+        update_columns: Columns the upload provided (None = all bill columns)
+
+    Returns:
+        (created_count, updated_count)
+    """
+    update_columns = BILL_COLUMNS if update_columns is None else update_columns
     created_count = 0
     updated_count = 0
-    error_count = 0
-    error_details = []
 
-    logger.info(f"Starting import of {total_records} bills")
+    for start in range(0, len(records), UPSERT_CHUNK_SIZE):
+        chunk = records[start:start + UPSERT_CHUNK_SIZE]
 
-    try:
-        # Step 1: Parse and validate all bills
-        valid_bills = []
-        skipped_count = 0
-        for idx, bill_data in enumerate(bills, start=1):
-            try:
-                # Skip bills without employee_id (silently ignore)
-                if not bill_data.get("employee_id"):
-                    skipped_count += 1
-                    logger.debug(f"Row {idx}: Skipping bill without employee_id")
-                    continue
-
-                # Validate other required fields
-                if not bill_data.get("term_code") or not bill_data.get("dorm_code"):
-                    error_count += 1
-                    error_details.append({
-                        "row": idx,
-                        "error": "Missing required fields: term_code or dorm_code"
-                    })
-                    continue
-
-                valid_bills.append((idx, bill_data))
-
-            except Exception as e:
-                error_count += 1
-                error_details.append({"row": idx, "error": str(e)})
-                logger.warning(f"Row {idx} validation error: {e}")
-
-        logger.info(f"Validated {len(valid_bills)} bills, {skipped_count} skipped (no employee_id), {error_count} errors")
-
-        if not valid_bills:
-            return {
-                "success": False,
-                "summary": {"total_records": total_records, "created": 0, "updated": 0, "errors": error_count},
-                "error_details": error_details
-            }
+        stmt = pg_insert(DormitoryBill).values(chunk)
+        set_columns = {
+            col: stmt.excluded[col]
+            for col in update_columns
+            if col not in ("employee_id", "term_code")
+        }
+        set_columns["updated_at"] = func.now()
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_bill_entry",
+            set_=set_columns
+        ).returning(literal_column("xmax = 0").label("inserted"))
+
+        result = await db.execute(stmt)
+        inserted_flags = result.scalars().all()
+        chunk_created = sum(1 for inserted in inserted_flags if inserted)
+        created_count += chunk_created
+        updated_count += len(inserted_flags) - chunk_created
+
+    return created_count, updated_count
+
+
+async def _import_bill_frame(
+    db: AsyncSession,
+    frame: pd.DataFrame,
+    total_records: int,
+    skipped_count: int,
+    error_details: List[Dict],
+    update_columns: Optional[List[str]] = None
+) -> dict:
+    """
+    Persist a validated frame of bills (employee check, upsert, dorm_id sync, rollups).
+
+    Args:
+        db: Database session
+        frame: Validated bills from validate_bill_frame
+        total_records: Number of rows in the original payload
+        skipped_count: Rows already skipped during validation
+        error_details: Errors already collected during validation
+        update_columns: Columns present in the upload, overwritten on
+            existing bills (None = all bill columns)
 
-        # Step 2: Validate all employee_id values exist (bulk query)
-        employee_ids = list(set(bill_data["employee_id"] for _, bill_data in valid_bills))
+    Returns:
+        Import summary dict (same shape as import_bills)
+    """
+    error_count = len(error_details)
+
+    if frame.empty:
+        return {
+            "success": False,
+            "summary": {"total_records": total_records, "created": 0, "updated": 0, "errors": error_count},
+            "error_details": error_details
+        }
+
+    try:
+        # Step 1: Validate all employee_id values exist (bulk query)
+        employee_ids = frame["employee_id"].unique().tolist()
         stmt = select(Employee.id).where(Employee.id.in_(employee_ids))
         result = await db.execute(stmt)
         existing_employee_ids = set(row[0] for row in result.fetchall())
 
         # Filter out bills with invalid employee_id (silently skip)
-        validated_bills = []
-        for idx, bill_data in valid_bills:
-            if bill_data["employee_id"] not in existing_employee_ids:
-                skipped_count += 1
-                logger.debug(f"Row {idx}: Skipping bill - employee '{bill_data['employee_id']}' does not exist")
-            else:
-                validated_bills.append((idx, bill_data))
+        known_employee = frame["employee_id"].isin(existing_employee_ids)
+        skipped_count += int((~known_employee).sum())
+        frame = frame[known_employee]
 
-        logger.info(f"Employee validation: {len(validated_bills)} valid, {skipped_count} total skipped")
+        logger.info(f"Employee validation: {len(frame)} valid, {skipped_count} total skipped")
 
-        if not validated_bills:
+        if frame.empty:
             return {
                 "success": False,
                 "summary": {"total_records": total_records, "created": 0, "updated": 0, "errors": error_count},
                 "error_details": error_details
             }
 
-        # Step 3: Fetch all existing bills in ONE query
-        # Now using (employee_id, term_code) as composite key
-        composite_keys = [(bill_data["employee_id"], bill_data["term_code"])
-                          for _, bill_data in validated_bills]
+        # Step 2: Make sure every imported term has its partition, then bulk upsert
+        await ensure_term_partitions(db, frame["term_code"].unique().tolist())
+        created_count, updated_count = await _upsert_bill_records(db, frame_to_records(frame), update_columns)
+        logger.info(f"Upserted {created_count + updated_count} bills ({created_count} new)")
 
-        conditions = []
-        for emp_id, term in composite_keys:
-            conditions.append(
-                (DormitoryBill.employee_id == emp_id) &
-                (DormitoryBill.term_code == term)
-            )
-
-        stmt = select(DormitoryBill).where(or_(*conditions))
-        result = await db.execute(stmt)
-        existing_bills = result.scalars().all()
-
-        # Create hashmap of existing bills using (employee_id, term_code) as key
-        existing_map = {
-            (bill.employee_id, bill.term_code): bill
-            for bill in existing_bills
-        }
+        # Step 3: Update employee dorm_id with the latest dorm_code from the import
+        employee_dorm_updates = frame.groupby("employee_id", sort=False)["dorm_code"].last().to_dict()
 
-        logger.info(f"Found {len(existing_map)} existing bills to update")
-
-        # Step 4: Separate into inserts vs updates
-        bills_to_insert = []
-
-        for idx, bill_data in validated_bills:
-            # Use (employee_id, term_code) as composite key
-            key = (bill_data["employee_id"], bill_data["term_code"])
-
-            if key in existing_map:
-                # UPDATE existing bill
-                existing_bill = existing_map[key]
-                for field, value in bill_data.items():
-                    setattr(existing_bill, field, value)
-                updated_count += 1
-            else:
-                # INSERT new bill
-                new_bill = DormitoryBill(**bill_data)
-                bills_to_insert.append(new_bill)
-                created_count += 1
-
-        # Step 5: Bulk insert new bills
-        if bills_to_insert:
-            db.add_all(bills_to_insert)
-            logger.info(f"Bulk inserting {len(bills_to_insert)} new bills")
-
-        # Step 6: Update employee dorm_id for all bills (both new and updated)
-        # Create a mapping of employee_id -> latest dorm_code from the import
-        employee_dorm_updates = {}
-        for idx, bill_data in validated_bills:
-            emp_id = bill_data["employee_id"]
-            dorm_code = bill_data["dorm_code"]
-            # Keep the latest dorm_code for each employee
-            employee_dorm_updates[emp_id] = dorm_code
-
-        # Fetch all employees that need dorm_id updates
         stmt = select(Employee).where(Employee.id.in_(list(employee_dorm_updates.keys())))
         result = await db.execute(stmt)
         employees_to_update = result.scalars().all()
 
-        # Update dorm_id for each employee
         updated_employees = 0
         for employee in employees_to_update:
             new_dorm_code = employee_dorm_updates[employee.id]
@@ -172,7 +281,10 @@ async def import_bills(db: AsyncSession, bills: List[Dict]) -> dict:
 
         logger.info(f"Updated dorm_id for {updated_employees} employees")
 
-        # Step 7: Commit all changes
+        # Step 4: Refresh analytics rollups for the imported terms (same transaction)
+        await dormitory_analytics_service.refresh_term_rollups(db, frame["term_code"].unique().tolist())
+
+        # Step 5: Commit all changes
         await db.commit()
         logger.info(f"Import complete: {created_count} created, {updated_count} updated, {error_count} errors, {updated_employees} employees updated")
 
@@ -189,12 +301,48 @@ async def import_bills(db: AsyncSession, bills: List[Dict]) -> dict:
             "error_details": error_details
         }
 
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
         await db.rollback()
         logger.error(f"Import failed: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Import failed: {str(e)}")
 
 
+async def import_bills_from_columnar(db: AsyncSession, content: bytes, filename: str) -> dict:
+    """
+    Import dormitory bills from a Parquet or Arrow IPC file.
+
+    Columns use the same names as the JSON import fields. Validation runs
+    on whole columns and the upsert is fed straight from the decoded frame.
+
+    Args:
+        db: Database session
+        content: Raw file bytes
+        filename: Original file name (.parquet, .arrow, .feather, .ipc)
+
+    Returns:
+        Import summary dict (same shape as import_bills)
+
+    Raises:
+        HTTPException(400): Unreadable file or missing required columns
+    """
+    try:
+        frame = read_columnar_frame(content, filename)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    total_records = len(frame)
+    logger.info(f"Starting columnar import of {total_records} bills from {filename}")
+
+    valid, error_details, skipped_count = validate_bill_frame(frame)
+    return await _import_bill_frame(
+        db, valid, total_records, skipped_count, error_details,
+        update_columns=[col for col in BILL_COLUMNS if col in frame.columns]
+    )
+
+
 async def search_bills(
     db: AsyncSession,
     employee_id: Optional[str] = None,
@@ -298,3 +446,177 @@ async def search_bills(
             status_code=500,
             detail=f"Failed to search dormitory bills: {str(e)}"
         )
+
+
+def term_partition_name(term_code: str) -> str:
+    """
+    Name of the dormitory_bills partition holding one term.
+
+    Plain upper-case alphanumeric terms map directly ('25A' -> dormitory_bills_t_25a);
+    anything else (lower case, '_', punctuation) gets a hash suffix. Direct
+    names never contain '_' after the prefix, so they cannot equal a hashed
+    name and different terms never collide.
+    """
+    slug = re.sub(r"[^0-9a-z]", "_", term_code.lower())
+    if not re.fullmatch(r"[0-9A-Z]+", term_code):
+        slug += "_" + hashlib.md5(term_code.encode()).hexdigest()[:8]
+    return f"dormitory_bills_t_{slug}"
+
+
+async def _fetch_partitions(db: AsyncSession) -> Dict[str, str]:
+    """Map partition table name -> partition bound of all attached dormitory_bills partitions."""
+    stmt = text("""
+        SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = 'dormitory_bills'
+    """)
+    result = await db.execute(stmt)
+    return dict(result.all())
+
+
+async def ensure_term_partitions(db: AsyncSession, term_codes: List[str]) -> List[str]:
+    """
+    Create missing dormitory_bills partitions for the given terms.
+
+    Does not commit - runs inside the import transaction so a failed import
+    leaves no empty partitions behind.
+
+    Args:
+        db: Database session
+        term_codes: Terms about to be written
+
+    Returns:
+        Names of the partitions that were created
+
+    Raises:
+        HTTPException(409): A table with the partition's name exists but is
+            not attached (e.g., detached manually without renaming)
+    """
+    async def fetch_missing() -> Dict[str, str]:
+        existing = await _fetch_partitions(db)
+        return {
+            term_partition_name(term_code): term_code
+            for term_code in sorted(set(term_codes))
+            if term_partition_name(term_code) not in existing
+        }
+
+    if not await fetch_missing():
+        return []
+
+    # Concurrent imports of a new term would both see it missing; the second
+    # re-reads after the first committed its partition
+    await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": PARTITION_LOCK_KEY})
+    missing = await fetch_missing()
+    if not missing:
+        return []
+
+    result = await db.execute(
+        text("""
+            SELECT relname FROM pg_class
+            WHERE relname = ANY(:names) AND relnamespace = current_schema()::regnamespace
+        """),
+        {"names": list(missing)}
+    )
+    conflicting = sorted(result.scalars().all())
+    if conflicting:
+        raise HTTPException(
+            status_code=409,
+            detail=(
+                f"Table {', '.join(conflicting)} exists but is not attached to dormitory_bills; "
+                f"rename or drop it before importing term "
+                f"{', '.join(missing[name] for name in conflicting)}"
+            )
+        )
+
+    # DDL takes no bind parameters; exec_driver_sql keeps ':' in a term code literal
+    conn = await db.connection()
+    for name, term_code in missing.items():
+        literal = term_code.replace("'", "''")
+        await conn.exec_driver_sql(
+            f'CREATE TABLE "{name}" PARTITION OF dormitory_bills FOR VALUES IN (\'{literal}\')'
+        )
+
+    created = list(missing)
+    logger.info(f"Created bill partitions: {created}")
+    return created
+
+
+async def list_term_partitions(db: AsyncSession) -> dict:
+    """
+    List attached dormitory_bills partitions with estimated row counts.
+
+    Row counts come from pg_class.reltuples (planner estimate, refreshed by
+    ANALYZE / autovacuum) so listing never scans the bills.
+
+    Returns:
+        {"total": int, "partitions": [{"term_code", "partition_name", "estimated_rows"}]}
+    """
+    stmt = text("""
+        SELECT child.relname AS partition_name,
+               pg_get_expr(child.relpartbound, child.oid) AS bound,
+               GREATEST(child.reltuples, 0)::bigint AS estimated_rows
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = 'dormitory_bills'
+        ORDER BY child.relname DESC
+    """)
+    rows = (await db.execute(stmt)).all()
+
+    partitions = []
+    for row in rows:
+        # Bound looks like: FOR VALUES IN ('25A')
+        match = re.search(r"IN \('(.*)'\)", row.bound or "")
+        partitions.append({
+            "term_code": match.group(1).replace("''", "'") if match else None,
+            "partition_name": row.partition_name,
+            "estimated_rows": row.estimated_rows,
+        })
+
+    return {"total": len(partitions), "partitions": partitions}
+
+
+async def detach_term_partition(db: AsyncSession, term_code: str) -> dict:
+    """
+    Detach one term's partition from dormitory_bills for archiving.
+
+    The detached table keeps its data and is renamed with a
+    _detached_<timestamp> suffix, so the term can be imported again into a
+    fresh partition and repeated detaches never collide. It can be dumped
+    or dropped independently; analytics rollups of the term are kept.
+
+    Args:
+        db: Database session
+        term_code: Term to detach (e.g., '23A')
+
+    Returns:
+        {"success": True, "term_code": str, "partition_name": str} (the archived name)
+
+    Raises:
+        HTTPException(404): Term has no attached partition
+        HTTPException(500): Detach failed
+    """
+    name = term_partition_name(term_code)
+    existing = await _fetch_partitions(db)
+
+    if name not in existing:
+        raise HTTPException(status_code=404, detail=f"No partition for term {term_code}")
+
+    archived_name = f"{name}_detached_{datetime.now(timezone.utc):%Y%m%d%H%M%S}"
+
+    try:
+        conn = await db.connection()
+        await conn.exec_driver_sql(f'ALTER TABLE dormitory_bills DETACH PARTITION "{name}"')
+        await conn.exec_driver_sql(f'ALTER TABLE "{name}" RENAME TO "{archived_name}"')
+        await db.commit()
+
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Detach of partition {name} failed: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to detach partition: {str(e)}")
+
+    logger.info(f"Detached bill partition {name} (term {term_code}) as {archived_name}")
+
+    return {"success": True, "term_code": term_code, "partition_name": archived_name}
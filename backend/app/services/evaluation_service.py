@@ -2,20 +2,23 @@
 Service layer for evaluation data management.
 
 This module provides business logic for:
-1. Excel file upload and import with upsert logic
+1. Excel / Parquet / Arrow file upload and import with upsert logic
 2. Evaluation search with filters and pagination
 3. Response transformation (flat DB rows → nested evaluation groups)
 """
 
 import logging
-from typing import Optional, List
+from typing import Optional, List, Tuple
+import pandas as pd
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException
 import openpyxl
 
 from app.models.evaluation import Evaluation
+from app.utils.columnar_utils import read_columnar_frame, frame_to_records
 
 logger = logging.getLogger(__name__)
 
@@ -52,6 +55,9 @@ EXCEL_COLUMN_MAPPING = {
     "請假總日數": "leave_days",
 }
 
+# 28 bind parameters per row -> stays well below the asyncpg 32767 parameter limit
+UPSERT_CHUNK_SIZE = 500
+
 
 async def upload_evaluations_from_excel(
     db: AsyncSession,
@@ -246,6 +252,133 @@ async def upload_evaluations_from_excel(
         )
 
 
+async def _upsert_evaluation_rows(db: AsyncSession, rows: List[dict]) -> Tuple[int, int]:
+    """
+    Upsert evaluation rows with INSERT ... ON CONFLICT (term_code, employee_id) DO UPDATE.
+
+    All rows must have the same keys. Duplicate (term_code, employee_id)
+    pairs are collapsed, the last row wins.
+
+    Returns:
+        (created_count, updated_count)
+    """
+    deduped = {(row["term_code"], row["employee_id"]): row for row in rows}
+    rows = list(deduped.values())
+
+    created_count = 0
+    updated_count = 0
+
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        chunk = rows[start:start + UPSERT_CHUNK_SIZE]
+
+        stmt = pg_insert(Evaluation).values(chunk)
+        update_columns = {
+            col: stmt.excluded[col]
+            for col in chunk[0].keys()
+            if col not in ("term_code", "employee_id")
+        }
+        update_columns["updated_at"] = func.now()
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_evaluations_term_employee",
+            set_=update_columns
+        ).returning(literal_column("xmax = 0").label("inserted"))
+
+        result = await db.execute(stmt)
+        inserted_flags = result.scalars().all()
+        chunk_created = sum(1 for inserted in inserted_flags if inserted)
+        created_count += chunk_created
+        updated_count += len(inserted_flags) - chunk_created
+
+    return created_count, updated_count
+
+
+async def upload_evaluations_from_columnar(
+    db: AsyncSession,
+    content: bytes,
+    filename: str
+) -> dict:
+    """
+    Import/update evaluation records from a Parquet or Arrow IPC file.
+
+    Columns may use either the Chinese Excel headers (評核年月, 工號, ...)
+    or the English database field names (term_code, employee_id, ...).
+
+    Args:
+        db: Database session
+        content: Raw file bytes
+        filename: Original file name (.parquet, .arrow, .feather, .ipc)
+
+    Returns:
+        dict with upload summary (same shape as upload_evaluations_from_excel)
+
+    Raises:
+        HTTPException(400): Unreadable file or missing required columns
+        HTTPException(500): Unexpected processing error
+    """
+    logger.info(f"Starting columnar upload from: {filename}")
+
+    try:
+        frame = read_columnar_frame(content, filename)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Map Chinese headers to database fields, keep only known columns
+    frame.columns = [str(col).strip() for col in frame.columns]
+    frame = frame.rename(columns=EXCEL_COLUMN_MAPPING)
+    known_columns = [col for col in EXCEL_COLUMN_MAPPING.values() if col in frame.columns]
+
+    missing_columns = [col for col in ("term_code", "employee_id") if col not in known_columns]
+    if missing_columns:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Missing required columns: {', '.join(missing_columns)}"
+        )
+
+    frame = frame[known_columns]
+    total_rows = len(frame)
+    logger.info(f"Mapped {len(known_columns)} columns, {total_rows} rows from columnar file")
+
+    # Normalise column types (strings stripped, leave_days numeric)
+    for col in known_columns:
+        if col == "leave_days":
+            frame[col] = pd.to_numeric(frame[col], errors="coerce")
+        else:
+            text = frame[col].astype("string").str.strip()
+            frame[col] = text.mask(text == "")
+
+    # Validate required fields
+    missing_required = frame["term_code"].isna() | frame["employee_id"].isna()
+    error_details = [
+        {"row": int(idx) + 1, "error": "Missing required fields: term_code or employee_id"}
+        for idx in frame.index[missing_required]
+    ]
+    error_count = len(error_details)
+    frame = frame[~missing_required]
+
+    try:
+        created_count, updated_count = await _upsert_evaluation_rows(db, frame_to_records(frame))
+        await db.commit()
+        logger.info(f"Upload complete: {created_count} created, {updated_count} updated, {error_count} errors")
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Columnar upload failed: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to process columnar file: {str(e)}"
+        )
+
+    return {
+        "success": True,
+        "summary": {
+            "total_rows": total_rows,
+            "created": created_count,
+            "updated": updated_count,
+            "errors": error_count
+        },
+        "error_details": error_details
+    }
+
+
 async def search_evaluations(
     db: AsyncSession,
     employee_id: Optional[str] = None,
@@ -0,0 +1,155 @@
+"""
+PIDMS Forecast Service
+
+Per-product burn rate and days-to-depletion from pidms_key_history:
+1. Reconstruct each key's remaining series inside the window
+   (anchor at window start + recorded changes + current value now)
+2. Least-squares slope per key, vectorised with numpy over all keys at once
+3. Product burn rate = sum of its keys' consumption rates
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models.pidms_key_history import PIDMSKeyHistory
+from app.models.pidms_product_summary import PIDMSProductSummary
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_DAY = 86400.0
+
+
+def _key_slopes(key_codes: np.ndarray, days: np.ndarray, remaining: np.ndarray, key_count: int) -> np.ndarray:
+    """
+    Ordinary least-squares slope of remaining over days for every key.
+
+    Uses grouped sums (n, Σx, Σy, Σxx, Σxy) via np.bincount, so the cost is
+    linear in the number of points with no Python loop per key. Keys with a
+    single observation time get slope 0.
+    """
+    n = np.bincount(key_codes, minlength=key_count).astype(float)
+    sum_x = np.bincount(key_codes, weights=days, minlength=key_count)
+    sum_y = np.bincount(key_codes, weights=remaining, minlength=key_count)
+    sum_xx = np.bincount(key_codes, weights=days * days, minlength=key_count)
+    sum_xy = np.bincount(key_codes, weights=days * remaining, minlength=key_count)
+
+    denominator = n * sum_xx - sum_x * sum_x
+    numerator = n * sum_xy - sum_x * sum_y
+
+    slopes = np.zeros(key_count)
+    valid = denominator > 1e-9
+    slopes[valid] = numerator[valid] / denominator[valid]
+    return slopes
+
+
+async def get_depletion_forecast(
+    db: AsyncSession,
+    window_days: int = 90,
+    product: Optional[str] = None
+) -> dict:
+    """
+    Forecast when each product runs out of activations.
+
+    Args:
+        db: Database session
+        window_days: History window used for the regression
+        product: Optional partial product filter (case-insensitive)
+
+    Returns:
+        {"window_days": int, "alert_days": int, "generated_at": datetime, "products": [...]}
+        with products ordered by days_to_depletion (soonest first, unknown last)
+    """
+    now = datetime.now(timezone.utc)
+    since = now - timedelta(days=window_days)
+    alert_days = settings.PIDMS_DEPLETION_ALERT_DAYS
+
+    # Step 1: Each key's last state before the window (anchor at window start)
+    anchors = (
+        select(PIDMSKeyHistory.keyname, PIDMSKeyHistory.prd, PIDMSKeyHistory.remaining, PIDMSKeyHistory.recorded_at)
+        .where(PIDMSKeyHistory.recorded_at < since)
+        .order_by(PIDMSKeyHistory.keyname, PIDMSKeyHistory.recorded_at.desc())
+        .distinct(PIDMSKeyHistory.keyname)
+    )
+    changes = (
+        select(PIDMSKeyHistory.keyname, PIDMSKeyHistory.prd, PIDMSKeyHistory.remaining, PIDMSKeyHistory.recorded_at)
+        .where(PIDMSKeyHistory.recorded_at >= since)
+    )
+    summary_query = select(PIDMSProductSummary)
+
+    if product:
+        anchors = anchors.where(PIDMSKeyHistory.prd.ilike(f"%{product}%"))
+        changes = changes.where(PIDMSKeyHistory.prd.ilike(f"%{product}%"))
+        summary_query = summary_query.where(PIDMSProductSummary.prd.ilike(f"%{product}%"))
+
+    anchor_rows = (await db.execute(anchors)).all()
+    change_rows = (await db.execute(changes.order_by(PIDMSKeyHistory.recorded_at))).all()
+    summaries = {row.prd: row for row in (await db.execute(summary_query)).scalars().all()}
+
+    # Step 2: Flatten into arrays (anchor time clamped to window start)
+    all_rows = anchor_rows + change_rows
+    keynames = [row.keyname for row in all_rows]
+    timestamps = [since.timestamp()] * len(anchor_rows) + [row.recorded_at.timestamp() for row in change_rows]
+    values = [row.remaining for row in all_rows]
+
+    products = []
+    if keynames:
+        key_index, key_codes = np.unique(np.array(keynames, dtype=object), return_inverse=True)
+        days = (np.array(timestamps) - since.timestamp()) / SECONDS_PER_DAY
+        remaining = np.array(values, dtype=float)
+
+        # Latest prd / remaining per key (rows are ordered by time, anchors first)
+        last_position = np.zeros(len(key_index), dtype=int)
+        np.maximum.at(last_position, key_codes, np.arange(len(key_codes)))
+        last_remaining = remaining[last_position]
+        key_products = np.array([row.prd for row in all_rows], dtype=object)[last_position]
+
+        # Current value holds until now: add it as a final point per key
+        key_range = np.arange(len(key_index))
+        key_codes = np.concatenate([key_codes, key_range])
+        days = np.concatenate([days, np.full(len(key_index), window_days, dtype=float)])
+        remaining = np.concatenate([remaining, last_remaining])
+
+        slopes = _key_slopes(key_codes, days, remaining, len(key_index))
+
+        # Step 3: Aggregate consumption (negative slope) per product
+        product_names, product_codes = np.unique(key_products, return_inverse=True)
+        burn_rates = np.bincount(product_codes, weights=np.clip(-slopes, 0, None), minlength=len(product_names))
+        tracked_keys = np.bincount(product_codes, minlength=len(product_names))
+
+        for prd, burn_rate, key_count in zip(product_names, burn_rates, tracked_keys):
+            burn_rate = float(burn_rate)
+            summary = summaries.get(prd)
+            total_remaining = int(summary.total_remaining) if summary else 0
+
+            days_to_depletion = None
+            depletion_date = None
+            if burn_rate > 1e-6:
+                days_to_depletion = round(total_remaining / burn_rate, 1)
+                depletion_date = (now + timedelta(days=days_to_depletion)).date()
+
+            products.append({
+                "prd": prd,
+                "key_count": int(key_count),
+                "total_remaining": total_remaining,
+                "burn_rate_per_day": round(burn_rate, 3),
+                "days_to_depletion": days_to_depletion,
+                "depletion_date": depletion_date,
+                "low_inventory": total_remaining < 5 or (days_to_depletion is not None and days_to_depletion <= alert_days)
+            })
+
+    products.sort(key=lambda p: (p["days_to_depletion"] is None, p["days_to_depletion"] or 0, p["prd"]))
+
+    logger.info(f"Depletion forecast: {len(products)} products over {window_days} days (filter: {product or 'all'})")
+
+    return {
+        "window_days": window_days,
+        "alert_days": alert_days,
+        "generated_at": now,
+        "products": products
+    }
@@ -5,18 +5,247 @@ Business logic for PIDMS (Product ID Management System) operations.
 Orchestrates database operations and external API calls for key management.
 """
 
+import asyncio
 import logging
-from typing import List, Dict, Optional
+import os
+import re
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Optional, Set, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, text, case, literal, literal_column, delete, insert, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import aliased
 from fastapi import HTTPException
 
+from app.core.cache import get_cache, publish_invalidation
+from app.core.config import settings
+from app.database.session import AsyncSessionLocal, direct_engine
 from app.models.pidms_key import PIDMSKey
-from app.integrations.pidkey_client import PIDKeyClient
+from app.models.pidms_sync_run import PIDMSSyncRun
+from app.models.pidms_product_summary import PIDMSProductSummary
+from app.models.pidms_key_history import PIDMSKeyHistory
+from app.models.pidms_key_reservation import PIDMSKeyReservation
+from app.integrations.pidkey_client import PIDKeyClient, normalize_key
 
 logger = logging.getLogger(__name__)
 
 
+# Postgres advisory lock key held while a sync runs ("PIDM")
+PIDMS_SYNC_LOCK_KEY = 0x5049444D
+
+# Advisory lock class of the per-product summary refresh ("PSUM"; second key = hashtext(prd))
+PIDMS_SUMMARY_LOCK_CLASS = 0x5053554D
+
+# PIDKey.com response fields stored on PIDMSKey
+KEY_UPSERT_FIELDS = (
+    'keyname', 'keyname_with_dash', 'prd', 'eid', 'is_key_type',
+    'is_retail', 'sub', 'remaining', 'blocked', 'errorcode',
+    'had_occurred', 'invalid', 'datetime_checked_done'
+)
+
+# Column defaults applied when the API omits a value (NOT NULL columns)
+KEY_FIELD_DEFAULTS = {"remaining": 0, "blocked": -1, "had_occurred": 0, "invalid": 0}
+
+# 14 bind parameters per row -> stays well below the asyncpg 32767 parameter limit
+KEY_UPSERT_CHUNK_SIZE = 1000
+
+# Per-worker cache of the /products response, invalidated by refresh_product_summary
+PRODUCT_SUMMARY_CACHE = "pidms_product_summary"
+_product_summary_cache = get_cache(PRODUCT_SUMMARY_CACHE, maxsize=1, ttl=300)
+
+
+def _normalize_key_rows(api_response: List[Dict], synced_at: datetime) -> Tuple[Dict[str, Dict], List[Dict], int]:
+    """
+    Filter the PIDKey.com response once into insertable rows and error results.
+
+    Returns:
+        (rows, error_results, errors): rows keyed by keyname (last one wins),
+        result entries for keys without prd, and the total error count
+    """
+    rows: Dict[str, Dict] = {}
+    error_results = []
+    errors = 0
+
+    for key_data in api_response:
+        keyname = key_data.get("keyname")
+        if not keyname:
+            logger.warning(f"Skipping key with missing keyname: {key_data}")
+            errors += 1
+            continue
+
+        # Check if prd (product) is present - required field
+        if not key_data.get("prd"):
+            logger.warning(f"Skipping key {keyname} with missing prd field: {key_data}")
+            errors += 1
+            error_results.append({
+                "keyname": keyname,
+                "keyname_with_dash": key_data.get("keyname_with_dash"),
+                "status": "error",
+                "prd": "UNKNOWN",  # Set default value to match schema requirement
+                "remaining": 0,
+                "blocked": -1,
+            })
+            continue
+
+        # Every row carries every column so chunks render one multi-row VALUES
+        row = {field: key_data.get(field) for field in KEY_UPSERT_FIELDS}
+        for field, default in KEY_FIELD_DEFAULTS.items():
+            if row[field] is None:
+                row[field] = default
+        row["last_synced_at"] = synced_at
+        rows[keyname] = row
+
+    return rows, error_results, errors
+
+
+async def _upsert_key_rows(db: AsyncSession, rows: List[Dict]) -> List[Dict]:
+    """
+    INSERT ... ON CONFLICT (keyname) DO UPDATE in chunks.
+
+    Returns:
+        One dict per upserted key with all columns plus status 'new' / 'updated'
+    """
+    results = []
+
+    for start in range(0, len(rows), KEY_UPSERT_CHUNK_SIZE):
+        chunk = rows[start:start + KEY_UPSERT_CHUNK_SIZE]
+
+        stmt = pg_insert(PIDMSKey).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PIDMSKey.keyname],
+            set_={
+                **{field: stmt.excluded[field] for field in KEY_UPSERT_FIELDS if field != "keyname"},
+                "last_synced_at": stmt.excluded.last_synced_at,
+                # reserved_count is left alone: _settle_reservations recounts open reservations
+                "updated_at": func.now(),
+            }
+        ).returning(
+            *PIDMSKey.__table__.columns,
+            # xmax = 0 only for freshly inserted tuples
+            literal_column("xmax = 0").label("inserted")
+        )
+
+        result = await db.execute(stmt)
+        for row in result.mappings():
+            key = dict(row)
+            key["status"] = "new" if key.pop("inserted") else "updated"
+            results.append(key)
+
+    return results
+
+
+def _observed_activations(upserted: List[Dict], previous_state: Dict) -> Dict[int, int]:
+    """
+    Activations seen since the previous check, per key id (drop in remaining).
+
+    Keys that are new or whose remaining did not drop are left out.
+    """
+    activations = {}
+    for key in upserted:
+        previous = previous_state.get(key["keyname"])
+        if previous is not None and previous.remaining > key["remaining"]:
+            activations[key["id"]] = previous.remaining - key["remaining"]
+    return activations
+
+
+async def _settle_reservations(db: AsyncSession, upserted: List[Dict], previous_state: Dict) -> None:
+    """
+    Close reservations accounted for by this check and recount reserved_count.
+
+    Each observed activation consumes the oldest open reservation of the key;
+    open reservations older than PIDMS_RESERVATION_TTL_HOURS expire. The
+    remaining open reservations become the key's reserved_count, so a key
+    reserved but not yet activated stays reserved across checks. Runs in the
+    check transaction after the upsert, which holds the key rows locked
+    against concurrent reserve_key calls.
+    """
+    reservation = PIDMSKeyReservation
+    # Literal (not a bind parameter) so generic plans still match the
+    # partial index idx_pidms_key_reservations_open (WHERE status = 'open')
+    is_open = reservation.status == literal_column("'open'")
+    activations = _observed_activations(upserted, previous_state)
+    key_ids = [key["id"] for key in upserted]
+
+    # 2 bind parameters per consuming key
+    consuming = list(activations.items())
+    for start in range(0, len(consuming), KEY_UPSERT_CHUNK_SIZE):
+        chunk = dict(consuming[start:start + KEY_UPSERT_CHUNK_SIZE])
+        ranked = select(
+            reservation.id,
+            reservation.key_id,
+            func.row_number().over(
+                partition_by=reservation.key_id,
+                order_by=(reservation.reserved_at, reservation.id)
+            ).label("rn")
+        ).where(reservation.key_id.in_(list(chunk)), is_open).subquery()
+
+        await db.execute(
+            update(reservation)
+            .where(reservation.id.in_(
+                select(ranked.c.id).where(ranked.c.rn <= case(chunk, value=ranked.c.key_id))
+            ))
+            .values(status="consumed", closed_at=func.now())
+        )
+
+    counts = {}
+    for start in range(0, len(key_ids), KEY_UPSERT_CHUNK_SIZE):
+        chunk = key_ids[start:start + KEY_UPSERT_CHUNK_SIZE]
+
+        await db.execute(
+            update(reservation)
+            .where(
+                reservation.key_id.in_(chunk),
+                is_open,
+                reservation.reserved_at < func.now() - timedelta(hours=settings.PIDMS_RESERVATION_TTL_HOURS)
+            )
+            .values(status="expired", closed_at=func.now())
+        )
+
+        open_count = select(func.count()).where(
+            reservation.key_id == PIDMSKey.id, is_open
+        ).scalar_subquery()
+        result = await db.execute(
+            update(PIDMSKey)
+            .where(PIDMSKey.id.in_(chunk))
+            .values(reserved_count=open_count)
+            .returning(PIDMSKey.id, PIDMSKey.reserved_count)
+        )
+        counts.update(result.tuples().all())
+
+    for key in upserted:
+        key["reserved_count"] = counts.get(key["id"], key["reserved_count"])
+
+
+async def _record_key_history(db: AsyncSession, rows: Dict[str, Dict], previous_state: Dict) -> int:
+    """
+    Append history rows for new keys and keys whose remaining/blocked changed.
+
+    Returns:
+        Number of history rows written
+    """
+    history = []
+    for keyname, row in rows.items():
+        previous = previous_state.get(keyname)
+        if previous is not None and previous.remaining == row["remaining"] and previous.blocked == row["blocked"]:
+            continue
+        history.append({
+            "keyname": keyname,
+            "prd": row["prd"],
+            "remaining": row["remaining"],
+            "blocked": row["blocked"],
+            "recorded_at": row["last_synced_at"],
+        })
+
+    # 5 bind parameters per row
+    for start in range(0, len(history), KEY_UPSERT_CHUNK_SIZE * 2):
+        await db.execute(insert(PIDMSKeyHistory).values(history[start:start + KEY_UPSERT_CHUNK_SIZE * 2]))
+
+    if history:
+        logger.info(f"Recorded {len(history)} key history rows")
+    return len(history)
+
+
 async def check_and_upsert_keys(
     db: AsyncSession,
     keys_list: List[str],
@@ -26,7 +255,9 @@ async def check_and_upsert_keys(
     Check keys against PIDKey.com and upsert to database.
 
     Calls PIDKey.com API to validate keys, then inserts new keys or updates
-    existing ones in the database. All operations are atomic.
+    existing ones with chunked INSERT ... ON CONFLICT statements. The
+    new/updated status of each key comes back from the database via
+    RETURNING. All operations are atomic.
 
     Args:
         db: Database session
@@ -47,92 +278,34 @@ async def check_and_upsert_keys(
         # Step 1: Call PIDKey.com API
         logger.info(f"Checking {len(keys_list)} keys against PIDKey.com API")
         api_response = await pidkey_client.check_keys(keys_list)
-
         total_keys = len(api_response)
-        new_keys = 0
-        updated_keys = 0
-        errors = 0
-        results = []
-
-        # Step 2: Bulk fetch existing keys (optimization)
-        keynames = [data.get("keyname") for data in api_response if data.get("keyname")]
-        stmt = select(PIDMSKey).where(PIDMSKey.keyname.in_(keynames))
-        result = await db.execute(stmt)
-        existing_keys_map = {key.keyname: key for key in result.scalars().all()}
 
-        logger.info(f"Found {len(existing_keys_map)} existing keys in database")
+        # Step 2: Filter response into upsert rows
+        rows, error_results, errors = _normalize_key_rows(api_response, datetime.now(timezone.utc))
 
-        # Valid fields for PIDMSKey model
-        valid_fields = {
-            'keyname', 'keyname_with_dash', 'prd', 'eid', 'is_key_type',
-            'is_retail', 'sub', 'remaining', 'blocked', 'errorcode',
-            'had_occurred', 'invalid', 'datetime_checked_done'
-        }
+        # Step 3: Set-based upsert, then record history and refresh summaries of
+        # every product touched (including the old product of keys whose prd changed)
+        upserted = []
+        if rows:
+            stmt = select(
+                PIDMSKey.keyname, PIDMSKey.prd, PIDMSKey.remaining, PIDMSKey.blocked
+            ).where(PIDMSKey.keyname.in_(list(rows.keys())))
+            previous_state = {row.keyname: row for row in (await db.execute(stmt)).all()}
 
-        # Step 3: Upsert each key
-        new_key_objects = []
-        for key_data in api_response:
-            keyname = key_data.get("keyname")
-            if not keyname:
-                logger.warning(f"Skipping key with missing keyname: {key_data}")
-                errors += 1
-                continue
-
-            # Check if prd (product) is present - required field
-            if not key_data.get("prd"):
-                logger.warning(f"Skipping key {keyname} with missing prd field: {key_data}")
-                errors += 1
-                results.append({
-                    "keyname": keyname,
-                    "keyname_with_dash": key_data.get("keyname_with_dash"),
-                    "status": "error",
-                    "prd": "UNKNOWN",  # Set default value to match schema requirement
-                    "remaining": 0,
-                    "blocked": -1,
-                })
-                continue
-
-            # Filter out invalid fields
-            filtered_data = {k: v for k, v in key_data.items() if k in valid_fields}
-
-            if keyname in existing_keys_map:
-                # UPDATE existing key
-                existing_key = existing_keys_map[keyname]
-                for field, value in filtered_data.items():
-                    if hasattr(existing_key, field):
-                        setattr(existing_key, field, value)
-                updated_keys += 1
-                status = "updated"
-            else:
-                # INSERT new key
-                new_key = PIDMSKey(**filtered_data)
-                new_key_objects.append(new_key)
-                new_keys += 1
-                status = "new"
-
-            results.append({
-                "keyname": keyname,
-                "keyname_with_dash": key_data.get("keyname_with_dash"),
-                "status": status,
-                "prd": key_data.get("prd"),
-                "remaining": key_data.get("remaining", 0),
-                "blocked": key_data.get("blocked", -1),
-                "eid": key_data.get("eid"),
-                "is_key_type": key_data.get("is_key_type"),
-                "is_retail": key_data.get("is_retail"),
-                "sub": key_data.get("sub"),
-                "errorcode": key_data.get("errorcode"),
-                "had_occurred": key_data.get("had_occurred"),
-                "invalid": key_data.get("invalid"),
-                "datetime_checked_done": key_data.get("datetime_checked_done")
-            })
+            upserted = await _upsert_key_rows(db, list(rows.values()))
+            await _settle_reservations(db, upserted, previous_state)
 
-        # Bulk insert new keys
-        if new_key_objects:
-            db.add_all(new_key_objects)
+            await _record_key_history(db, rows, previous_state)
+
+            touched_products = {row.prd for row in previous_state.values()}
+            touched_products.update(row["prd"] for row in rows.values())
+            await refresh_product_summary(db, touched_products)
 
         await db.commit()
 
+        new_keys = sum(1 for key in upserted if key["status"] == "new")
+        updated_keys = len(upserted) - new_keys
+
         logger.info(
             f"Check complete: {new_keys} new, {updated_keys} updated, {errors} errors"
         )
@@ -145,7 +318,7 @@ async def check_and_upsert_keys(
                 "updated_keys": updated_keys,
                 "errors": errors
             },
-            "results": results
+            "results": upserted + error_results
         }
 
     except Exception as e:
@@ -154,6 +327,80 @@ async def check_and_upsert_keys(
         raise HTTPException(status_code=500, detail=f"Failed to check keys: {str(e)}")
 
 
+async def check_unknown_keys(
+    db: AsyncSession,
+    keys_list: List[str],
+    pidkey_client: PIDKeyClient,
+    stale_after_hours: Optional[int] = None
+) -> dict:
+    """
+    Check keys, sending only unknown or stale ones to PIDKey.com.
+
+    Input is normalised like PIDKeyClient sends it and deduplicated. Keys
+    already in the database with last_synced_at inside the staleness window
+    are answered from the database (status 'cached'); the rest go through
+    check_and_upsert_keys.
+
+    Args:
+        db: Database session
+        keys_list: List of product keys (with or without dashes)
+        pidkey_client: PIDKey.com API client instance
+        stale_after_hours: Freshness window (default: PIDMS_SYNC_STALE_AFTER_HOURS)
+
+    Returns:
+        Same shape as check_and_upsert_keys, with summary.cached_keys
+    """
+    if stale_after_hours is None:
+        stale_after_hours = settings.PIDMS_SYNC_STALE_AFTER_HOURS
+
+    # Step 1: Normalise and deduplicate (order preserved)
+    keynames = list(dict.fromkeys(key for key in map(normalize_key, keys_list) if key))
+
+    # Step 2: Answer fresh keys from the database
+    fresh_after = datetime.now(timezone.utc) - timedelta(hours=stale_after_hours)
+    stmt = select(*PIDMSKey.__table__.columns).where(
+        PIDMSKey.keyname.in_(keynames),
+        PIDMSKey.last_synced_at >= fresh_after
+    )
+    cached = [{**row, "status": "cached"} for row in (await db.execute(stmt)).mappings()]
+    cached_keynames = {key["keyname"] for key in cached}
+
+    # Step 3: Only unknown / stale keys go upstream
+    to_check = [key for key in keynames if key not in cached_keynames]
+
+    logger.info(
+        f"Check (only unknown): {len(keynames)} unique keys, {len(cached)} fresh in database, "
+        f"{len(to_check)} sent to PIDKey.com"
+    )
+
+    if to_check:
+        result = await check_and_upsert_keys(db, to_check, pidkey_client)
+    else:
+        await db.rollback()
+        result = {
+            "success": True,
+            "summary": {"total_keys": 0, "new_keys": 0, "updated_keys": 0, "errors": 0},
+            "results": []
+        }
+
+    result["summary"]["total_keys"] += len(cached)
+    result["summary"]["cached_keys"] = len(cached)
+    result["results"] = cached + result["results"]
+    return result
+
+
+def normalize_product_query(product: str) -> str:
+    """
+    Normalize free text for trigram matching against product codes.
+
+    Lower-cases, turns separators into spaces and shortens years the way
+    product codes do ("Office 2019 Pro" -> "office 19 pro").
+    """
+    search_text = re.sub(r"[^0-9a-z]+", " ", product.lower())
+    search_text = re.sub(r"\b20(\d{2})\b", r"\1", search_text)
+    return search_text.strip()
+
+
 async def search_keys(
     db: AsyncSession,
     product: Optional[str] = None,
@@ -161,13 +408,20 @@ async def search_keys(
     max_remaining: Optional[int] = None,
     blocked: Optional[int] = None,
     page: int = 1,
-    page_size: int = 50
+    page_size: int = 50,
+    fuzzy: bool = False,
+    min_similarity: float = 0.3
 ) -> dict:
     """
     Search keys with fuzzy product matching and filters.
 
     Supports partial product name matching (e.g., "Office" matches all Office products),
     filtering by remaining activations, blocked status, and pagination.
+    Both modes are served by the pg_trgm index on prd.
+
+    In fuzzy mode the product text is matched by trigram word similarity
+    instead of substring, and results are ranked by similarity, so
+    "office 2019 pro" finds Office19ProPlusVL_MAK_AE first.
 
     Args:
         db: Database session
@@ -177,6 +431,8 @@ async def search_keys(
         blocked: Blocked status filter (-1=not blocked, 1=blocked)
         page: Page number (1-indexed)
         page_size: Items per page (1-100)
+        fuzzy: Rank by trigram similarity instead of substring match
+        min_similarity: Fuzzy mode word-similarity cutoff (0-1)
 
     Returns:
         {
@@ -196,14 +452,24 @@ async def search_keys(
         raise HTTPException(status_code=422, detail="Page size must be 1-100")
 
     logger.info(
-        f"Searching keys: product={product}, min_remaining={min_remaining}, "
+        f"Searching keys: product={product}, fuzzy={fuzzy}, min_remaining={min_remaining}, "
         f"max_remaining={max_remaining}, blocked={blocked}, page={page}, page_size={page_size}"
     )
 
     # Build query with filters
     query = select(PIDMSKey)
-
-    if product:
+    similarity = None
+
+    if product and fuzzy:
+        search_text = normalize_product_query(product)
+        # `<%` is index-assisted and uses this cutoff (transaction-local)
+        await db.execute(
+            text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"),
+            {"threshold": str(min_similarity)}
+        )
+        query = query.where(literal(search_text).op("<%")(PIDMSKey.prd))
+        similarity = func.word_similarity(search_text, PIDMSKey.prd)
+    elif product:
         query = query.where(PIDMSKey.prd.ilike(f"%{product}%"))
     if min_remaining is not None:
         query = query.where(PIDMSKey.remaining >= min_remaining)
@@ -217,7 +483,10 @@ async def search_keys(
     total = (await db.execute(count_query)).scalar()
 
     # Apply sorting and pagination
-    query = query.order_by(PIDMSKey.prd, PIDMSKey.remaining.desc())
+    if similarity is not None:
+        query = query.order_by(similarity.desc(), PIDMSKey.prd, PIDMSKey.remaining.desc())
+    else:
+        query = query.order_by(PIDMSKey.prd, PIDMSKey.remaining.desc())
     offset = (page - 1) * page_size
     query = query.offset(offset).limit(page_size)
 
@@ -235,12 +504,71 @@ async def search_keys(
     }
 
 
+async def refresh_product_summary(db: AsyncSession, products: Optional[Set[str]] = None) -> None:
+    """
+    Re-aggregate pidms_product_summary rows for the given products.
+
+    Only the listed products are recomputed (indexed on prd), so the cost
+    follows the size of the change, not the inventory. Rows are upserted,
+    and concurrent batches touching the same product take turns on a
+    per-product transaction advisory lock, so the later one aggregates
+    after the earlier one committed. Publishes a cache invalidation that
+    reaches other workers on commit. Does not commit.
+
+    Args:
+        db: Database session
+        products: Product codes to refresh (None = all products)
+    """
+    source = select(
+        PIDMSKey.prd,
+        func.count(PIDMSKey.id),
+        func.coalesce(func.sum(PIDMSKey.remaining), 0)
+    ).group_by(PIDMSKey.prd)
+
+    # Products whose last key is gone
+    stale_stmt = delete(PIDMSProductSummary).where(
+        ~select(PIDMSKey.id).where(PIDMSKey.prd == PIDMSProductSummary.prd).exists()
+    )
+
+    if products is not None:
+        if not products:
+            return
+        product_list = sorted(products)
+        # Locked in sorted order so overlapping batches cannot deadlock
+        await db.execute(
+            text(
+                "SELECT pg_advisory_xact_lock(:lock_class, hashtext(prd)) "
+                "FROM unnest(CAST(:products AS text[])) AS prd"
+            ),
+            {"lock_class": PIDMS_SUMMARY_LOCK_CLASS, "products": product_list}
+        )
+        source = source.where(PIDMSKey.prd.in_(product_list))
+        stale_stmt = stale_stmt.where(PIDMSProductSummary.prd.in_(product_list))
+
+    await db.execute(stale_stmt)
+
+    upsert_stmt = pg_insert(PIDMSProductSummary).from_select(["prd", "key_count", "total_remaining"], source)
+    await db.execute(
+        upsert_stmt.on_conflict_do_update(
+            index_elements=[PIDMSProductSummary.prd],
+            set_={
+                "key_count": upsert_stmt.excluded.key_count,
+                "total_remaining": upsert_stmt.excluded.total_remaining,
+                "refreshed_at": func.now(),
+            }
+        )
+    )
+    await publish_invalidation(db, PRODUCT_SUMMARY_CACHE)
+
+
 async def get_product_summary(db: AsyncSession) -> dict:
     """
     Get aggregated statistics grouped by product type.
 
     Returns statistics for each unique product code including key count,
     total remaining activations, average remaining, and low inventory flag.
+    Served from the per-worker cache, backed by the pidms_product_summary
+    table maintained on every key upsert.
 
     Args:
         db: Database session
@@ -258,50 +586,231 @@ async def get_product_summary(db: AsyncSession) -> dict:
             ]
         }
     """
-    logger.info("Generating product summary statistics")
+    cached = _product_summary_cache.get("all")
+    if cached is not None:
+        return cached
 
-    stmt = select(
-        PIDMSKey.prd,
-        func.count(PIDMSKey.id).label("key_count"),
-        func.sum(PIDMSKey.remaining).label("total_remaining"),
-        func.avg(PIDMSKey.remaining).label("avg_remaining")
-    ).group_by(PIDMSKey.prd)
+    logger.info("Loading product summary statistics")
 
+    stmt = select(PIDMSProductSummary).order_by(PIDMSProductSummary.prd)
     result = await db.execute(stmt)
-    rows = result.all()
 
     products = []
-    for row in rows:
+    for row in result.scalars().all():
         total_remaining = int(row.total_remaining or 0)
         products.append({
             "prd": row.prd,
             "key_count": row.key_count,
             "total_remaining": total_remaining,
-            "avg_remaining": round(row.avg_remaining or 0, 2),
+            "avg_remaining": round(total_remaining / row.key_count, 2) if row.key_count else 0.0,
             "low_inventory": total_remaining < 5
         })
 
-    logger.info(f"Product summary complete: {len(products)} product types")
+    logger.info(f"Product summary loaded: {len(products)} product types")
 
-    return {"products": products}
+    summary = {"products": products}
+    _product_summary_cache.set("all", summary)
+    return summary
+
+
+async def reserve_key(
+    db: AsyncSession,
+    product: str,
+    reserved_by: str,
+    note: Optional[str] = None
+) -> dict:
+    """
+    Atomically hand out the best available key of a product.
+
+    Picks the unblocked key with the most locally available activations
+    (remaining - reserved_count) using SELECT ... FOR UPDATE SKIP LOCKED:
+    concurrent callers never wait on each other and never get the same row
+    while it is being reserved, they simply take the next best key.
+
+    Args:
+        db: Database session
+        product: Exact product code (e.g., Office19ProPlusVL_MAK)
+        reserved_by: Identifier of the requesting user
+        note: Optional free text (machine name, ticket number)
+
+    Returns:
+        dict matching PIDMSReservationResponse schema
+
+    Raises:
+        HTTPException(404): No unblocked key with available activations
+        HTTPException(500): Database error
+    """
+    available = PIDMSKey.remaining - PIDMSKey.reserved_count
+
+    stmt = (
+        select(PIDMSKey.id, PIDMSKey.keyname, PIDMSKey.keyname_with_dash, PIDMSKey.prd)
+        # Literal -1 (not a bind parameter) so generic plans still match the
+        # partial index idx_pidms_keys_reservable (WHERE blocked = -1)
+        .where(PIDMSKey.prd == product, PIDMSKey.blocked == literal_column("-1"), available > 0)
+        .order_by(available.desc(), PIDMSKey.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+
+    try:
+        key = (await db.execute(stmt)).first()
+        if key is None:
+            await db.rollback()
+            raise HTTPException(status_code=404, detail=f"No available key for product {product}")
+
+        stmt = (
+            update(PIDMSKey)
+            .where(PIDMSKey.id == key.id)
+            .values(reserved_count=PIDMSKey.reserved_count + 1)
+            .returning(PIDMSKey.remaining, PIDMSKey.reserved_count)
+        )
+        counters = (await db.execute(stmt)).one()
+
+        stmt = insert(PIDMSKeyReservation).values(
+            key_id=key.id,
+            keyname=key.keyname,
+            prd=key.prd,
+            reserved_by=reserved_by,
+            note=note
+        ).returning(PIDMSKeyReservation.id, PIDMSKeyReservation.reserved_at)
+        reservation = (await db.execute(stmt)).one()
+
+        await db.commit()
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"reserve_key failed: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to reserve key: {str(e)}")
+
+    logger.info(f"Reserved key {key.keyname} ({key.prd}) for {reserved_by}")
+
+    return {
+        "reservation_id": reservation.id,
+        "keyname": key.keyname,
+        "keyname_with_dash": key.keyname_with_dash,
+        "prd": key.prd,
+        "remaining": counters.remaining,
+        "reserved_count": counters.reserved_count,
+        "available": counters.remaining - counters.reserved_count,
+        "reserved_by": reserved_by,
+        "note": note,
+        "reserved_at": reservation.reserved_at
+    }
+
+
+async def _sync_batch(batch_keys: List[str], batch_num: int, pidkey_client: PIDKeyClient) -> dict:
+    """
+    Sync one batch of keys in its own session and transaction.
+
+    Failures are returned instead of raised so one batch never aborts the
+    others running alongside it.
+    """
+    logger.info(f"Syncing batch {batch_num}: {len(batch_keys)} keys")
+    try:
+        async with AsyncSessionLocal() as batch_db:
+            batch_result = await check_and_upsert_keys(batch_db, batch_keys, pidkey_client)
+    except Exception as e:
+        detail = e.detail if isinstance(e, HTTPException) else str(e)
+        logger.error(f"Batch sync failed for batch {batch_num}: {detail}")
+        return _failed_batch(batch_keys, batch_num, detail)
+
+    logger.info(
+        f"Batch {batch_num} complete: {batch_result['summary']['updated_keys']} updated, "
+        f"{batch_result['summary']['errors']} errors"
+    )
+    return {**batch_result["summary"], "error_details": []}
+
+
+def _failed_batch(batch_keys: List[str], batch_num: int, detail: str) -> dict:
+    """Batch result counting every key of the batch as an error."""
+    return {
+        "total_keys": 0,
+        "updated_keys": 0,
+        "errors": len(batch_keys),
+        "error_details": [
+            {"keyname": key, "error": f"Batch {batch_num} sync failed: {detail}"}
+            for key in batch_keys
+        ]
+    }
+
+
+def _build_sync_key_query(
+    product_filter: Optional[str] = None,
+    incremental: bool = False,
+    stale_after_hours: Optional[int] = None,
+    max_keys: Optional[int] = None
+):
+    """
+    Build the SELECT of keyname_with_dash values a sync run should check.
+
+    Full mode returns every key in id order. Incremental mode returns only
+    keys never synced or synced more than `stale_after_hours` ago, ordered
+    by lowest remaining first, then products with the most keys, then the
+    oldest check, capped at `max_keys`.
+    """
+    query = select(PIDMSKey.keyname_with_dash)
+    if product_filter:
+        query = query.where(PIDMSKey.prd.ilike(f"%{product_filter}%"))
+
+    if not incremental:
+        return query.order_by(PIDMSKey.id)
+
+    if stale_after_hours is None:
+        stale_after_hours = settings.PIDMS_SYNC_STALE_AFTER_HOURS
+    if max_keys is None:
+        max_keys = settings.PIDMS_SYNC_MAX_KEYS
+
+    stale_before = datetime.now(timezone.utc) - timedelta(hours=stale_after_hours)
+    # Counted over the whole inventory, not just the stale keys
+    product_keys = aliased(PIDMSKey)
+    product_key_count = (
+        select(func.count())
+        .where(product_keys.prd == PIDMSKey.prd)
+        .correlate(PIDMSKey)
+        .scalar_subquery()
+    )
+
+    return (
+        query
+        .where((PIDMSKey.last_synced_at.is_(None)) | (PIDMSKey.last_synced_at < stale_before))
+        .order_by(
+            PIDMSKey.remaining.asc(),
+            product_key_count.desc(),
+            PIDMSKey.last_synced_at.asc().nulls_first(),
+        )
+        .limit(max_keys)
+    )
 
 
 async def sync_all_keys(
     db: AsyncSession,
     pidkey_client: PIDKeyClient,
-    product_filter: Optional[str] = None
+    product_filter: Optional[str] = None,
+    incremental: bool = False,
+    stale_after_hours: Optional[int] = None,
+    max_keys: Optional[int] = None
 ) -> dict:
     """
-    Sync all keys in database with PIDKey.com.
+    Sync keys in database with PIDKey.com.
+
+    Streams keyname_with_dash values through a server-side cursor in chunks
+    of PIDMS_SYNC_BATCH_SIZE and hands each chunk to a pool of
+    PIDMS_SYNC_CONCURRENCY workers through a bounded queue, so memory stays
+    constant regardless of inventory size. Every batch uses its own session
+    and commits independently; one batch failure doesn't stop the sync.
 
-    Fetches all keys from database, batches them into groups of 50,
-    calls PIDKey.com API for each batch, and updates activation counts.
-    Error isolation ensures one batch failure doesn't stop the entire sync.
+    In incremental mode only stale keys are checked, most urgent first,
+    up to a per-run key budget (see _build_sync_key_query).
 
     Args:
-        db: Database session
+        db: Database session (only used to stream the key list)
         pidkey_client: PIDKey.com API client instance
         product_filter: Optional filter to sync only specific product type
+        incremental: Only sync keys not checked recently
+        stale_after_hours: Incremental staleness threshold (default: PIDMS_SYNC_STALE_AFTER_HOURS)
+        max_keys: Incremental key budget (default: PIDMS_SYNC_MAX_KEYS)
 
     Returns:
         {
@@ -313,80 +822,258 @@ async def sync_all_keys(
     Raises:
         HTTPException: If database fetch or critical operation fails
     """
+    batch_size = settings.PIDMS_SYNC_BATCH_SIZE
+    concurrency = settings.PIDMS_SYNC_CONCURRENCY
+
+    totals = {"total_keys": 0, "updated_keys": 0, "errors": 0, "batches": 0}
+    error_details = []
+
+    # Producer reads at most `concurrency` batches ahead of the workers
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+
+    async def worker() -> None:
+        while True:
+            item = await queue.get()
+            try:
+                if item is None:
+                    return
+                batch_num, batch_keys = item
+                try:
+                    batch_result = await _sync_batch(batch_keys, batch_num, pidkey_client)
+                except Exception as e:
+                    logger.error(f"Batch {batch_num} worker error: {e}", exc_info=True)
+                    batch_result = _failed_batch(batch_keys, batch_num, str(e))
+                totals["total_keys"] += batch_result["total_keys"]
+                totals["updated_keys"] += batch_result["updated_keys"]
+                totals["errors"] += batch_result["errors"]
+                error_details.extend(batch_result["error_details"])
+            finally:
+                queue.task_done()
+
+    async def put(item) -> None:
+        # Never wait on a full queue that no worker is left to drain
+        while True:
+            alive = [task for task in workers if not task.done()]
+            if not alive:
+                raise RuntimeError("All sync workers stopped")
+            put_task = asyncio.ensure_future(queue.put(item))
+            try:
+                await asyncio.wait([put_task, *alive], return_when=asyncio.FIRST_COMPLETED)
+                if put_task.done():
+                    return
+            finally:
+                if not put_task.done():
+                    put_task.cancel()
+
+    logger.info(
+        f"Starting {'incremental' if incremental else 'full'} sync: batch size {batch_size}, "
+        f"concurrency {concurrency} (filter: {product_filter or 'all'})"
+    )
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+
     try:
-        # Step 1: Fetch all keys from database
-        query = select(PIDMSKey)
-        if product_filter:
-            query = query.where(PIDMSKey.prd.ilike(f"%{product_filter}%"))
-
-        result = await db.execute(query)
-        all_keys = result.scalars().all()
-
-        if not all_keys:
-            logger.info("No keys found to sync")
-            return {
-                "success": True,
-                "summary": {"total_synced": 0, "updated": 0, "errors": 0},
-                "error_details": []
-            }
+        # Step 1: Stream key names only (no ORM objects) via server-side cursor
+        query = _build_sync_key_query(product_filter, incremental, stale_after_hours, max_keys)
+        result = await db.stream_scalars(query.execution_options(yield_per=batch_size))
+
+        # Step 2: Feed batches to the workers as they are read
+        async for batch_keys in result.partitions(batch_size):
+            totals["batches"] += 1
+            await put((totals["batches"], list(batch_keys)))
+
+        for _ in workers:
+            await put(None)
+        await asyncio.gather(*workers)
+
+    except Exception as e:
+        logger.error(f"sync_all_keys failed: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Sync failed: {str(e)}")
+
+    finally:
+        # No-op after a clean run; stops stragglers on failure or cancellation
+        for task in workers:
+            task.cancel()
+        # Release the read transaction holding the cursor
+        await db.rollback()
+
+    # Step 3: Aggregate results
+    total_synced = totals["total_keys"]
+    updated_count = totals["updated_keys"]
+    error_count = totals["errors"]
+
+    if totals["batches"] == 0:
+        logger.info("No keys found to sync")
+
+    success = error_count < total_synced if total_synced > 0 else error_count == 0
+
+    logger.info(
+        f"Sync complete: {totals['batches']} batches, {total_synced} total, "
+        f"{updated_count} updated, {error_count} errors, success={success}"
+    )
+
+    return {
+        "success": success,
+        "summary": {
+            "total_synced": total_synced,
+            "updated": updated_count,
+            "errors": error_count
+        },
+        "error_details": error_details
+    }
+
+
+async def _try_sync_lock(conn) -> bool:
+    """Try to take the cluster-wide sync advisory lock on a dedicated connection."""
+    result = await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": PIDMS_SYNC_LOCK_KEY})
+    return bool(result.scalar())
+
+
+async def _record_run_failure(run_id: int, error: BaseException) -> None:
+    """
+    Mark a sync run failed (or cancelled) with the error that ended it.
+
+    Uses its own session: the caller's may be mid-transaction or broken by
+    the error being recorded.
+    """
+    if isinstance(error, asyncio.CancelledError):
+        status, message = "cancelled", "Sync cancelled"
+    elif isinstance(error, HTTPException):
+        status, message = "failed", str(error.detail)
+    else:
+        status, message = "failed", f"{type(error).__name__}: {error}"
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(PIDMSSyncRun)
+            .where(PIDMSSyncRun.id == run_id)
+            .values(status=status, error_message=message, finished_at=func.now())
+        )
+        await db.commit()
 
-        logger.info(f"Starting sync for {len(all_keys)} keys (filter: {product_filter or 'all'})")
 
-        total_synced = 0
-        updated_count = 0
-        error_count = 0
-        error_details = []
+async def run_locked_sync(
+    db: AsyncSession,
+    pidkey_client: PIDKeyClient,
+    trigger: str,
+    product_filter: Optional[str] = None,
+    incremental: bool = False,
+    stale_after_hours: Optional[int] = None,
+    max_keys: Optional[int] = None,
+    skip_if_ran_within: Optional[timedelta] = None
+) -> Optional[dict]:
+    """
+    Run sync_all_keys under the PIDMS sync advisory lock and record the run.
 
-        # Step 2: Batch keys into groups of 50
-        batch_size = 50
-        total_batches = (len(all_keys) + batch_size - 1) // batch_size
+    The lock is a session-level Postgres advisory lock held on an
+    autocommit connection (DATABASE_DIRECT_URL when set), so at most one
+    sync runs across all workers and nodes sharing the database.
 
-        for i in range(0, len(all_keys), batch_size):
-            batch = all_keys[i:i + batch_size]
-            batch_keys = [key.keyname_with_dash for key in batch]
-            batch_num = i // batch_size + 1
+    Args:
+        db: Database session
+        pidkey_client: PIDKey.com API client instance
+        trigger: "scheduled" or "manual"
+        product_filter / incremental / stale_after_hours / max_keys: passed to sync_all_keys
+        skip_if_ran_within: Skip if another run started within this window
+            (keeps scheduled runs from different workers from running back to back)
+
+    Returns:
+        sync_all_keys result, or None if the lock is held or the run was skipped
+
+    Raises:
+        HTTPException(500): Sync failed. Every error, including cancellation,
+            is recorded on the run ('failed' / 'cancelled') and re-raised
+    """
+    # Session lock on a direct connection in autocommit, so no transaction stays open for the run
+    async with direct_engine.connect() as lock_conn:
+        await lock_conn.execution_options(isolation_level="AUTOCOMMIT")
+        if not await _try_sync_lock(lock_conn):
+            logger.info(f"PIDMS sync ({trigger}) skipped: another sync holds the lock")
+            return None
+
+        try:
+            if skip_if_ran_within is not None:
+                stmt = select(func.max(PIDMSSyncRun.started_at))
+                last_started = (await db.execute(stmt)).scalar()
+                if last_started and last_started > datetime.now(timezone.utc) - skip_if_ran_within:
+                    logger.info(f"PIDMS sync ({trigger}) skipped: last run started at {last_started}")
+                    await db.rollback()
+                    return None
+
+            run = PIDMSSyncRun(
+                trigger=trigger,
+                mode="incremental" if incremental else "full",
+                status="running",
+                worker=f"{socket.gethostname()}:{os.getpid()}",
+                total_synced=0,
+                updated=0,
+                errors=0
+            )
+            db.add(run)
+            await db.commit()
+            run_id = run.id
 
             try:
-                # Step 3: Call PIDKey API for this batch
-                logger.info(f"Syncing batch {batch_num}/{total_batches}: {len(batch_keys)} keys")
-                batch_result = await check_and_upsert_keys(db, batch_keys, pidkey_client)
-
-                total_synced += batch_result["summary"]["total_keys"]
-                updated_count += batch_result["summary"]["updated_keys"]
-                error_count += batch_result["summary"]["errors"]
-
-                logger.info(
-                    f"Batch {batch_num} complete: "
-                    f"{batch_result['summary']['updated_keys']} updated, "
-                    f"{batch_result['summary']['errors']} errors"
+                result = await sync_all_keys(
+                    db, pidkey_client, product_filter,
+                    incremental=incremental,
+                    stale_after_hours=stale_after_hours,
+                    max_keys=max_keys
                 )
 
-            except Exception as e:
-                logger.error(f"Batch sync failed for batch {batch_num}: {e}", exc_info=True)
-                error_count += len(batch_keys)
-                for key in batch_keys:
-                    error_details.append({
-                        "keyname": key,
-                        "error": f"Batch {batch_num} sync failed: {str(e)}"
-                    })
+                run.status = "success" if result["success"] else "failed"
+                run.total_synced = result["summary"]["total_synced"]
+                run.updated = result["summary"]["updated"]
+                run.errors = result["summary"]["errors"]
+                run.finished_at = datetime.now(timezone.utc)
+                await db.commit()
+            except BaseException as e:
+                # Any way out (errors, a failed commit, cancellation at shutdown)
+                # must not leave the run "running"; shielded so a second cancel
+                # cannot interrupt the bookkeeping
+                try:
+                    await asyncio.shield(_record_run_failure(run_id, e))
+                except Exception as record_error:
+                    logger.error(f"Could not record failed PIDMS sync run {run_id}: {record_error}")
+                raise
+
+            return result
+
+        finally:
+            await lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": PIDMS_SYNC_LOCK_KEY})
+
+
+async def get_sync_status(db: AsyncSession, limit: int = 10) -> dict:
+    """
+    Get scheduler configuration, lock state and the most recent sync runs.
 
-        success = error_count < total_synced if total_synced > 0 else error_count == 0
+    Args:
+        db: Database session
+        limit: Number of recent runs to return
 
-        logger.info(
-            f"Sync complete: {total_synced} total, {updated_count} updated, "
-            f"{error_count} errors, success={success}"
+    Returns:
+        dict matching PIDMSSyncStatusResponse schema
+    """
+    # Single-argument advisory locks show up with classid = high 32 bits, objid = low 32 bits
+    stmt = text("""
+        SELECT EXISTS (
+            SELECT 1 FROM pg_locks
+            WHERE locktype = 'advisory' AND classid = 0 AND objid = :key AND objsubid = 1 AND granted
         )
+    """)
+    running = bool((await db.execute(stmt, {"key": PIDMS_SYNC_LOCK_KEY})).scalar())
 
-        return {
-            "success": success,
-            "summary": {
-                "total_synced": total_synced,
-                "updated": updated_count,
-                "errors": error_count
-            },
-            "error_details": error_details
-        }
+    stmt = select(PIDMSSyncRun).order_by(PIDMSSyncRun.started_at.desc()).limit(limit)
+    runs = (await db.execute(stmt)).scalars().all()
 
-    except Exception as e:
-        logger.error(f"sync_all_keys failed: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Sync failed: {str(e)}")
+    last_success = next((run for run in runs if run.status == "success"), None)
+
+    return {
+        "scheduler_enabled": settings.PIDMS_SYNC_SCHEDULE_ENABLED,
+        "interval_minutes": settings.PIDMS_SYNC_INTERVAL_MINUTES,
+        "incremental": settings.PIDMS_SYNC_SCHEDULE_INCREMENTAL,
+        "running": running,
+        "last_run": runs[0] if runs else None,
+        "last_success": last_success,
+        "recent_runs": runs
+    }
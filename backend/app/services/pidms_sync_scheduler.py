@@ -0,0 +1,86 @@
+"""
+PIDMS Sync Scheduler
+
+In-process background task that periodically runs the PIDMS sync.
+Every worker runs the loop; the sync advisory lock and the recent-run
+check in pidms_service.run_locked_sync make sure only one of them
+actually calls PIDKey.com per interval.
+"""
+
+import asyncio
+import logging
+import random
+from datetime import timedelta
+from typing import Optional
+
+from app.core.config import settings
+from app.database.session import AsyncSessionLocal
+from app.integrations.pidkey_client import PIDKeyClient
+from app.services import pidms_service
+
+logger = logging.getLogger(__name__)
+
+_task: Optional[asyncio.Task] = None
+
+
+async def run_once() -> Optional[dict]:
+    """Run one scheduled sync if no other worker ran it during this interval."""
+    interval = timedelta(minutes=settings.PIDMS_SYNC_INTERVAL_MINUTES)
+    client = PIDKeyClient(api_key=settings.PIDKEY_API_KEY, base_url=settings.PIDKEY_BASE_URL)
+
+    async with AsyncSessionLocal() as db:
+        return await pidms_service.run_locked_sync(
+            db, client,
+            trigger="scheduled",
+            incremental=settings.PIDMS_SYNC_SCHEDULE_INCREMENTAL,
+            # Slightly less than the interval so jitter never skips a whole cycle
+            skip_if_ran_within=interval * 0.9
+        )
+
+
+async def _run_forever() -> None:
+    interval_seconds = settings.PIDMS_SYNC_INTERVAL_MINUTES * 60
+
+    while True:
+        # Jitter spreads workers so they don't all hit the lock at once
+        await asyncio.sleep(interval_seconds + random.uniform(0, min(60, interval_seconds * 0.1)))
+
+        try:
+            result = await run_once()
+            if result is not None:
+                logger.info(f"Scheduled PIDMS sync finished: {result['summary']}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Scheduled PIDMS sync failed: {e}", exc_info=True)
+
+
+def start() -> None:
+    """Start the scheduler loop if enabled in settings."""
+    global _task
+
+    if not settings.PIDMS_SYNC_SCHEDULE_ENABLED:
+        return
+    if not settings.PIDKEY_API_KEY:
+        logger.warning("PIDMS sync scheduler enabled but PIDKEY_API_KEY is not set - not starting")
+        return
+    if _task is not None and not _task.done():
+        return
+
+    logger.info(f"Starting PIDMS sync scheduler (every {settings.PIDMS_SYNC_INTERVAL_MINUTES} minutes)")
+    _task = asyncio.create_task(_run_forever())
+
+
+async def stop() -> None:
+    """Cancel the scheduler loop and wait for it to exit."""
+    global _task
+
+    if _task is None:
+        return
+
+    _task.cancel()
+    try:
+        await _task
+    except asyncio.CancelledError:
+        pass
+    _task = None
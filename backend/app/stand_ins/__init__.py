@@ -0,0 +1,6 @@
+"""
+Local stand-ins for external services.
+
+ASGI apps that mimic upstream APIs for load tests and benchmarks. They can
+be served with uvicorn or mounted in-process with httpx.ASGITransport.
+"""
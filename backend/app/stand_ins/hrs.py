@@ -0,0 +1,294 @@
+"""
+FHS HRS Stand-in
+
+Mimics GET /ads/api/Furnace/rest/json/hr/{format}/{argument} for the formats
+FHSHRSClient uses, as pipe-delimited text:
+- s10/VNW0006204                       employee info (22 fields)
+- s11/VNW0006204                       achievements ("2024|甲o|o2023|乙o|o")
+- s16/VNW0006204vkokv2024-01           salary (45 fields)
+- s19/VNW0006204vkokvbefvkokv2024      year bonus, pre-Tet (bef) / post-Tet (aft)
+
+Like production, s10/s16/s19 bodies are repeated after an "o|o" separator
+(`duplicate_rate`). Unknown employees get an empty body.
+
+Responses come from recorded fixtures when available (FHSHRSClient recorder
+mode, FHS_HRS_RECORD_DIR), otherwise synthetic data derived deterministically
+from the employee ID. With `replay_latency`, delays are sampled from the
+recorded per-format latencies in requests.jsonl instead of latency_ms/jitter_ms.
+
+Behaviour knobs (HRSStandInConfig or HRS_STANDIN_* env vars):
+- latency_ms / jitter_ms: response delay
+- error_rate: share of requests answered with 500
+- duplicate_rate: share of responses with the "o|o" duplicated block
+- max_employee_id: synthetic employees exist for IDs 1..max_employee_id
+- fixtures_dir / replay_latency: recorded responses and latencies
+
+Run standalone:
+    HRS_STANDIN_FIXTURES_DIR=hrs_recordings uvicorn app.stand_ins.hrs:app --port 8901
+    FHS_HRS_BASE_URL=http://localhost:8901/ads/api/Furnace/rest/json/hr
+
+Or in-process:
+    FHSHRSClient(base_url="http://hrs.local/ads/api/Furnace/rest/json/hr",
+                 transport=httpx.ASGITransport(app=create_app(HRSStandInConfig(latency_ms=50))))
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+
+from app.integrations.fhs_hrs_client import RECORD_MANIFEST
+
+API_PREFIX = "/ads/api/Furnace/rest/json/hr"
+FORMATS = ("s10", "s11", "s16", "s19")
+BLOCK_SEPARATOR = "o|o"
+
+EMPLOYEE_ID_PATTERN = re.compile(r"^VNW00(\d{5})")
+
+DEPARTMENTS = [
+    ("製造部", "MFG01"), ("品管部", "QC002"), ("倉儲部", "WH003"),
+    ("行政部", "AD004"), ("資訊部", "IT005"), ("財務部", "FN006"),
+]
+JOB_TITLES = ["作業員", "技術員", "組長", "工程師", "專員", "課長"]
+SCORES = ["甲", "甲", "乙", "乙", "乙", "丙"]
+FAMILY_NAMES = ["NGUYEN", "TRAN", "LE", "PHAM", "HOANG", "VU", "DANG", "BUI"]
+GIVEN_NAMES = ["VAN AN", "THI BINH", "VAN CUONG", "THI DUNG", "MINH KHOA", "THI LAN", "QUOC HUY", "THI MAI"]
+
+
+@dataclass
+class HRSStandInConfig:
+    latency_ms: float = 150.0
+    jitter_ms: float = 50.0
+    error_rate: float = 0.0
+    duplicate_rate: float = 1.0
+    max_employee_id: int = 20000
+    fixtures_dir: str = ""
+    replay_latency: bool = False
+    seed: int = 42
+
+    @classmethod
+    def from_env(cls) -> "HRSStandInConfig":
+        """Read HRS_STANDIN_<FIELD> environment variables over the defaults."""
+        config = cls()
+        for name, value in vars(config).items():
+            env_value = os.getenv(f"HRS_STANDIN_{name.upper()}")
+            if env_value is None:
+                continue
+            if isinstance(value, bool):
+                setattr(config, name, env_value.strip().lower() in ("1", "true", "yes"))
+            else:
+                setattr(config, name, type(value)(env_value))
+        return config
+
+
+@dataclass
+class HRSStandInStats:
+    requests: int = 0
+    fixtures: int = 0
+    synthetic: int = 0
+    not_found: int = 0
+    errors: int = 0
+    by_format: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    started_at: float = field(default_factory=time.monotonic)
+
+
+def _digest(*parts) -> bytes:
+    return hashlib.sha256("|".join(str(p) for p in parts).encode()).digest()
+
+
+def _amount(digest: bytes, index: int, scale: int) -> int:
+    """Deterministic non-negative amount in [0, scale) rounded to 1,000 VND."""
+    return (int.from_bytes(digest[index:index + 2], "big") * scale // 65536) // 1000 * 1000
+
+
+def _employee_info(emp_num: int, emp_str: str) -> List[str]:
+    """s10: 22 fields in the order FHSHRSClient._parse_employee_data expects."""
+    d = _digest("s10", emp_num)
+    dept, dept_code = DEPARTMENTS[d[0] % len(DEPARTMENTS)]
+    name_en = f"{FAMILY_NAMES[d[1] % len(FAMILY_NAMES)]} {GIVEN_NAMES[d[2] % len(GIVEN_NAMES)]}"
+
+    fields = [""] * 22
+    fields[0] = f"員工{emp_num}"
+    fields[1] = name_en
+    fields[2] = f"{1970 + d[3] % 35}{1 + d[4] % 12:02d}{1 + d[5] % 28:02d}"
+    fields[3] = f"{2008 + d[6] % 17}{1 + d[7] % 12:02d}{1 + d[8] % 28:02d}"
+    fields[4] = dept
+    fields[5] = JOB_TITLES[d[9] % len(JOB_TITLES)]
+    fields[6] = emp_str
+    fields[7] = "直接" if d[10] % 3 else "間接"
+    fields[9] = dept_code
+    fields[13] = f"{4_500_000 + _amount(d, 11, 10_000_000):,}"
+    fields[17] = f"Thon {1 + d[13] % 9}, Xa Ky Anh, Ha Tinh"
+    fields[18] = f"Xom {1 + d[14] % 9}, Huyen Cam Xuyen, Ha Tinh"
+    fields[19] = f"09{int.from_bytes(d[15:19], 'big') % 10**8:08d}"
+    fields[20] = f"03{int.from_bytes(d[19:23], 'big') % 10**8:08d}" if d[23] % 2 else ""
+    fields[21] = f"{FAMILY_NAMES[d[24] % len(FAMILY_NAMES)]} THI HOA" if d[25] % 2 else ""
+    return fields
+
+
+def _achievements(emp_num: int) -> List[str]:
+    """s11: one 'year|score' block per year since the employee started."""
+    d = _digest("s11", emp_num)
+    start_year = 2008 + _digest("s10", emp_num)[6] % 17
+    return [
+        f"{year}|{SCORES[d[(year - start_year) % len(d)] % len(SCORES)]}"
+        for year in range(2024, max(start_year, 2014) - 1, -1)
+    ]
+
+
+def _salary(emp_num: int, emp_str: str, period: str) -> List[str]:
+    """s16: 45 fields; income 2-31 + base 44, total 32, deductions 33-42, net 43."""
+    d = _digest("s16", emp_num, period) + _digest("s16b", emp_num, period)
+    base = 4_500_000 + _amount(_digest("s10", emp_num), 11, 10_000_000)
+
+    income = [0] * 45
+    for index in range(2, 32):
+        # Most allowances are zero in a given month
+        if d[index] % 4 == 0:
+            income[index] = _amount(d, index + 20, 1_500_000)
+    total = base + sum(income[2:32])
+
+    deductions = [
+        round(base * 0.08), round(base * 0.01), round(base * 0.015),
+        _amount(d, 2, 300_000), _amount(d, 4, 600_000), 0,
+        round(base * 0.01), _amount(d, 6, 100_000), 0,
+        max(0, round((total - 11_000_000) * 0.05)),
+    ]
+    net = total - sum(deductions)
+
+    fields = [emp_str, period] + [f"{value:,}" if value else "" for value in income[2:32]]
+    fields += [f"{total:,}"] + [f"{value:,}" for value in deductions] + [f"{net:,}", f"{base:,}"]
+    return fields
+
+
+def _year_bonus(emp_num: int, emp_str: str, phase: str, year: str) -> List[str]:
+    """s19: bef = 11+ fields (mnv, tlcb, months, grade, rate, ..., amount, pre-Tet part); aft ends with post-Tet part."""
+    d = _digest("s19", emp_num, year)
+    base = 4_500_000 + _amount(_digest("s10", emp_num), 11, 10_000_000)
+    months = 12 - d[0] % 3
+    grade = SCORES[d[1] % len(SCORES)]
+    rate = {"甲": 1.2, "乙": 1.0, "丙": 0.8}[grade]
+    amount = round(base * months / 12 * rate)
+    pre_tet = amount // 2
+
+    if phase == "bef":
+        return [emp_str, f"{base:,}", str(months), grade, f"{rate:.1f}", "", "", "", "", f"{amount:,}", f"{pre_tet:,}"]
+    return [emp_str, year, f"{amount - pre_tet:,}"]
+
+
+def _synthetic_blocks(fmt: str, emp_num: int, emp_str: str, rest: str) -> Optional[List[str]]:
+    """Blocks (pipe-joined strings) for a synthetic response, None if the argument is invalid."""
+    if fmt == "s10":
+        return ["|".join(_employee_info(emp_num, emp_str))]
+    if fmt == "s11":
+        return _achievements(emp_num)
+
+    parts = rest.split("vkokv")
+    if fmt == "s16" and len(parts) == 2 and re.fullmatch(r"\d{4}-\d{2}", parts[1]):
+        return ["|".join(_salary(emp_num, emp_str, parts[1]))]
+    if fmt == "s19" and len(parts) == 3 and parts[1] in ("bef", "aft") and parts[2].isdigit():
+        return ["|".join(_year_bonus(emp_num, emp_str, parts[1], parts[2]))]
+    return None
+
+
+def _load_latency_samples(fixtures_dir: str) -> Dict[str, List[float]]:
+    """Recorded latencies per format from the recorder manifest."""
+    samples: Dict[str, List[float]] = defaultdict(list)
+    manifest = Path(fixtures_dir) / RECORD_MANIFEST
+    if not fixtures_dir or not manifest.exists():
+        return samples
+
+    with open(manifest, encoding="utf-8") as lines:
+        for line in lines:
+            try:
+                entry = json.loads(line)
+                samples[entry["path"].split("/", 1)[0]].append(float(entry["elapsed_ms"]))
+            except (ValueError, KeyError, TypeError):
+                continue
+    return samples
+
+
+def create_app(config: HRSStandInConfig = None) -> FastAPI:
+    """Build a stand-in app with its own state (one per benchmark run)."""
+    config = config or HRSStandInConfig()
+    stats = HRSStandInStats()
+    rng = random.Random(config.seed)
+    fixtures_root = Path(config.fixtures_dir) if config.fixtures_dir else None
+    latency_samples = _load_latency_samples(config.fixtures_dir) if config.replay_latency else {}
+
+    app = FastAPI(title="FHS HRS stand-in", docs_url=None, redoc_url=None)
+    app.state.config = config
+    app.state.stats = stats
+
+    def delay_for(fmt: str) -> float:
+        samples = latency_samples.get(fmt)
+        if samples:
+            return rng.choice(samples) / 1000
+        return max(0.0, config.latency_ms + rng.uniform(-config.jitter_ms, config.jitter_ms)) / 1000
+
+    def read_fixture(fmt: str, argument: str) -> Optional[str]:
+        if fixtures_root is None:
+            return None
+        fixture = fixtures_root / fmt / f"{argument}.txt"
+        # Arguments come from the URL; never read outside the fixtures directory
+        if fixture.resolve().parent != (fixtures_root / fmt).resolve() or not fixture.is_file():
+            return None
+        return fixture.read_text(encoding="utf-8")
+
+    @app.get(API_PREFIX + "/{fmt}/{argument}", response_class=PlainTextResponse)
+    async def hrs_api(fmt: str, argument: str):
+        stats.requests += 1
+        stats.by_format[fmt] += 1
+
+        if fmt not in FORMATS:
+            stats.not_found += 1
+            return PlainTextResponse("", status_code=404)
+
+        await asyncio.sleep(delay_for(fmt))
+
+        if rng.random() < config.error_rate:
+            stats.errors += 1
+            return PlainTextResponse("Internal Server Error", status_code=500)
+
+        recorded = read_fixture(fmt, argument)
+        if recorded is not None:
+            stats.fixtures += 1
+            return PlainTextResponse(recorded)
+
+        match = EMPLOYEE_ID_PATTERN.match(argument)
+        emp_num = int(match.group(1)) if match else 0
+        blocks = None
+        if 0 < emp_num <= config.max_employee_id:
+            blocks = _synthetic_blocks(fmt, emp_num, match.group(0), argument[match.end():])
+
+        if not blocks:
+            stats.not_found += 1
+            return PlainTextResponse("")
+
+        stats.synthetic += 1
+        if fmt == "s11":
+            # Achievements are always separator-terminated blocks
+            return PlainTextResponse("".join(block + BLOCK_SEPARATOR for block in blocks))
+        if rng.random() < config.duplicate_rate:
+            blocks = blocks + blocks
+        return PlainTextResponse(BLOCK_SEPARATOR.join(blocks))
+
+    @app.get("/stats")
+    async def get_stats():
+        elapsed = time.monotonic() - stats.started_at
+        return {**vars(stats), "elapsed_seconds": round(elapsed, 2)}
+
+    return app
+
+
+app = create_app(HRSStandInConfig.from_env())
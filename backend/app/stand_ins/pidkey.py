@@ -0,0 +1,193 @@
+"""
+PIDKey.com Stand-in
+
+Mimics GET /ajax/pidms_api: takes `keys` (\\r\\n-separated, no dashes) and
+returns one JSON object per key in the same format as PIDKey.com. Key
+data is derived deterministically from the key text; `remaining` drops by
+`consumption_per_call` on every check, so syncs see realistic updates.
+
+Behaviour knobs (StandInConfig or PIDKEY_STANDIN_* env vars):
+- latency_ms / jitter_ms: response delay
+- error_rate: share of requests answered with 500
+- rate_limit_per_second / rate_limit_burst: server-side token bucket, 429 + Retry-After
+- max_keys_per_request: larger requests get 414 (client splits them)
+
+Run standalone:
+    uvicorn app.stand_ins.pidkey:app --port 8900
+    PIDKEY_BASE_URL=http://localhost:8900/ajax/pidms_api
+
+Or in-process:
+    PIDKeyClient(api_key="x", base_url="http://pidkey.local/ajax/pidms_api",
+                 transport=httpx.ASGITransport(app=create_app(StandInConfig(latency_ms=50))))
+"""
+
+import asyncio
+import hashlib
+import math
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict
+
+from fastapi import FastAPI, Query
+from fastapi.responses import JSONResponse
+
+PRODUCTS = [
+    ("Office19ProPlus2019VL_MAK_AE", "Volume:MAK", 2),
+    ("Office16_ProPlusVL_MAK", "Volume:MAK", 2),
+    ("Office15_ProPlusVL_MAK", "Volume:MAK", 2),
+    ("Win10_RTM_Pro_Retail", "Retail", 1),
+    ("Win11_Pro_Volume_MAK", "Volume:MAK", 2),
+    ("ServerStandard2019_VL_MAK", "Volume:MAK", 2),
+]
+
+
+@dataclass
+class StandInConfig:
+    latency_ms: float = 200.0
+    jitter_ms: float = 50.0
+    error_rate: float = 0.0
+    rate_limit_per_second: float = 0.0  # 0 = unlimited
+    rate_limit_burst: int = 5
+    retry_after_seconds: float = 1.0
+    max_keys_per_request: int = 0  # 0 = unlimited
+    consumption_per_call: int = 1
+    seed: int = 42
+
+    @classmethod
+    def from_env(cls) -> "StandInConfig":
+        """Read PIDKEY_STANDIN_<FIELD> environment variables over the defaults."""
+        config = cls()
+        for name, value in vars(config).items():
+            env_value = os.getenv(f"PIDKEY_STANDIN_{name.upper()}")
+            if env_value is not None:
+                setattr(config, name, type(value)(env_value))
+        return config
+
+
+@dataclass
+class StandInStats:
+    requests: int = 0
+    keys: int = 0
+    rate_limited: int = 0
+    too_large: int = 0
+    errors: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+
+def _key_record(keyname: str, checks: int, consumption: int) -> Dict:
+    """Deterministic PIDKey.com-style record for a key."""
+    digest = hashlib.sha256(keyname.encode()).digest()
+    prd, key_type, is_retail = PRODUCTS[digest[0] % len(PRODUCTS)]
+    initial = int.from_bytes(digest[1:3], "big") % 5000
+    blocked = 1 if digest[3] < 8 else -1
+    remaining = max(0, initial - checks * consumption)
+
+    keyname_with_dash = "-".join(keyname[i:i + 5] for i in range(0, len(keyname), 5))
+
+    return {
+        "keyname": keyname,
+        "keyname_with_dash": keyname_with_dash,
+        "prd": prd,
+        "eid": f"03612-0{digest[4]:03d}0-{digest[5]:03d}-{digest[6]:03d}-03-1033-9200.0000-{digest[7]:03d}2019",
+        "is_key_type": key_type,
+        "is_retail": is_retail,
+        "sub": prd.split("_")[0],
+        "remaining": remaining,
+        "blocked": blocked,
+        "errorcode": "0xC004C060" if blocked == 1 else "",
+        "had_occurred": 0,
+        "invalid": 0,
+        "datetime_checked_done": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def create_app(config: StandInConfig = None) -> FastAPI:
+    """Build a stand-in app with its own state (one per benchmark run)."""
+    config = config or StandInConfig()
+    stats = StandInStats()
+    rng = random.Random(config.seed)
+    check_counts: Dict[str, int] = {}
+    bucket = {"tokens": float(config.rate_limit_burst), "updated_at": time.monotonic()}
+
+    app = FastAPI(title="PIDKey.com stand-in", docs_url=None, redoc_url=None)
+    app.state.config = config
+    app.state.stats = stats
+
+    def take_token() -> bool:
+        if config.rate_limit_per_second <= 0:
+            return True
+        now = time.monotonic()
+        bucket["tokens"] = min(
+            config.rate_limit_burst,
+            bucket["tokens"] + (now - bucket["updated_at"]) * config.rate_limit_per_second
+        )
+        bucket["updated_at"] = now
+        if bucket["tokens"] >= 1:
+            bucket["tokens"] -= 1
+            return True
+        return False
+
+    @app.get("/ajax/pidms_api")
+    async def pidms_api(
+        keys: str = Query(""),
+        justgetdescription: str = Query("0"),
+        apikey: str = Query("")
+    ):
+        stats.requests += 1
+
+        if not apikey:
+            return JSONResponse(status_code=401, content={"error": "Invalid API key"})
+
+        if not take_token():
+            stats.rate_limited += 1
+            return JSONResponse(
+                status_code=429,
+                content={"error": "Too many requests"},
+                headers={"Retry-After": str(math.ceil(config.retry_after_seconds))}
+            )
+
+        # PIDKeyClient joins keys with a literal "\r\n"; accept real newlines too
+        keynames = [k for k in keys.replace("\\r\\n", "\n").replace("\r\n", "\n").split("\n") if k]
+
+        if config.max_keys_per_request and len(keynames) > config.max_keys_per_request:
+            stats.too_large += 1
+            return JSONResponse(status_code=414, content={"error": "Too many keys"})
+
+        delay = max(0.0, config.latency_ms + rng.uniform(-config.jitter_ms, config.jitter_ms)) / 1000
+        await asyncio.sleep(delay)
+
+        if rng.random() < config.error_rate:
+            stats.errors += 1
+            return JSONResponse(status_code=500, content={"error": "Internal error"})
+
+        records = []
+        for keyname in keynames:
+            check_counts[keyname] = check_counts.get(keyname, 0) + 1
+            records.append(_key_record(keyname, check_counts[keyname], config.consumption_per_call))
+
+        stats.keys += len(records)
+        return records
+
+    @app.get("/stats")
+    async def get_stats():
+        elapsed = time.monotonic() - stats.started_at
+        return {**vars(stats), "elapsed_seconds": round(elapsed, 2)}
+
+    return app
+
+
+def generate_keys(count: int, seed: int = 0) -> list:
+    """Generate `count` distinct 25-character product keys with dashes."""
+    alphabet = "BCDFGHJKMPQRTVWXY2346789"
+    rng = random.Random(seed)
+    keys = set()
+    while len(keys) < count:
+        raw = "".join(rng.choice(alphabet) for _ in range(25))
+        keys.add("-".join(raw[i:i + 5] for i in range(0, 25, 5)))
+    return sorted(keys)
+
+
+app = create_app(StandInConfig.from_env())
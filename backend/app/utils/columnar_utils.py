@@ -0,0 +1,100 @@
+import io
+import logging
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+# Supported columnar file extensions
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+ARROW_EXTENSIONS = (".arrow", ".feather", ".ipc")
+COLUMNAR_EXTENSIONS = PARQUET_EXTENSIONS + ARROW_EXTENSIONS
+
+
+def is_columnar_file(filename: str) -> bool:
+    """Check if filename has a supported columnar extension
+
+    Args:
+        filename: Uploaded file name (e.g., bills_25A.parquet)
+
+    Returns:
+        True for Parquet / Arrow IPC files
+    """
+    if not filename:
+        return False
+    return Path(filename).suffix.lower() in COLUMNAR_EXTENSIONS
+
+
+def read_columnar_table(content: bytes, filename: str) -> pa.Table:
+    """Read Parquet or Arrow IPC bytes into an Arrow table
+
+    Arrow IPC files are accepted in both file (Feather v2) and stream format.
+
+    Args:
+        content: Raw file bytes
+        filename: Original file name, used to pick the reader
+
+    Returns:
+        pyarrow.Table with all columns
+
+    Raises:
+        ValueError: If extension is unsupported or file cannot be decoded
+    """
+    suffix = Path(filename).suffix.lower()
+
+    try:
+        if suffix in PARQUET_EXTENSIONS:
+            return pq.read_table(io.BytesIO(content))
+
+        if suffix in ARROW_EXTENSIONS:
+            buffer = pa.py_buffer(content)
+            try:
+                return ipc.open_file(buffer).read_all()
+            except pa.ArrowInvalid:
+                # Not a random-access IPC file, fall back to streaming format
+                return ipc.open_stream(buffer).read_all()
+
+    except (pa.ArrowException, OSError) as e:
+        logger.warning(f"Failed to decode columnar file {filename}: {e}")
+        raise ValueError(f"Invalid columnar file: {e}") from e
+
+    raise ValueError(f"Unsupported columnar file extension: {suffix}")
+
+
+def read_columnar_frame(content: bytes, filename: str) -> pd.DataFrame:
+    """Read Parquet or Arrow IPC bytes into a pandas DataFrame
+
+    Numeric columns are converted without copying row by row, so the
+    result can be validated with vectorised pandas operations.
+
+    Args:
+        content: Raw file bytes
+        filename: Original file name, used to pick the reader
+
+    Returns:
+        DataFrame with a default RangeIndex (0-based row position)
+    """
+    table = read_columnar_table(content, filename)
+    logger.info(f"Read columnar file {filename}: {table.num_rows} rows, {table.num_columns} columns")
+    return table.to_pandas().reset_index(drop=True)
+
+
+def frame_to_records(frame: pd.DataFrame) -> list[dict]:
+    """Convert DataFrame to list of dicts with NaN/NaT replaced by None
+
+    Values are boxed to native Python scalars so they can be bound
+    directly as SQL parameters.
+
+    Args:
+        frame: DataFrame to convert
+
+    Returns:
+        List of row dicts
+    """
+    if frame.empty:
+        return []
+    return frame.astype(object).where(frame.notna(), None).to_dict("records")
@@ -0,0 +1,182 @@
+"""
+PIDMS Sync Benchmark
+
+Measures PIDKey.com check throughput against the in-process stand-in
+(app.stand_ins.pidkey) for a range of concurrency settings, so
+PIDMS_SYNC_CONCURRENCY / PIDMS_SYNC_BATCH_SIZE / PIDKEY_RATE_LIMIT_* can be
+sized before a deployment without touching the paid API.
+
+Modes:
+- client: PIDKeyClient only (batches + concurrency, no database)
+- sync:   full pidms_service.sync_all_keys against DATABASE_URL; seeds
+          benchmark keys first and deletes them afterwards
+
+Usage (from backend/):
+    python scripts/benchmark_pidms_sync.py --keys 5000 --concurrency 1 2 4 8
+    python scripts/benchmark_pidms_sync.py --mode sync --keys 2000 --latency-ms 300 --rate-limit 5
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark PIDMS sync against the PIDKey.com stand-in")
+    parser.add_argument("--mode", choices=["client", "sync"], default="client")
+    parser.add_argument("--keys", type=int, default=2000, help="Number of keys to check")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Stand-in response latency")
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of stand-in requests failing with 500")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Stand-in requests/second before 429 (0 = unlimited)")
+    parser.add_argument("--max-keys-per-request", type=int, default=0, help="Stand-in 414 above this many keys (0 = unlimited)")
+    parser.add_argument("--client-rate-limit", type=float, default=None, help="Override PIDKEY_RATE_LIMIT_PER_SECOND")
+    return parser.parse_args()
+
+
+ARGS = parse_args()
+
+# Client-side limiter reads settings at import time
+if ARGS.client_rate_limit is not None:
+    os.environ["PIDKEY_RATE_LIMIT_PER_SECOND"] = str(ARGS.client_rate_limit)
+
+import httpx  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.integrations.pidkey_client import PIDKeyClient  # noqa: E402
+from app.stand_ins.pidkey import StandInConfig, create_app, generate_keys  # noqa: E402
+
+BENCH_PRODUCT_PREFIX = "BENCH_"
+
+
+def make_client(standin) -> PIDKeyClient:
+    return PIDKeyClient(
+        api_key="benchmark",
+        base_url="http://pidkey.standin/ajax/pidms_api",
+        transport=httpx.ASGITransport(app=standin)
+    )
+
+
+def make_standin():
+    return create_app(StandInConfig(
+        latency_ms=ARGS.latency_ms,
+        jitter_ms=ARGS.jitter_ms,
+        error_rate=ARGS.error_rate,
+        rate_limit_per_second=ARGS.rate_limit,
+        max_keys_per_request=ARGS.max_keys_per_request,
+    ))
+
+
+async def run_client(keys, concurrency: int) -> dict:
+    """Replicates sync batching/concurrency with PIDKeyClient only."""
+    standin = make_standin()
+    client = make_client(standin)
+    semaphore = asyncio.Semaphore(concurrency)
+    batches = [keys[i:i + ARGS.batch_size] for i in range(0, len(keys), ARGS.batch_size)]
+    failed = 0
+
+    async def check(batch):
+        nonlocal failed
+        async with semaphore:
+            try:
+                return len(await client.check_keys(batch))
+            except Exception:
+                failed += len(batch)
+                return 0
+
+    started = time.perf_counter()
+    checked = sum(await asyncio.gather(*[check(batch) for batch in batches]))
+    elapsed = time.perf_counter() - started
+    await client.aclose()
+
+    return {"checked": checked, "errors": failed, "elapsed": elapsed, "stats": vars(standin.state.stats)}
+
+
+async def seed_keys(keys) -> None:
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
+    from app.database.session import AsyncSessionLocal
+    from app.models.pidms_key import PIDMSKey
+
+    rows = [
+        {"keyname": key.replace("-", ""), "keyname_with_dash": key, "prd": f"{BENCH_PRODUCT_PREFIX}SEED", "remaining": 0, "blocked": -1}
+        for key in keys
+    ]
+    async with AsyncSessionLocal() as db:
+        for start in range(0, len(rows), 1000):
+            await db.execute(pg_insert(PIDMSKey).values(rows[start:start + 1000]).on_conflict_do_nothing())
+        await db.commit()
+
+
+async def cleanup_keys(keys) -> None:
+    from sqlalchemy import delete
+    from app.database.session import AsyncSessionLocal
+    from app.models.pidms_key import PIDMSKey
+    from app.models.pidms_key_history import PIDMSKeyHistory
+    from app.services.pidms_service import refresh_product_summary
+
+    keynames = [key.replace("-", "") for key in keys]
+    async with AsyncSessionLocal() as db:
+        for start in range(0, len(keynames), 1000):
+            chunk = keynames[start:start + 1000]
+            await db.execute(delete(PIDMSKeyHistory).where(PIDMSKeyHistory.keyname.in_(chunk)))
+            await db.execute(delete(PIDMSKey).where(PIDMSKey.keyname.in_(chunk)))
+        await refresh_product_summary(db)
+        await db.commit()
+
+
+async def run_sync(keys, concurrency: int) -> dict:
+    """Full sync_all_keys (streaming, per-batch sessions, upserts) against the stand-in."""
+    from app.database.session import AsyncSessionLocal
+    from app.services import pidms_service
+
+    standin = make_standin()
+    client = make_client(standin)
+    settings.PIDMS_SYNC_BATCH_SIZE = ARGS.batch_size
+    settings.PIDMS_SYNC_CONCURRENCY = concurrency
+
+    # Seeded keys carry a BENCH_ product until the sync overwrites it, so the
+    # filter selects exactly them and never production keys
+    await seed_keys(keys)
+    try:
+        started = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            result = await pidms_service.sync_all_keys(db, client, product_filter=BENCH_PRODUCT_PREFIX)
+        elapsed = time.perf_counter() - started
+    finally:
+        await client.aclose()
+        await cleanup_keys(keys)
+
+    summary = result["summary"]
+    return {"checked": summary["total_synced"], "errors": summary["errors"], "elapsed": elapsed, "stats": vars(standin.state.stats)}
+
+
+async def main():
+    keys = generate_keys(ARGS.keys, seed=1)
+    runner = run_client if ARGS.mode == "client" else run_sync
+
+    print(
+        f"mode={ARGS.mode} keys={ARGS.keys} batch_size={ARGS.batch_size} latency={ARGS.latency_ms}ms "
+        f"error_rate={ARGS.error_rate} standin_rate_limit={ARGS.rate_limit or 'off'} "
+        f"client_rate_limit={settings.PIDKEY_RATE_LIMIT_PER_SECOND}/s"
+    )
+    print(f"{'concurrency':>11} {'seconds':>9} {'keys/s':>9} {'errors':>7} {'requests':>9} {'429s':>6} {'414s':>6}")
+
+    for concurrency in ARGS.concurrency:
+        result = await runner(keys, concurrency)
+        stats = result["stats"]
+        throughput = result["checked"] / result["elapsed"] if result["elapsed"] else 0
+        print(
+            f"{concurrency:>11} {result['elapsed']:>9.2f} {throughput:>9.1f} {result['errors']:>7} "
+            f"{stats['requests']:>9} {stats['rate_limited']:>6} {stats['too_large']:>6}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
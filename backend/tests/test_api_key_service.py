@@ -0,0 +1,135 @@
+"""
+API key verification cache and batched last_used_at flush (no database).
+"""
+
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import cache
+from app.services import api_key_service
+from app.services.api_key_service import API_KEY_CACHE, flush_api_key_usage, lookup_api_key, record_api_key_use
+
+
+@pytest.fixture(autouse=True)
+def clean_state(monkeypatch):
+    api_key_service._api_key_cache().invalidate()
+    monkeypatch.setattr(api_key_service, "_pending_usage", {})
+
+
+@pytest.fixture
+def stored_keys(monkeypatch):
+    """Keys get_api_key finds; every database lookup is appended to stored_keys["queried"]."""
+    keys = {"queried": []}
+
+    async def get_api_key(db, key_hash):
+        keys["queried"].append(key_hash)
+        return keys.get(key_hash)
+
+    monkeypatch.setattr(api_key_service, "get_api_key", get_api_key)
+    return keys
+
+
+def api_key(key_hash, scopes="employees:read, dormitory-bills:import"):
+    return SimpleNamespace(id=key_hash, name="test", is_active=True, expires_at=None, scopes=scopes)
+
+
+class FakeFlushSession:
+    def __init__(self, error=None, on_execute=None):
+        self.error = error
+        self.on_execute = on_execute
+        self.executed = []
+        self.committed = False
+
+    async def execute(self, statement, params):
+        self.executed.append(params)
+        if self.on_execute:
+            self.on_execute()
+        if self.error:
+            raise self.error
+
+    async def commit(self):
+        self.committed = True
+
+
+@pytest.fixture
+def flush_session(monkeypatch):
+    """Installs the session flush_api_key_usage opens."""
+    def install(session):
+        @asynccontextmanager
+        async def session_factory():
+            yield session
+
+        monkeypatch.setattr(api_key_service, "AsyncSessionLocal", session_factory)
+        return session
+
+    return install
+
+
+async def test_unknown_keys_are_cached(stored_keys):
+    assert await lookup_api_key(None, "unknown") is None
+    assert await lookup_api_key(None, "unknown") is None
+
+    assert stored_keys["queried"] == ["unknown"]
+
+
+async def test_known_keys_are_cached_with_parsed_scopes(stored_keys):
+    stored_keys["good"] = api_key("good")
+
+    first = await lookup_api_key(None, "good")
+    second = await lookup_api_key(None, "good")
+
+    assert first is second
+    assert first["scopes"] == ["employees:read", "dormitory-bills:import"]
+    assert first["scope_set"] == frozenset(first["scopes"])
+    assert stored_keys["queried"] == ["good"]
+
+
+async def test_invalidation_drops_a_negative_entry(stored_keys):
+    assert await lookup_api_key(None, "late") is None
+    stored_keys["late"] = api_key("late")
+
+    # What the listener does for a NOTIFY from another worker
+    cache._invalidate_local(API_KEY_CACHE, "late")
+
+    assert (await lookup_api_key(None, "late"))["key_id"] == "late"
+    assert stored_keys["queried"] == ["late", "late"]
+
+
+async def test_flush_writes_latest_use_per_key_in_one_batch(flush_session):
+    session = flush_session(FakeFlushSession())
+    record_api_key_use("k1")
+    record_api_key_use("k2")
+    record_api_key_use("k1")
+    latest_k1 = api_key_service._pending_usage["k1"]
+
+    assert await flush_api_key_usage() == 2
+
+    assert len(session.executed) == 1
+    assert {row["key_id"]: row["used_at"] for row in session.executed[0]}["k1"] == latest_k1
+    assert session.committed
+    assert api_key_service._pending_usage == {}
+
+
+async def test_flush_without_pending_uses_skips_the_database(flush_session):
+    session = flush_session(FakeFlushSession())
+
+    assert await flush_api_key_usage() == 0
+    assert session.executed == []
+
+
+async def test_failed_flush_keeps_uses_and_newer_ones_win(flush_session):
+    record_api_key_use("k1")
+    record_api_key_use("k2")
+    pending = dict(api_key_service._pending_usage)
+    newer_k1 = pending["k1"] + timedelta(seconds=5)
+
+    def use_k1_during_flush():
+        api_key_service._pending_usage["k1"] = newer_k1
+
+    flush_session(FakeFlushSession(error=RuntimeError("database down"), on_execute=use_k1_during_flush))
+
+    assert await flush_api_key_usage() == 0
+    assert api_key_service._pending_usage == {"k1": newer_k1, "k2": pending["k2"]}
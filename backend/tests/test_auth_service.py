@@ -0,0 +1,87 @@
+"""
+OAuth login upsert of get_or_create_user (no database).
+
+The fake session returns what the single INSERT ... ON CONFLICT statement
+would: the user row, or nothing when the social_id belongs to another
+provider.
+"""
+
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from app.services import auth_service
+from app.services.auth_service import get_or_create_user
+
+
+class FakeResult:
+    def __init__(self, row):
+        self.row = row
+
+    def first(self):
+        return self.row
+
+
+class FakeLoginSession:
+    def __init__(self, row):
+        self.row = row
+        self.statements = []
+        self.committed = False
+        self.rolled_back = False
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return FakeResult(self.row)
+
+    async def commit(self):
+        self.committed = True
+
+    async def rollback(self):
+        self.rolled_back = True
+
+
+def user_row(**overrides):
+    row = {
+        "id": 42, "social_id": "g-1", "provider": "google", "email": "a@example.com",
+        "full_name": "A", "avatar": None, "role": "user", "localId": "E001",
+        "is_active": True, "is_verified": True,
+    }
+    row.update(overrides)
+    return SimpleNamespace(**row)
+
+
+async def test_login_returns_the_upserted_user():
+    auth_service._user_profile_cache().set("42", {"role": "guest"})
+    db = FakeLoginSession(user_row())
+
+    user = await get_or_create_user(db, "g-1", "google", "a@example.com", "A", None)
+
+    assert user["id"] == 42
+    assert user["role"] == "user"
+    assert db.committed
+    assert len(db.statements) == 1
+    # This worker's cached profile is dropped right away, others via NOTIFY
+    assert auth_service._user_profile_cache().get("42") is None
+
+
+async def test_upsert_only_updates_rows_of_the_same_provider():
+    db = FakeLoginSession(user_row())
+
+    await get_or_create_user(db, "g-1", "google", "a@example.com", "A", None)
+
+    sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+    conflict = sql.split("ON CONFLICT")[1]
+    assert conflict.startswith(" (social_id) DO UPDATE SET")
+    assert "WHERE users.provider = " in conflict
+
+
+async def test_provider_mismatch_falls_back_to_a_temporary_guest():
+    # social_id g-1 exists for another provider: DO UPDATE is skipped, no row returned
+    db = FakeLoginSession(None)
+
+    user = await get_or_create_user(db, "g-1", "github", None, "A", None)
+
+    assert user["id"] == 0
+    assert user["role"] == "guest"
+    assert user["email"] == "github_g-1@no-email.local"
+    assert db.rolled_back
@@ -0,0 +1,80 @@
+"""
+Totals, per-occupant averages and percentage changes of the term analytics.
+"""
+
+import pytest
+
+from app.services.dormitory_analytics_service import (
+    ROLLUP_SUM_COLUMNS,
+    _group_rows,
+    _pct_change,
+    _sum_rows,
+    _with_per_occupant,
+)
+
+
+def rollup(dorm_code, occupants, factory="F1", **amounts):
+    row = {"dorm_code": dorm_code, "factory_location": factory, "occupant_count": occupants}
+    row.update({col: 0 for col in ROLLUP_SUM_COLUMNS})
+    row.update(amounts)
+    return row
+
+
+def test_sum_rows_adds_every_column():
+    totals = _sum_rows([
+        rollup("A101", 2, elec_usage=10.5, total_amount=100.1),
+        rollup("A102", 3, elec_usage=4.25, total_amount=200.2),
+    ])
+
+    assert totals["occupant_count"] == 5
+    assert totals["elec_usage"] == 14.75
+    # Float noise is rounded away (100.1 + 200.2 = 300.29999...)
+    assert totals["total_amount"] == 300.3
+    assert totals["water_usage"] == 0
+
+
+def test_per_occupant_averages_are_rounded():
+    totals = _with_per_occupant({"occupant_count": 3, "total_amount": 100, "elec_usage": 10, "water_usage": 2})
+
+    assert totals["cost_per_occupant"] == 33.33
+    assert totals["elec_usage_per_occupant"] == 3.33
+    assert totals["water_usage_per_occupant"] == 0.67
+
+
+def test_per_occupant_averages_without_occupants_are_zero():
+    totals = _sum_rows([rollup("A101", 0, total_amount=50)])
+
+    assert totals["cost_per_occupant"] == 0.0
+    assert totals["elec_usage_per_occupant"] == 0.0
+
+
+def test_empty_term_sums_to_zero():
+    totals = _sum_rows([])
+
+    assert totals["occupant_count"] == 0
+    assert all(totals[col] == 0 for col in ROLLUP_SUM_COLUMNS)
+
+
+@pytest.mark.parametrize("current, previous, expected", [
+    (150, 100, 50.0),
+    (50, 100, -50.0),
+    (100, 100, 0.0),
+    (1, 3, -66.67),
+    (10, 0, None),
+    (10, None, None),
+])
+def test_pct_change(current, previous, expected):
+    assert _pct_change(current, previous) == expected
+
+
+def test_group_rows_by_factory_with_unknown_location():
+    groups = _group_rows([
+        rollup("A101", 2, factory="F1", total_amount=10),
+        rollup("A102", 2, factory="F1", total_amount=30),
+        rollup("B201", 1, factory=None, total_amount=5),
+    ], "factory")
+
+    assert set(groups) == {"F1", "UNKNOWN"}
+    assert groups["F1"]["total_amount"] == 40
+    assert groups["F1"]["cost_per_occupant"] == 10.0
+    assert groups["UNKNOWN"]["occupant_count"] == 1
@@ -0,0 +1,97 @@
+"""
+Gap / reset / spike classification of the anomaly scan.
+
+Classification happens in SQL, so the scan runs against a real Postgres
+(database_engine fixture) and is skipped without one.
+"""
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import Base
+from app.models.dormitory_bill import DormitoryBill
+from app.models.dormitory_bill_anomaly import DormitoryBillAnomaly
+from app.models.employee import Employee
+from app.services.dormitory_anomaly_service import scan_anomalies
+from app.services.dormitory_bill_service import ensure_term_partitions
+
+pytestmark = pytest.mark.integration
+
+# (term, elec_last, elec_curr) of dorm A101; water is continuous with steady usage
+A101_ELEC = [
+    ("24A", 0, 100),
+    ("24B", 100, 205),
+    ("24C", 250, 345),   # gap: 45 above the previous current index
+    ("24D", 345, 445),
+    ("24E", 400, 502),   # reset: 45 below the previous current index
+    ("24F", 502, 1502),  # spike: 1000 against ~100 in the other terms
+]
+
+# Only three terms: below min_terms, so its jump is never a spike
+B201_ELEC = [
+    ("24A", 0, 10),
+    ("24B", 10, 22),
+    ("24C", 22, 522),
+]
+
+
+def bills(dorm_code, employee_id, readings):
+    return [
+        {
+            "employee_id": employee_id, "term_code": term_code, "dorm_code": dorm_code,
+            "elec_last_index": last, "elec_curr_index": curr,
+            "water_last_index": index * 10, "water_curr_index": (index + 1) * 10,
+        }
+        for index, (term_code, last, curr) in enumerate(readings)
+    ]
+
+
+@pytest.fixture
+async def db(database_engine):
+    tables = [Employee.__table__, DormitoryBill.__table__, DormitoryBillAnomaly.__table__]
+    async with database_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=tables)
+
+    async with AsyncSession(database_engine, expire_on_commit=False) as session:
+        rows = bills("A101", "E1", A101_ELEC) + bills("B201", "E2", B201_ELEC)
+        await session.execute(insert(Employee).values([{"id": "E1"}, {"id": "E2"}]))
+        await ensure_term_partitions(session, [row["term_code"] for row in rows])
+        await session.execute(insert(DormitoryBill).values(rows))
+        await session.commit()
+        yield session
+
+
+async def test_scan_classifies_gaps_resets_and_spikes(db):
+    result = await scan_anomalies(db, z_threshold=3.0, min_terms=4)
+
+    stmt = select(
+        DormitoryBillAnomaly.dorm_code,
+        DormitoryBillAnomaly.term_code,
+        DormitoryBillAnomaly.previous_term_code,
+        DormitoryBillAnomaly.meter,
+        DormitoryBillAnomaly.anomaly_type,
+        DormitoryBillAnomaly.deviation,
+    ).order_by(DormitoryBillAnomaly.term_code)
+    anomalies = (await db.execute(stmt)).all()
+
+    assert result["summary"] == {"gap": 1, "reset": 1, "spike": 1, "total": 3}
+    assert [row[:5] for row in anomalies] == [
+        ("A101", "24C", "24B", "elec", "gap"),
+        ("A101", "24E", "24D", "elec", "reset"),
+        ("A101", "24F", "24E", "elec", "spike"),
+    ]
+    assert anomalies[0].deviation == 45
+    assert anomalies[1].deviation == -45
+    assert anomalies[2].deviation > 3
+
+
+async def test_rescan_replaces_previous_results(db):
+    await scan_anomalies(db, z_threshold=3.0, min_terms=4)
+    result = await scan_anomalies(db, z_threshold=3.0, min_terms=3)
+
+    stmt = select(DormitoryBillAnomaly.dorm_code).where(DormitoryBillAnomaly.anomaly_type == "spike")
+    spiking_dorms = sorted((await db.execute(stmt)).scalars())
+
+    assert result["summary"]["total"] == 4
+    assert spiking_dorms == ["A101", "B201"]
@@ -0,0 +1,209 @@
+"""
+Dormitory bill validation, partition naming and creation (no database).
+
+ensure_term_partitions runs against a fake session that answers the
+catalog queries and records every statement.
+"""
+
+import pandas as pd
+import pytest
+
+from app.services import dormitory_bill_service
+from app.services.dormitory_bill_service import ensure_term_partitions, term_partition_name, validate_bill_frame
+
+
+class FakeResult:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+
+    def all(self):
+        return self.rows
+
+    def scalars(self):
+        return self
+
+
+class FakeConnection:
+    def __init__(self, session):
+        self.session = session
+
+    async def exec_driver_sql(self, statement):
+        self.session.ddl.append(statement)
+        self.session.partitions[statement.split('"')[1]] = statement
+
+
+class FakePartitionSession:
+    """Answers _fetch_partitions / the pg_class conflict check; records locks and DDL."""
+
+    def __init__(self, partitions=(), tables=()):
+        self.partitions = {name: "" for name in partitions}
+        self.tables = set(tables)
+        self.locks = 0
+        self.ddl = []
+
+    async def execute(self, statement, params=None):
+        sql = str(statement)
+        if "pg_advisory_xact_lock" in sql:
+            self.locks += 1
+            assert params == {"key": dormitory_bill_service.PARTITION_LOCK_KEY}
+            return FakeResult()
+        if "pg_inherits" in sql:
+            return FakeResult(self.partitions.items())
+        return FakeResult(name for name in params["names"] if name in self.tables)
+
+    async def connection(self):
+        return FakeConnection(self)
+
+
+def test_plain_terms_map_directly():
+    assert term_partition_name("25A") == "dormitory_bills_t_25a"
+    assert term_partition_name("2024") == "dormitory_bills_t_2024"
+
+
+@pytest.mark.parametrize("term_code", ["25a", "25-A", "25 A", "25_A", "25:A", "學期25"])
+def test_other_terms_get_a_hash_suffix(term_code):
+    name = term_partition_name(term_code)
+
+    assert name.startswith("dormitory_bills_t_")
+    assert name != "dormitory_bills_t_25a"
+    assert len(name.rsplit("_", 1)[1]) == 8
+
+
+def test_terms_differing_in_case_or_punctuation_never_collide():
+    terms = ["25A", "25a", "25-A", "25_A", "25 A", "25.A"]
+
+    assert len({term_partition_name(term) for term in terms}) == len(terms)
+
+
+def test_direct_names_never_equal_a_hashed_name():
+    # md5('a') starts with 0cc175b9
+    assert term_partition_name("A_0CC175B9") != term_partition_name("a")
+
+
+async def test_existing_partitions_skip_the_lock():
+    db = FakePartitionSession(partitions=[term_partition_name("25A")])
+
+    assert await ensure_term_partitions(db, ["25A", "25A"]) == []
+    assert db.locks == 0
+    assert db.ddl == []
+
+
+async def test_missing_partitions_are_created_under_the_lock():
+    db = FakePartitionSession(partitions=[term_partition_name("25A")])
+
+    created = await ensure_term_partitions(db, ["25A", "25B", "x:name's"])
+
+    assert db.locks == 1
+    assert created == [term_partition_name("25B"), term_partition_name("x:name's")]
+    # Colons stay literal, quotes are doubled
+    assert db.ddl[1].endswith("FOR VALUES IN ('x:name''s')")
+
+
+async def test_detached_table_with_partition_name_conflicts():
+    name = term_partition_name("25B")
+    db = FakePartitionSession(tables=[name])
+
+    with pytest.raises(dormitory_bill_service.HTTPException) as exc_info:
+        await ensure_term_partitions(db, ["25B"])
+
+    assert exc_info.value.status_code == 409
+    assert db.ddl == []
+
+
+def bill(**overrides):
+    row = {
+        "employee_id": "E001", "term_code": "25A", "dorm_code": "A101",
+        "elec_last_index": 100, "elec_curr_index": 150,
+        "water_last_index": 10, "water_curr_index": 12,
+        "total_amount": 500,
+    }
+    row.update(overrides)
+    return row
+
+
+def validate(*rows):
+    valid, errors, skipped = validate_bill_frame(pd.DataFrame(list(rows)))
+    return valid, {error["row"]: error["error"] for error in errors}, skipped
+
+
+def test_valid_bills_pass_with_numbers_coerced():
+    valid, errors, skipped = validate(bill(), bill(employee_id="E002", shared_fee="12.5"))
+
+    assert errors == {}
+    assert skipped == 0
+    assert list(valid["employee_id"]) == ["E001", "E002"]
+    assert list(valid["shared_fee"]) == [0.0, 12.5]
+
+
+def test_missing_key_columns_reject_the_file():
+    with pytest.raises(dormitory_bill_service.HTTPException) as exc_info:
+        validate_bill_frame(pd.DataFrame([{"employee_id": "E001", "term_code": "25A"}]))
+
+    assert exc_info.value.status_code == 400
+    assert "dorm_code" in exc_info.value.detail
+
+
+def test_rows_without_employee_are_skipped_silently():
+    valid, errors, skipped = validate(bill(employee_id=None), bill(employee_id="  "), bill())
+
+    assert skipped == 2
+    assert errors == {}
+    assert len(valid) == 1
+
+
+def test_missing_required_fields():
+    _, errors, _ = validate(bill(term_code=None), bill(employee_id="E002", dorm_code=""))
+
+    assert errors == {
+        1: "Missing required fields: term_code or dorm_code",
+        2: "Missing required fields: term_code or dorm_code",
+    }
+
+
+def test_negative_and_non_numeric_values():
+    valid, errors, _ = validate(bill(total_amount=-1), bill(employee_id="E002", elec_amount="abc"), bill(employee_id="E003"))
+
+    assert errors == {1: "total_amount must be >= 0", 2: "elec_amount is not a number"}
+    assert list(valid["employee_id"]) == ["E003"]
+
+
+def test_current_index_below_last_index():
+    _, errors, _ = validate(
+        bill(elec_curr_index=90),
+        bill(employee_id="E002", water_curr_index=5),
+        bill(employee_id="E003", elec_curr_index=100, water_curr_index=10),
+    )
+
+    assert errors == {
+        1: "elec_curr_index must be >= elec_last_index",
+        2: "water_curr_index must be >= water_last_index",
+    }
+
+
+def test_all_violations_of_a_row_are_reported_together():
+    _, errors, _ = validate(bill(dorm_code=None, elec_curr_index=90, total_amount=-5))
+
+    assert errors[1].split("; ") == [
+        "Missing required fields: term_code or dorm_code",
+        "elec_curr_index must be >= elec_last_index",
+        "total_amount must be >= 0",
+    ]
+
+
+def test_duplicate_bill_keys_keep_the_last_row():
+    valid, errors, _ = validate(
+        bill(total_amount=1),
+        bill(term_code="25B"),
+        bill(total_amount=2),
+    )
+
+    assert errors == {1: "Duplicate (employee_id, term_code) in payload, superseded by a later row"}
+    assert list(valid["term_code"]) == ["25B", "25A"]
+    assert list(valid["total_amount"]) == [500.0, 2.0]
+
+
+def test_invalid_later_row_does_not_supersede_a_valid_one():
+    valid, errors, _ = validate(bill(total_amount=1), bill(total_amount=-2))
+
+    assert errors == {2: "total_amount must be >= 0"}
+    assert list(valid["total_amount"]) == [1.0]
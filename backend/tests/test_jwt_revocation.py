@@ -0,0 +1,54 @@
+"""
+Token revocation state of one worker (no database).
+"""
+
+import time
+
+import pytest
+
+from app.core import cache, jwt_handler
+from app.core.jwt_handler import VERIFIED_TOKEN_CACHE, create_access_token, verify_token_cached
+
+
+@pytest.fixture(autouse=True)
+def clean_revocations(monkeypatch):
+    monkeypatch.setattr(jwt_handler, "_revoked_tokens", {})
+    monkeypatch.setattr(jwt_handler, "_user_revocations", {})
+    monkeypatch.setattr(jwt_handler, "_next_prune", 0.0)
+
+
+def publish(key):
+    # What the listener does for a NOTIFY from another worker
+    cache._invalidate_local(VERIFIED_TOKEN_CACHE, key)
+
+
+def test_revoked_token_survives_cache_reset():
+    token = create_access_token(user_id="1", role="user")
+    assert verify_token_cached(token) is not None
+
+    payload = jwt_handler.get_token_payload(token)
+    publish(f"{jwt_handler._token_hash(token)}@{payload['exp']}")
+    # Listener reconnects drop every registered cache
+    for registered in cache._caches.values():
+        registered.invalidate()
+
+    assert verify_token_cached(token) is None
+
+
+def test_user_revocation_rejects_older_tokens_only():
+    old_token = create_access_token(user_id="7", role="user")
+    publish(f"user:7@{int(time.time())}")
+
+    assert verify_token_cached(old_token) is None
+    assert verify_token_cached(create_access_token(user_id="8", role="user")) is not None
+
+
+def test_revocations_are_pruned_after_expiry():
+    jwt_handler._revoke_token_local("expired", int(time.time()) - 1)
+    jwt_handler._revoke_token_local("live", int(time.time()) + 3600)
+    jwt_handler._revoke_user_local("1", int(time.time() - jwt_handler.ACCESS_TOKEN_LIFETIME.total_seconds()) - 1)
+
+    verify_token_cached("not-a-token")
+
+    assert set(jwt_handler._revoked_tokens) == {"live"}
+    assert jwt_handler._user_revocations == {}
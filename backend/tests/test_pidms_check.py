@@ -0,0 +1,115 @@
+"""
+New / updated status of checked keys, reported by the upsert via xmax.
+
+The chunking and status mapping run against a fake session; the xmax
+semantics themselves need Postgres (database_engine fixture).
+"""
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import Base
+from app.models.pidms_key import PIDMSKey
+from app.models.pidms_key_history import PIDMSKeyHistory
+from app.models.pidms_key_reservation import PIDMSKeyReservation
+from app.models.pidms_product_summary import PIDMSProductSummary
+from app.services import pidms_service
+from app.services.pidms_service import check_and_upsert_keys
+
+PRODUCT = "Office19ProPlusVL_MAK"
+
+
+class FakeMappingResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def mappings(self):
+        return self.rows
+
+
+class FakeUpsertSession:
+    """Returns each chunk's rows as RETURNING would, inserted for keynames in new_keys."""
+
+    def __init__(self, new_keys):
+        self.new_keys = new_keys
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        rows = statement.compile().params
+        keynames = [value for name, value in rows.items() if name.startswith("keyname_m")]
+        return FakeMappingResult([
+            {"keyname": keyname, "remaining": 1, "inserted": keyname in self.new_keys}
+            for keyname in keynames
+        ])
+
+
+def key_row(keyname, remaining=1):
+    row = {field: None for field in pidms_service.KEY_UPSERT_FIELDS}
+    row.update(keyname=keyname, keyname_with_dash=keyname, prd=PRODUCT, remaining=remaining, blocked=-1)
+    return row
+
+
+async def test_upsert_maps_xmax_flag_to_status(monkeypatch):
+    monkeypatch.setattr(pidms_service, "KEY_UPSERT_CHUNK_SIZE", 2)
+    db = FakeUpsertSession(new_keys={"KEY1", "KEY3"})
+
+    results = await pidms_service._upsert_key_rows(db, [key_row("KEY1"), key_row("KEY2"), key_row("KEY3")])
+
+    assert len(db.statements) == 2
+    assert [(key["keyname"], key["status"]) for key in results] == [
+        ("KEY1", "new"), ("KEY2", "updated"), ("KEY3", "new"),
+    ]
+    assert all("inserted" not in key for key in results)
+
+
+async def test_upsert_returns_xmax_and_keeps_reservations():
+    db = FakeUpsertSession(new_keys=set())
+
+    await pidms_service._upsert_key_rows(db, [key_row("KEY1"), key_row("KEY2")])
+    sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+
+    assert "xmax = 0 AS inserted" in sql
+    # reserved_count is recounted from open reservations, never reset by the upsert
+    assert "reserved_count" not in sql.split("ON CONFLICT")[1].split("RETURNING")[0]
+
+
+class FakePIDKeyClient:
+    def __init__(self, remaining):
+        self.remaining = remaining
+
+    async def check_keys(self, keys):
+        return [
+            {"keyname": key, "keyname_with_dash": key, "prd": PRODUCT, "remaining": self.remaining[key], "blocked": -1}
+            for key in keys
+        ]
+
+
+@pytest.fixture
+async def db(database_engine):
+    tables = [
+        PIDMSKey.__table__,
+        PIDMSKeyHistory.__table__,
+        PIDMSProductSummary.__table__,
+        PIDMSKeyReservation.__table__,
+    ]
+    async with database_engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.run_sync(Base.metadata.create_all, tables=tables)
+
+    async with AsyncSession(database_engine, expire_on_commit=False) as session:
+        yield session
+
+
+@pytest.mark.integration
+async def test_check_reports_new_then_updated_keys(db):
+    client = FakePIDKeyClient({"KEY1": 5, "KEY2": 3})
+    first = await check_and_upsert_keys(db, ["KEY1"], client)
+    second = await check_and_upsert_keys(db, ["KEY1", "KEY2"], client)
+
+    assert first["summary"]["new_keys"] == 1
+    assert second["summary"]["new_keys"] == 1
+    assert second["summary"]["updated_keys"] == 1
+    assert {key["keyname"]: key["status"] for key in second["results"]} == {"KEY1": "updated", "KEY2": "new"}
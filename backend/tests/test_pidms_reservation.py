@@ -0,0 +1,127 @@
+"""
+Key reservations across PIDKey.com checks.
+
+The scenarios run against a real Postgres (database_engine fixture) and are
+skipped without one; the PIDKey client is an in-memory fake whose remaining
+counts the test sets.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import Base
+from app.models.pidms_key import PIDMSKey
+from app.models.pidms_key_history import PIDMSKeyHistory
+from app.models.pidms_key_reservation import PIDMSKeyReservation
+from app.models.pidms_product_summary import PIDMSProductSummary
+from app.services import pidms_service
+from app.services.pidms_service import check_and_upsert_keys, reserve_key
+
+PRODUCT = "Office19ProPlusVL_MAK"
+KEY = "ABCDE12345FGHIJ67890KLMNO"
+
+
+class FakePIDKeyClient:
+    def __init__(self):
+        self.remaining = {}
+
+    async def check_keys(self, keys):
+        return [
+            {"keyname": key, "keyname_with_dash": key, "prd": PRODUCT, "remaining": self.remaining[key], "blocked": -1}
+            for key in keys
+        ]
+
+
+@pytest.fixture
+def client():
+    return FakePIDKeyClient()
+
+
+@pytest.fixture
+async def db(database_engine):
+    tables = [
+        PIDMSKey.__table__,
+        PIDMSKeyHistory.__table__,
+        PIDMSProductSummary.__table__,
+        PIDMSKeyReservation.__table__,
+    ]
+    async with database_engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.run_sync(Base.metadata.create_all, tables=tables)
+
+    async with AsyncSession(database_engine, expire_on_commit=False) as session:
+        yield session
+
+
+async def reservation_statuses(db):
+    stmt = select(PIDMSKeyReservation.status).order_by(PIDMSKeyReservation.id)
+    return list((await db.execute(stmt)).scalars())
+
+
+def test_observed_activations_are_drops_in_remaining():
+    previous_state = {
+        "DROPPED": SimpleNamespace(remaining=5),
+        "UNCHANGED": SimpleNamespace(remaining=2),
+        "RAISED": SimpleNamespace(remaining=0),
+    }
+    upserted = [
+        {"id": 1, "keyname": "DROPPED", "remaining": 3},
+        {"id": 2, "keyname": "UNCHANGED", "remaining": 2},
+        {"id": 3, "keyname": "RAISED", "remaining": 4},
+        {"id": 4, "keyname": "NEW", "remaining": 9},
+    ]
+
+    assert pidms_service._observed_activations(upserted, previous_state) == {1: 2}
+
+
+@pytest.mark.integration
+async def test_unactivated_reservation_survives_check(db, client):
+    client.remaining = {KEY: 1}
+    await check_and_upsert_keys(db, [KEY], client)
+
+    first = await reserve_key(db, PRODUCT, "tech-a")
+    assert first["available"] == 0
+
+    # Check before tech-a activated: upstream still reports 1 remaining
+    result = await check_and_upsert_keys(db, [KEY], client)
+    assert result["results"][0]["reserved_count"] == 1
+
+    with pytest.raises(HTTPException) as exc_info:
+        await reserve_key(db, PRODUCT, "tech-b")
+    assert exc_info.value.status_code == 404
+
+
+@pytest.mark.integration
+async def test_activation_consumes_oldest_reservation(db, client):
+    client.remaining = {KEY: 3}
+    await check_and_upsert_keys(db, [KEY], client)
+    await reserve_key(db, PRODUCT, "tech-a")
+    await reserve_key(db, PRODUCT, "tech-b")
+
+    client.remaining = {KEY: 2}
+    result = await check_and_upsert_keys(db, [KEY], client)
+
+    assert result["results"][0]["reserved_count"] == 1
+    assert await reservation_statuses(db) == ["consumed", "open"]
+
+    third = await reserve_key(db, PRODUCT, "tech-c")
+    assert third["available"] == 0
+
+
+@pytest.mark.integration
+async def test_stale_reservation_expires(db, client, monkeypatch):
+    monkeypatch.setattr(settings, "PIDMS_RESERVATION_TTL_HOURS", 0)
+    client.remaining = {KEY: 1}
+    await check_and_upsert_keys(db, [KEY], client)
+    await reserve_key(db, PRODUCT, "tech-a")
+
+    result = await check_and_upsert_keys(db, [KEY], client)
+
+    assert result["results"][0]["reserved_count"] == 0
+    assert await reservation_statuses(db) == ["expired"]
+    assert (await reserve_key(db, PRODUCT, "tech-b"))["reserved_by"] == "tech-b"
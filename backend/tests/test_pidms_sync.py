@@ -0,0 +1,239 @@
+"""
+sync_all_keys smoke tests against the in-process PIDKey.com stand-in.
+
+The key list and the per-batch upsert are replaced with in-memory fakes;
+the PIDKey client, batching, worker pool and queue are the real ones.
+run_locked_sync is checked with a fake lock connection and run session.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.integrations import pidkey_client as pidkey_client_module
+from app.integrations.pidkey_client import PIDKeyClient
+from app.services import pidms_service
+from app.stand_ins.pidkey import StandInConfig, create_app, generate_keys
+
+# Fails the test instead of hanging the run if the producer or workers deadlock
+SYNC_TIMEOUT_SECONDS = 10
+
+
+class FakeStreamResult:
+    def __init__(self, keys):
+        self.keys = keys
+
+    async def partitions(self, size):
+        for start in range(0, len(self.keys), size):
+            yield self.keys[start:start + size]
+
+
+class FakeKeyListSession:
+    """Stands in for the session sync_all_keys streams the key list from."""
+
+    def __init__(self, keys):
+        self.keys = keys
+        self.rolled_back = False
+
+    async def stream_scalars(self, query):
+        return FakeStreamResult(self.keys)
+
+    async def rollback(self):
+        self.rolled_back = True
+
+
+@asynccontextmanager
+async def fake_session_factory():
+    yield None
+
+
+@pytest.fixture
+def pidkey_client(monkeypatch):
+    # The process-wide limiter's lock binds to the first event loop that waits on it
+    monkeypatch.setattr(
+        pidkey_client_module, "_rate_limiter",
+        pidkey_client_module._TokenBucket(settings.PIDKEY_RATE_LIMIT_PER_SECOND, settings.PIDKEY_RATE_LIMIT_BURST)
+    )
+    transport = httpx.ASGITransport(app=create_app(StandInConfig(latency_ms=5, jitter_ms=0)))
+    return PIDKeyClient(api_key="test", base_url="http://pidkey.local/ajax/pidms_api", transport=transport)
+
+
+@pytest.fixture(autouse=True)
+def small_batches(monkeypatch):
+    monkeypatch.setattr(settings, "PIDMS_SYNC_BATCH_SIZE", 10)
+    monkeypatch.setattr(settings, "PIDMS_SYNC_CONCURRENCY", 3)
+    monkeypatch.setattr(pidms_service, "AsyncSessionLocal", fake_session_factory)
+
+
+def checked_upsert(failing_batches=()):
+    """check_and_upsert_keys replacement calling the stand-in but not the database."""
+    calls = []
+
+    async def check_and_upsert_keys(db, keys, client):
+        calls.append(keys)
+        if len(calls) in failing_batches:
+            raise RuntimeError("database unavailable")
+        results = await client.check_keys(keys)
+        return {"summary": {"total_keys": len(keys), "updated_keys": len(results), "errors": 0}}
+
+    check_and_upsert_keys.calls = calls
+    return check_and_upsert_keys
+
+
+async def run_sync(db, client):
+    return await asyncio.wait_for(pidms_service.sync_all_keys(db, client), SYNC_TIMEOUT_SECONDS)
+
+
+async def test_sync_all_keys_checks_every_batch(monkeypatch, pidkey_client):
+    keys = generate_keys(95)
+    upsert = checked_upsert()
+    monkeypatch.setattr(pidms_service, "check_and_upsert_keys", upsert)
+    db = FakeKeyListSession(keys)
+
+    try:
+        result = await run_sync(db, pidkey_client)
+    finally:
+        await pidkey_client.aclose()
+
+    assert result["success"] is True
+    assert result["summary"] == {"total_synced": 95, "updated": 95, "errors": 0}
+    assert sorted(key for batch in upsert.calls for key in batch) == keys
+    assert db.rolled_back
+
+
+async def test_sync_all_keys_reports_failed_batches(monkeypatch, pidkey_client):
+    keys = generate_keys(50)
+    monkeypatch.setattr(pidms_service, "check_and_upsert_keys", checked_upsert(failing_batches={2, 4}))
+
+    try:
+        result = await run_sync(FakeKeyListSession(keys), pidkey_client)
+    finally:
+        await pidkey_client.aclose()
+
+    assert result["summary"] == {"total_synced": 30, "updated": 30, "errors": 20}
+    assert len(result["error_details"]) == 20
+    assert all("database unavailable" in detail["error"] for detail in result["error_details"])
+
+
+async def test_sync_all_keys_survives_worker_errors(monkeypatch, pidkey_client):
+    async def broken_sync_batch(batch_keys, batch_num, client):
+        raise RuntimeError("unexpected")
+
+    monkeypatch.setattr(pidms_service, "_sync_batch", broken_sync_batch)
+
+    try:
+        result = await run_sync(FakeKeyListSession(generate_keys(100)), pidkey_client)
+    finally:
+        await pidkey_client.aclose()
+
+    assert result["success"] is False
+    assert result["summary"]["errors"] == 100
+
+
+class FakeScalarResult:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar(self):
+        return self.value
+
+
+class FakeLockConnection:
+    async def execution_options(self, **options):
+        return self
+
+    async def execute(self, statement, params=None):
+        return FakeScalarResult(True)
+
+
+class FakeDirectEngine:
+    @asynccontextmanager
+    async def connect(self):
+        yield FakeLockConnection()
+
+
+class FakeRunSession:
+    """Session the run row is added to / updated through."""
+
+    def __init__(self, fail_on_commit=None):
+        self.fail_on_commit = fail_on_commit
+        self.commits = 0
+        self.updates = []
+
+    def add(self, run):
+        run.id = 1
+
+    async def execute(self, statement):
+        self.updates.append(statement.compile().params)
+
+    async def commit(self):
+        self.commits += 1
+        if self.commits == self.fail_on_commit:
+            raise RuntimeError("commit failed")
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    """The session _record_run_failure opens."""
+    session = FakeRunSession()
+
+    @asynccontextmanager
+    async def session_factory():
+        yield session
+
+    monkeypatch.setattr(pidms_service, "direct_engine", FakeDirectEngine())
+    monkeypatch.setattr(pidms_service, "AsyncSessionLocal", session_factory)
+    return session
+
+
+def sync_result():
+    return {"success": True, "summary": {"total_synced": 1, "updated": 1, "errors": 0}}
+
+
+async def test_run_locked_sync_records_unexpected_errors(monkeypatch, recorder):
+    async def broken_sync_all_keys(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(pidms_service, "sync_all_keys", broken_sync_all_keys)
+
+    with pytest.raises(RuntimeError):
+        await pidms_service.run_locked_sync(FakeRunSession(), None, trigger="manual")
+
+    assert recorder.updates == [{"status": "failed", "error_message": "RuntimeError: boom", "id_1": 1}]
+    assert recorder.commits == 1
+
+
+async def test_run_locked_sync_records_failed_final_commit(monkeypatch, recorder):
+    async def sync_all_keys(*args, **kwargs):
+        return sync_result()
+
+    monkeypatch.setattr(pidms_service, "sync_all_keys", sync_all_keys)
+
+    with pytest.raises(RuntimeError):
+        await pidms_service.run_locked_sync(FakeRunSession(fail_on_commit=2), None, trigger="manual")
+
+    assert recorder.updates[0]["status"] == "failed"
+    assert recorder.updates[0]["error_message"] == "RuntimeError: commit failed"
+
+
+async def test_run_locked_sync_records_cancellation(monkeypatch, recorder):
+    started = asyncio.Event()
+
+    async def slow_sync_all_keys(*args, **kwargs):
+        started.set()
+        await asyncio.sleep(SYNC_TIMEOUT_SECONDS)
+
+    monkeypatch.setattr(pidms_service, "sync_all_keys", slow_sync_all_keys)
+
+    task = asyncio.create_task(pidms_service.run_locked_sync(FakeRunSession(), None, trigger="scheduled"))
+    await started.wait()
+    task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert recorder.updates[0]["status"] == "cancelled"
+    assert recorder.commits == 1
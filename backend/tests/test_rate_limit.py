@@ -0,0 +1,91 @@
+"""
+Route group matching, client identity and response headers of the rate limiter.
+"""
+
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+from app.core.config import settings
+from app.core.rate_limit import RateLimitMiddleware, build_route_groups, client_identity, match_route_group
+from app.services import api_key_service
+
+
+def group_name(method, path):
+    group = match_route_group(build_route_groups(), method, path)
+    return group.name if group else None
+
+
+@pytest.mark.parametrize("method, path, expected", [
+    ("POST", "/api/pidms/sync", "import"),
+    ("GET", "/api/pidms/sync/status", "default"),
+    ("POST", "/api/pidms/check", "import"),
+    ("POST", "/api/dormitory-bills/import/file", "import"),
+    ("POST", "/api/employees/sync", "hrs"),
+    ("GET", "/api/hrs-data/salary", "hrs"),
+    ("GET", "/api/auth/me", "auth"),
+    ("GET", "/static/app.js", None),
+])
+def test_route_groups(method, path, expected):
+    assert group_name(method, path) == expected
+
+
+def request_with_key(api_key):
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/api/employees/search",
+        "headers": [(b"x-api-key", api_key.encode())],
+        "client": ("10.0.0.5", 1234),
+    })
+
+
+@pytest.fixture
+def api_keys(monkeypatch):
+    keys = {}
+
+    async def lookup_api_key(db, key_hash):
+        return keys.get(key_hash)
+
+    monkeypatch.setattr(api_key_service, "lookup_api_key", lookup_api_key)
+    return keys
+
+
+def key_entry(is_active=True, expires_at=None):
+    return {"key_id": "1", "is_active": is_active, "expires_at": expires_at}
+
+
+async def test_valid_api_key_is_its_own_client(api_keys):
+    api_keys[hashlib.sha256(b"good").hexdigest()] = key_entry()
+
+    assert (await client_identity(request_with_key("good"))).startswith("key:")
+
+
+async def test_unknown_or_expired_keys_count_per_ip(api_keys):
+    expired = datetime.now(timezone.utc) - timedelta(days=1)
+    api_keys[hashlib.sha256(b"old").hexdigest()] = key_entry(expires_at=expired)
+    api_keys[hashlib.sha256(b"off").hexdigest()] = key_entry(is_active=False)
+
+    for api_key in ("random", "old", "off"):
+        assert await client_identity(request_with_key(api_key)) == "ip:10.0.0.5"
+
+
+async def test_limit_headers_are_integers(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(settings, "RATE_LIMIT_BACKEND", "memory")
+    monkeypatch.setattr(settings, "RATE_LIMIT_HRS", "2/minute")
+    app = RateLimitMiddleware(PlainTextResponse("ok"))
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        responses = [await client.get("/api/hrs-data/salary") for _ in range(3)]
+
+    assert [response.status_code for response in responses] == [200, 200, 429]
+    assert responses[0].headers["X-RateLimit-Limit"] == "2"
+    assert responses[0].headers["X-RateLimit-Window"] == "60"
+    assert responses[0].headers["X-RateLimit-Remaining"] == "1"
+    assert responses[2].headers["X-RateLimit-Limit"] == "2"
+    assert int(responses[2].headers["Retry-After"]) >= 1